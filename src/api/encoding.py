@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+import msgpack
+from fastapi import Response
+
+# zstd is optional too (standard library from Python 3.14, otherwise the zstandard package)
+try:
+    from compression import zstd as _zstd
+
+    def zstd_compress(data: bytes) -> bytes:
+        return _zstd.compress(data)
+except ImportError:
+    try:
+        import zstandard as _zstandard
+
+        def zstd_compress(data: bytes) -> bytes:
+            return _zstandard.ZstdCompressor().compress(data)
+    except ImportError:
+        zstd_compress = None
+
+GZIP_LEVEL = 6
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COLUMNAR_MEDIA_TYPE = "application/vnd.ndlocr.columnar+json"
+TEXT_MEDIA_TYPE = "text/plain"
+ALTO_MEDIA_TYPE = "application/alto+xml"
+PAGE_XML_MEDIA_TYPE = "application/vnd.prima.page+xml"
+HOCR_MEDIA_TYPE = "text/vnd.hocr+html"
+PDF_MEDIA_TYPE = "application/pdf"
+
+# Response formats by media type (aliases included), in server preference order for ties
+FORMATS_BY_MEDIA_TYPE = {
+    JSON_MEDIA_TYPE: "json",
+    COLUMNAR_MEDIA_TYPE: "columnar",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    TEXT_MEDIA_TYPE: "text",
+    ALTO_MEDIA_TYPE: "alto",
+    PAGE_XML_MEDIA_TYPE: "pagexml",
+    HOCR_MEDIA_TYPE: "hocr",
+    PDF_MEDIA_TYPE: "pdf",
+}
+
+# Formats written from the engine's layout tree (src/core/formats.py, src/core/pdf.py) rather than the JSON pages
+LAYOUT_FORMATS = {"alto", "pagexml", "hocr", "pdf"}
+MEDIA_TYPES_BY_FORMAT = {
+    "alto": ALTO_MEDIA_TYPE,
+    "pagexml": PAGE_XML_MEDIA_TYPE,
+    "hocr": HOCR_MEDIA_TYPE,
+    "pdf": PDF_MEDIA_TYPE,
+}
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    entries = []
+    for item in accept.split(","):
+        parts = [p.strip() for p in item.split(";")]
+        media_type = parts[0].lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        entries.append((media_type, q))
+    return entries
+
+
+def negotiate_format(accept: Optional[str], supported: Optional[Collection[str]] = None) -> str:
+    """
+    Picks the response format ("json", "columnar", "msgpack", "text", "alto", "pagexml",
+    "hocr" or "pdf") from an Accept header, limited to `supported` formats when given.
+    Falls back to JSON for missing, wildcard or unsupported Accept values.
+    """
+    if not accept:
+        return "json"
+    best, best_q = "json", 0.0
+    for media_type, q in _parse_accept(accept):
+        fmt = FORMATS_BY_MEDIA_TYPE.get(media_type)
+        if fmt is None or q <= 0:
+            continue
+        if supported is not None and fmt not in supported:
+            continue
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def columnar_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts a page's line objects into parallel arrays. Boxes become
+    [xmin, ymin, xmax, ymax] instead of four corner points.
+    """
+    lines = page["lines"]
+    boxes = []
+    for line in lines:
+        xs = [point[0] for point in line["boundingBox"]]
+        ys = [point[1] for point in line["boundingBox"]]
+        boxes.append([min(xs), min(ys), max(xs), max(ys)])
+    columnar = {key: value for key, value in page.items() if key != "lines"}
+    columnar["lines"] = {
+        "ids": [line["id"] for line in lines],
+        "texts": [line["text"] for line in lines],
+        "confidences": [line["confidence"] for line in lines],
+        "boxes": boxes,
+        "class_indices": [line.get("class_index") for line in lines],
+        "filtered": [line.get("filtered", False) for line in lines],
+    }
+    return columnar
+
+
+def encode_ocr_response(content: Dict[str, Any], fmt: str) -> Response:
+    """Serializes an OCRResponse-shaped dict in the negotiated format."""
+    if fmt == "text":
+        # Pages separated by form feeds
+        body = "\f".join(page["markdown"] for page in content["pages"])
+        return Response(content=body, media_type=TEXT_MEDIA_TYPE, headers={"Vary": "Accept"})
+    if fmt == "columnar":
+        content = dict(content, pages=[columnar_page(page) for page in content["pages"]])
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return Response(content=body, media_type=COLUMNAR_MEDIA_TYPE, headers={"Vary": "Accept"})
+    if fmt == "msgpack":
+        return Response(content=msgpack.packb(content, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE, headers={"Vary": "Accept"})
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"Vary": "Accept"})
+
+
+class CompressedPayload:
+    """
+    A response body serialized once and kept pre-compressed (gzip, plus zstd when available),
+    with a strong ETag derived from the uncompressed bytes. The uncompressed form is not
+    kept and is only rebuilt for clients that accept neither encoding.
+    """
+    def __init__(self, data: bytes, media_type: str = JSON_MEDIA_TYPE):
+        self.media_type = media_type
+        self.etag = '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+        self.encoded: Dict[str, bytes] = {"gzip": gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+        if zstd_compress is not None:
+            self.encoded["zstd"] = zstd_compress(data)
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Returns (body, content encoding) for an Accept-Encoding header; None means identity.
+        The coding with the highest q-value is used (zstd on a tie); "*" only covers codings
+        not named in the header, and a coding with q=0 is never used.
+        """
+        explicit = dict(_parse_accept(accept_encoding or ""))
+        best, best_q = None, 0.0
+        for coding in ("zstd", "gzip"):
+            q = explicit.get(coding, explicit.get("*", 0.0))
+            if coding in self.encoded and q > best_q:
+                best, best_q = coding, q
+        if best is not None:
+            return self.encoded[best], best
+        return gzip.decompress(self.encoded["gzip"]), None
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header matches this payload's ETag."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def response(self, accept_encoding: Optional[str], if_none_match: Optional[str]) -> Response:
+        """Builds a 200 response in the best accepted encoding, or 304 for a matching ETag."""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        body, encoding = self.select(accept_encoding)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
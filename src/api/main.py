@@ -1,19 +1,39 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request, BackgroundTasks, Depends
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Depends, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
+from collections import OrderedDict
 import asyncio
 import io
 import uuid
 import json
 import binascii
+import functools
+import secrets
+from concurrent.futures import Future
+import tarfile
+import time
+import threading
+import zipfile
 import PIL
 from PIL import Image
 import base64
-from typing import Optional, Dict, Any
+from typing import Optional, Callable, Dict, Any, Iterator, List, Tuple, Type
+from pydantic import BaseModel
 import os
 import logging
 
-from src.core.engine import NDLOCREngine
-from src.schemas.ocr import OCRResponse, OCRPage, OCRLine, OCRRequest, OCRJobResponse, OCRJobResult
+from src.core.engine import ModelReloadInProgressError, NDLOCREngine, PageLayout
+from src.core.boxes import DetectionThresholds
+from src.core.cancellation import CancellationToken, OCRCancelledError, DEADLINE_EXCEEDED, CLIENT_DISCONNECTED
+from src.core.formats import iter_alto, iter_hocr, iter_page_xml
+from src.core.pdf import PageImage, iter_searchable_pdf
+from src.core.presets import OCRPreset, PRESETS, get_preset
+from src.core.profiler import SamplingProfiler
+from src.core.registry import DEFAULT_MODEL, ModelRegistry, load_model_specs
+from src.core.volume import InputPathError, InputTooLargeError, open_mapped_image, resolve_input_path
+from src.api.encoding import CompressedPayload, LAYOUT_FORMATS, MEDIA_TYPES_BY_FORMAT, negotiate_format, encode_ocr_response
+from src.api.scheduler import LaneScheduler, CostBudget, CostReservation, INTERACTIVE_LANE, BATCH_LANE
+from src.schemas.ocr import OCRResponse, OCRPage, OCRLine, OCRLineBox, OCRRequest, OCRRecognizeRequest, OCRJobResponse, OCRJobResult
 
 # Configure logging to provide visibility into API operations and background tasks
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +47,10 @@ class InMemoryJobStore:
     """
     def __init__(self):
         self._jobs: Dict[str, OCRJobResult] = {}
+        # Cancellation handles of queued/running jobs: job_id -> (token, scheduler future)
+        self._cancellation: Dict[str, Tuple[CancellationToken, Optional[Future]]] = {}
+        # Serialized, pre-compressed results of completed jobs
+        self._payloads: Dict[str, CompressedPayload] = {}
 
     def get(self, job_id: str) -> Optional[OCRJobResult]:
         """Retrieves a job result by its ID."""
@@ -40,29 +64,129 @@ class InMemoryJobStore:
         """Checks if a job with the given ID exists."""
         return job_id in self._jobs
 
-def _engine_result_to_ocr_page(result: Dict[str, Any], index: int = 0) -> OCRPage:
+    def set_payload(self, job_id: str, payload: CompressedPayload):
+        """Stores the serialized result of a completed job."""
+        self._payloads[job_id] = payload
+
+    def get_payload(self, job_id: str) -> Optional[CompressedPayload]:
+        """Returns the serialized result of a completed job, if any."""
+        return self._payloads.get(job_id)
+
+    def set_cancellation(self, job_id: str, token: CancellationToken, future: Optional[Future] = None):
+        """Registers the cancellation token (and scheduler future) of an unfinished job."""
+        self._cancellation[job_id] = (token, future)
+
+    def get_cancellation(self, job_id: str) -> Tuple[Optional[CancellationToken], Optional[Future]]:
+        """Returns the cancellation token and future of an unfinished job, if any."""
+        return self._cancellation.get(job_id, (None, None))
+
+    def clear_cancellation(self, job_id: str):
+        """Drops the cancellation handles once a job has finished."""
+        self._cancellation.pop(job_id, None)
+
+class InMemoryProfileStore:
     """
-    Maps the raw output dictionary from NDLOCREngine to the OCRPage Pydantic model.
+    Bounded in-memory store for request profiles.
+    Keeps only the most recent `max_profiles` entries to cap memory usage.
+    """
+    def __init__(self, max_profiles: int = 50):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, profiler: SamplingProfiler, path: str) -> str:
+        """Stores a finished profile and returns its ID."""
+        profile_id = str(uuid.uuid4())
+        self._profiles[profile_id] = {
+            "profiler": profiler,
+            "path": path,
+            "created_at": time.time(),
+        }
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        """Retrieves a stored profiler by its ID."""
+        entry = self._profiles.get(profile_id)
+        return entry["profiler"] if entry else None
+
+    def summaries(self) -> list:
+        """Returns metadata of all stored profiles, newest first."""
+        return [
+            {
+                "profile_id": profile_id,
+                "path": entry["path"],
+                "created_at": entry["created_at"],
+                "duration": entry["profiler"].duration,
+                "samples": entry["profiler"].sample_count,
+            }
+            for profile_id, entry in reversed(self._profiles.items())
+        ]
+
+def _engine_result_to_page(result: Dict[str, Any], index: int = 0, name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Maps the raw output dictionary from NDLOCREngine to an OCRPage-shaped dict.
+    Engine line dictionaries already have the OCRLine fields, so they are passed through
+    without per-line copying or validation (the fast path for large pages).
 
     Args:
         result: Dictionary containing 'text', 'img_info', and 'lines' from the engine.
-        index: Page index (defaults to 0 as currently single-page is supported).
-    """
-    return OCRPage(
-        index=index,
-        markdown=result["text"],
-        width=result["img_info"]["width"],
-        height=result["img_info"]["height"],
-        lines=[
-            OCRLine(
-                id=line["id"],
-                text=line["text"],
-                confidence=line["confidence"],
-                boundingBox=line["boundingBox"],
-                class_index=line.get("class_index")
-            ) for line in result["lines"]
-        ]
-    )
+        index: Page index within the response.
+        name: Optional source file name of the page.
+    """
+    return {
+        "index": index,
+        "name": name,
+        "markdown": result["text"],
+        "width": result["img_info"]["width"],
+        "height": result["img_info"]["height"],
+        "lines": result["lines"],
+    }
+
+def _engine_result_to_ocr_page(result: Dict[str, Any], index: int = 0, name: Optional[str] = None) -> OCRPage:
+    """
+    Maps the raw output dictionary from NDLOCREngine to the OCRPage Pydantic model.
+    Engine output is trusted, so the models are constructed without validation.
+    """
+    return _page_model(_engine_result_to_page(result, index=index, name=name))
+
+def _page_model(page: Dict[str, Any]) -> OCRPage:
+    """Builds the OCRPage model of an OCRPage-shaped dict, without validation."""
+    lines = [
+        OCRLine.model_construct(
+            id=line["id"],
+            text=line["text"],
+            confidence=line["confidence"],
+            boundingBox=line["boundingBox"],
+            class_index=line.get("class_index"),
+            pred_char_count=line.get("pred_char_count"),
+            filtered=line.get("filtered", False),
+        ) for line in page["lines"]
+    ]
+    return OCRPage.model_construct(**dict(page, lines=lines))
+
+def _ocr_response(pages: List[Dict[str, Any]], usage: Dict[str, Any], fmt: str = "json", model: str = DEFAULT_MODEL) -> Response:
+    """
+    Encodes an OCR response in the format negotiated from the Accept header
+    (JSON, columnar JSON, msgpack or plain text), bypassing response model validation.
+    """
+    content = {"model": model, "pages": pages, "usage": usage}
+    return encode_ocr_response(content, fmt)
+
+def _layout_response(layouts: List[PageLayout], fmt: str, images: Optional[List[PageImage]] = None) -> StreamingResponse:
+    """
+    Streams ALTO, PAGE XML (single page), hOCR or a searchable PDF written from the
+    engine's layout trees. The PDF also needs the page images, in layout order.
+    """
+    if fmt == "pdf":
+        chunks = iter_searchable_pdf(zip(images, layouts))
+    elif fmt == "alto":
+        chunks = iter_alto(layouts)
+    elif fmt == "hocr":
+        chunks = iter_hocr(layouts)
+    else:
+        chunks = iter_page_xml(layouts[0])
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES_BY_FORMAT[fmt], headers={"Vary": "Accept"})
 
 # Security and resource limits
 # These limits prevent DoS attacks via large files or excessive pixel counts.
@@ -70,6 +194,122 @@ MAX_IMAGE_SIZE = int(os.getenv("MAX_IMAGE_SIZE", 10 * 1024 * 1024)) # Default 10
 MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", 15 * 1024 * 1024))   # Default 15MB
 MAX_PIXELS = int(os.getenv("MAX_PIXELS", 100_000_000))            # Default 100MP
 
+# Shared-volume input: JSON requests may reference a file under INPUT_ROOT with `path` instead
+# of sending `image` (disabled when unset). Files are memory-mapped rather than uploaded.
+INPUT_ROOT = os.getenv("INPUT_ROOT", "")
+MAX_PATH_INPUT_SIZE = int(os.getenv("MAX_PATH_INPUT_SIZE", 1024 * 1024 * 1024))  # Default 1GB
+
+# Multi-page TIFF input: at most MAX_DOCUMENT_PAGES frames per file. Single-image endpoints
+# decode and recognize MULTIPAGE_CHUNK_PAGES frames at a time, bounding memory to a few frames.
+MAX_DOCUMENT_PAGES = int(os.getenv("MAX_DOCUMENT_PAGES", 1000))
+MULTIPAGE_CHUNK_PAGES = int(os.getenv("MULTIPAGE_CHUNK_PAGES", 2))
+
+# Batch endpoint limits
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", 64))                    # Images per batch request
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_SIZE", 200 * 1024 * 1024))     # Default 200MB per zip/tar upload
+BATCH_CHUNK_PAGES = int(os.getenv("BATCH_CHUNK_PAGES", 8))                   # Pages recognized together per engine call
+
+# Recognition-only endpoint: maximum number of line boxes per request
+MAX_RECOGNIZE_LINES = int(os.getenv("MAX_RECOGNIZE_LINES", 2000))
+
+# Pipeline modes of /v1/ocr: full OCR, or detection and reading order only (lines without text)
+OCR_MODES = ("full", "detect")
+
+# Response formats of multi-page responses (PAGE XML holds a single page per document)
+MULTIPAGE_FORMATS = ("json", "columnar", "msgpack", "text", "alto", "hocr", "pdf")
+
+# Speed/quality presets (fast, balanced, accurate; see src/core/presets.py), selected per request
+# with the `preset` query parameter. Requests without one use DEFAULT_PRESET, or OVERLOAD_PRESET
+# while the server is overloaded: cost budget utilization at or above OVERLOAD_UTILIZATION, or
+# pages waiting for a slot in the request's lane (empty OVERLOAD_PRESET disables degradation).
+DEFAULT_PRESET = os.getenv("DEFAULT_PRESET", "balanced")
+OVERLOAD_PRESET = os.getenv("OVERLOAD_PRESET", "")
+OVERLOAD_UTILIZATION = float(os.getenv("OVERLOAD_UTILIZATION", 0.8))
+
+# Scheduling: concurrent pages per priority lane.
+# Interactive requests (/v1/ocr) and batch work (/v1/ocr/batch, /v1/ocr/jobs) have reserved slots
+# on the engine's page executor (sized to the sum of both), and the lines of interactive pages are
+# recognized ahead of queued batch lines, so bulk jobs cannot starve interactive latency.
+INTERACTIVE_CONCURRENCY = int(os.getenv("INTERACTIVE_CONCURRENCY", 4))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 2))
+# Threads of the engine's line recognition pool shared by all pages (0 = the CPU count divided
+# by WEB_CONCURRENCY, the worker process count gunicorn also reads, so workers split the cores)
+RECOGNITION_WORKERS = int(os.getenv("RECOGNITION_WORKERS", 0))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+
+# Deadlines: default per-request timeout in seconds (0 disables it) and the upper bound a client
+# may request via the X-Request-Timeout header or `timeout` query parameter.
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("DEFAULT_REQUEST_TIMEOUT", 0))
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", 3600))
+DISCONNECT_POLL_INTERVAL = 0.25 # Seconds between client disconnect checks while waiting for OCR
+
+# Load shedding: budget for the projected cost of in-flight pages (0 disables shedding).
+# A page costs COST_PER_MEGAPIXEL per megapixel at admission and is re-estimated as
+# COST_PER_LINE per (weighted) detected line once layout analysis has run.
+COST_BUDGET = float(os.getenv("COST_BUDGET", 0))
+COST_PER_MEGAPIXEL = float(os.getenv("COST_PER_MEGAPIXEL", 1.0))
+COST_PER_LINE = float(os.getenv("COST_PER_LINE", 0.05))
+
+# Incremental re-OCR: number of recently processed pages whose line texts are kept, so a
+# lightly edited resubmission only recognizes new or changed lines (0 disables it).
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", 0))
+# Recognition results of repeated line crops (running headers, page numbers, form labels),
+# keyed by an exact hash of the crop and the PARSEQ tier (0 disables the cache).
+LINE_CACHE_SIZE = int(os.getenv("LINE_CACHE_SIZE", 10000))
+# Raw detector outputs of recently processed images, so re-thresholding an image
+# (det_*_threshold query parameters) does not rerun detection. Off by default: the cache key
+# hashes every decoded page (tens of ms on a 12 MP scan), paid on each request (0 disables the cache).
+DETECTION_CACHE_SIZE = int(os.getenv("DETECTION_CACHE_SIZE", 0))
+# Pages with less ink (share of small blocks with visible contrast, see src/core/blank.py) are
+# returned empty without running detection. Off by default (0): a page holding only a small
+# page number can fall below any useful threshold, and would then lose its text.
+BLANK_PAGE_INK_RATIO = float(os.getenv("BLANK_PAGE_INK_RATIO", 0))
+# Noise filters applied to detected lines before recognition (see LineFilter in src/core/boxes.py):
+# minimum area in square pixels, minimum confidence, maximum long/short side ratio, and maximum
+# share of a line inside a larger one of the same type. 0 (1 for the overlap) disables a filter;
+# all are off by default, since small marks, rules and ruby can be real text.
+MIN_LINE_AREA = float(os.getenv("MIN_LINE_AREA", 0.0))
+MIN_LINE_CONFIDENCE = float(os.getenv("MIN_LINE_CONFIDENCE", 0.0))
+MAX_LINE_ASPECT = float(os.getenv("MAX_LINE_ASPECT", 0.0))
+MAX_LINE_OVERLAP = float(os.getenv("MAX_LINE_OVERLAP", 1.0))
+# Return filtered lines without text (marked "filtered") instead of dropping them
+REPORT_FILTERED_LINES = os.getenv("REPORT_FILTERED_LINES", "false").lower() == "true"
+
+# Model sets selectable with the request `model` field (see src/core/registry.py). The default
+# set is served as "ndlocr-lite"; others are listed in the MODEL_REGISTRY YAML file, loaded on
+# first use and unloaded least recently used first once their weight files exceed
+# MODEL_MEMORY_BUDGET_MB (0 = no limit).
+MODEL_REGISTRY = os.getenv("MODEL_REGISTRY", "")
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", 0))
+
+# Admin access and request profiling
+# Admin endpoints are disabled unless ADMIN_TOKEN is set.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))     # Seconds between samples
+# Run synthetic inferences through every model at startup; /health answers 503 until done
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+# Seconds a model reload (POST /admin/models/reload) waits for requests on the old models
+RELOAD_DRAIN_TIMEOUT = float(os.getenv("RELOAD_DRAIN_TIMEOUT", 300))
+
+async def _warm_up(app: FastAPI):
+    """Runs the engine warmup off the event loop, then marks the app ready (also if it failed)."""
+    started = time.perf_counter()
+    try:
+        timings = await asyncio.to_thread(app.state.engine.warmup)
+        details = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        logger.info(f"Warmup finished in {time.perf_counter() - started:.2f}s ({details})")
+    except Exception:
+        logger.exception("Warmup failed, serving without it")
+    finally:
+        app.state.ready = True
+
+def _recognition_workers() -> int:
+    """Recognition threads per worker process: RECOGNITION_WORKERS, or this process's share of the CPUs."""
+    if RECOGNITION_WORKERS > 0:
+        return RECOGNITION_WORKERS
+    return max(1, (os.cpu_count() or 4) // max(1, WEB_CONCURRENCY))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -81,10 +321,56 @@ async def lifespan(app: FastAPI):
     # Initialize engine on CPU by default.
     # Models are loaded once and stored in app.state for sharing across requests.
     enable_tcy = os.getenv("ENABLE_TCY", "false").lower() == "true"
-    app.state.engine = NDLOCREngine(device="cpu", enable_tcy=enable_tcy)
+    app.state.engine = NDLOCREngine(
+        device="cpu",
+        enable_tcy=enable_tcy,
+        num_workers=_recognition_workers(),
+        page_workers=INTERACTIVE_CONCURRENCY + BATCH_CONCURRENCY,
+        page_cache_size=PAGE_CACHE_SIZE,
+        line_cache_size=LINE_CACHE_SIZE,
+        detection_cache_size=DETECTION_CACHE_SIZE,
+        blank_ink_ratio=BLANK_PAGE_INK_RATIO,
+        line_min_area=MIN_LINE_AREA,
+        line_min_conf=MIN_LINE_CONFIDENCE,
+        line_max_aspect=MAX_LINE_ASPECT,
+        line_max_overlap=MAX_LINE_OVERLAP,
+        report_filtered_lines=REPORT_FILTERED_LINES,
+    )
+    app.state.model_registry = ModelRegistry(
+        app.state.engine,
+        load_model_specs(MODEL_REGISTRY) if MODEL_REGISTRY else {},
+        memory_budget=MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+        engine_kwargs={
+            "device": "cpu",
+            "page_cache_size": PAGE_CACHE_SIZE,
+            "line_cache_size": LINE_CACHE_SIZE,
+            "detection_cache_size": DETECTION_CACHE_SIZE,
+            "blank_ink_ratio": BLANK_PAGE_INK_RATIO,
+            "line_min_area": MIN_LINE_AREA,
+            "line_min_conf": MIN_LINE_CONFIDENCE,
+            "line_max_aspect": MAX_LINE_ASPECT,
+            "line_max_overlap": MAX_LINE_OVERLAP,
+            "report_filtered_lines": REPORT_FILTERED_LINES,
+        },
+    )
     app.state.job_store = InMemoryJobStore()
+    app.state.profile_store = InMemoryProfileStore()
+    # Lanes dispatch onto the engine's page executor, so page work and line recognition
+    # run on exactly two bounded pools. The interactive lane comes first: highest priority.
+    app.state.scheduler = LaneScheduler({
+        INTERACTIVE_LANE: INTERACTIVE_CONCURRENCY,
+        BATCH_LANE: BATCH_CONCURRENCY,
+    }, executor=app.state.engine.page_executor)
+    app.state.cost_budget = CostBudget(COST_BUDGET, COST_PER_MEGAPIXEL, COST_PER_LINE)
+    # Warm up in the background so /health can report the server as not ready meanwhile
+    app.state.ready = not WARMUP_ON_STARTUP
+    warmup_task = asyncio.create_task(_warm_up(app)) if WARMUP_ON_STARTUP else None
     yield
     logger.info("Shutting down...")
+    if warmup_task is not None:
+        await warmup_task
+    app.state.scheduler.shutdown()
+    app.state.model_registry.shutdown()
     # Clean up engine resources (e.g., ThreadPoolExecutor)
     if hasattr(app.state, "engine") and app.state.engine is not None:
         app.state.engine.shutdown()
@@ -98,112 +384,931 @@ def get_engine(request: Request) -> NDLOCREngine:
 def get_job_store(request: Request) -> InMemoryJobStore:
     return request.app.state.job_store
 
-def process_ocr_job(job_id: str, img: Image.Image, filename: str, engine: NDLOCREngine, job_store: InMemoryJobStore):
+def get_profile_store(request: Request) -> InMemoryProfileStore:
+    return request.app.state.profile_store
+
+def get_scheduler(request: Request) -> LaneScheduler:
+    return request.app.state.scheduler
+
+def get_cost_budget(request: Request) -> CostBudget:
+    return request.app.state.cost_budget
+
+async def _resolve_engine(request: Request, engine: NDLOCREngine, model: Optional[str]) -> NDLOCREngine:
+    """
+    Returns the engine serving the requested model set (`engine`, the default one, if no other
+    is requested). A model set that is not loaded yet is loaded off the event loop.
+    """
+    if model is None or model == DEFAULT_MODEL:
+        return engine
+    registry: ModelRegistry = request.app.state.model_registry
+    try:
+        return await asyncio.to_thread(registry.get, model)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown model, expected one of: {', '.join(registry.names())}")
+    except Exception:
+        logger.exception(f"Failed to load model {model}")
+        raise HTTPException(status_code=503, detail="Model could not be loaded")
+
+def _layout_cost_tracker(reservation: CostReservation, budget: CostBudget, engine: NDLOCREngine, preset: Optional[OCRPreset] = None):
+    """
+    Returns an engine on_layout callback that replaces the pixel-based admission estimate
+    with the line-based cost of the page(s) once detection has run.
+    """
+    weighted_lines = 0.0
+
+    def on_layout(layout: PageLayout):
+        nonlocal weighted_lines
+        weighted_lines += engine.estimate_recognition_cost(layout, preset)
+        reservation.update(budget.estimate_lines(weighted_lines))
+
+    return on_layout
+
+def _select_preset(name: Optional[str], lane: str, scheduler: LaneScheduler, cost_budget: CostBudget) -> OCRPreset:
+    """
+    Resolves the preset of a request. An explicit `preset` is always honoured; otherwise the
+    server default applies, degraded to OVERLOAD_PRESET while the server is overloaded.
+    """
+    if name is not None:
+        if name not in PRESETS:
+            raise HTTPException(status_code=400, detail=f"Invalid preset, expected one of: {', '.join(PRESETS)}")
+        return PRESETS[name]
+    if OVERLOAD_PRESET:
+        utilization = cost_budget.utilization()
+        if (utilization is not None and utilization >= OVERLOAD_UTILIZATION) or scheduler.stats()[lane]["queued"] > 0:
+            return get_preset(OVERLOAD_PRESET)
+    return get_preset(DEFAULT_PRESET)
+
+def _detection_thresholds(
+    engine: Optional[NDLOCREngine],
+    score: Optional[float],
+    conf: Optional[float],
+    iou: Optional[float],
+) -> Optional[DetectionThresholds]:
+    """
+    Builds the per-request detection thresholds from the det_*_threshold query parameters,
+    with the engine's defaults for omitted ones. None if the request overrides none of them.
+    """
+    if score is None and conf is None and iou is None:
+        return None
+    if any(value is not None and not 0.0 <= value <= 1.0 for value in (score, conf, iou)):
+        raise HTTPException(status_code=400, detail="Invalid detection threshold, expected a value between 0 and 1")
+    defaults = engine.default_thresholds if engine is not None else DetectionThresholds()
+    return DetectionThresholds(
+        defaults.score if score is None else score,
+        defaults.conf if conf is None else conf,
+        defaults.iou if iou is None else iou,
+    )
+
+def _fairness_key(request: Request) -> str:
+    """Key used for round-robin fairness within a lane: the API key if sent, otherwise the client address."""
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return f"key:{api_key}"
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+def _is_admin(request: Request) -> bool:
+    """Checks the X-Admin-Token header against ADMIN_TOKEN (admin access is disabled when unset)."""
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def require_admin(request: Request):
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+def _profiled(request: Request, fn: Callable) -> Callable:
+    """
+    Wraps `fn` so the request's profiler, if any, samples the thread running it and the
+    recognition threads running its lines.
+    """
+    profiler = getattr(request.state, "profiler", None)
+    return profiler.wrap(fn) if profiler is not None else fn
+
+def _should_profile(request: Request) -> bool:
+    """Profiling is enabled globally via PROFILE_REQUESTS or per request via X-Profile for admins."""
+    if PROFILE_REQUESTS:
+        return True
+    return request.headers.get("X-Profile", "").lower() in ("1", "true") and _is_admin(request)
+
+def _request_timeout(request: Request) -> Optional[float]:
+    """
+    Reads the per-request deadline (seconds) from the X-Request-Timeout header or `timeout`
+    query parameter, falling back to DEFAULT_REQUEST_TIMEOUT and capped at MAX_REQUEST_TIMEOUT.
+    """
+    raw = request.headers.get("X-Request-Timeout") or request.query_params.get("timeout")
+    if raw is None:
+        return DEFAULT_REQUEST_TIMEOUT or None
+    try:
+        timeout = float(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid request timeout")
+    if timeout <= 0:
+        raise HTTPException(status_code=400, detail="Invalid request timeout")
+    return min(timeout, MAX_REQUEST_TIMEOUT)
+
+def _cancelled_exception(token: CancellationToken) -> HTTPException:
+    """Maps the reason a request's token was cancelled to the HTTP error returned to the client."""
+    if token.reason == DEADLINE_EXCEEDED:
+        return HTTPException(status_code=504, detail="Request deadline exceeded")
+    if token.reason == CLIENT_DISCONNECTED:
+        return HTTPException(status_code=499, detail="Client closed request")
+    return HTTPException(status_code=409, detail="Request cancelled")
+
+async def _await_cancellable(request: Request, future: Future, token: CancellationToken) -> Any:
+    """
+    Awaits a scheduler future while watching for client disconnects and the request deadline.
+    On either, the token is cancelled (stopping the engine cooperatively) and a queued future
+    is dropped before it starts.
+    """
+    waiter = asyncio.wrap_future(future)
+    try:
+        while True:
+            done, _ = await asyncio.wait({waiter}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return waiter.result()
+            if await request.is_disconnected():
+                token.cancel(CLIENT_DISCONNECTED)
+            if token.cancelled:
+                future.cancel()
+                raise _cancelled_exception(token)
+    except (OCRCancelledError, asyncio.CancelledError):
+        raise _cancelled_exception(token)
+
+def process_ocr_job(
+    job_id: str,
+    img: Image.Image,
+    filename: str,
+    engine: NDLOCREngine,
+    job_store: InMemoryJobStore,
+    cancel_token: Optional[CancellationToken] = None,
+    cost_budget: Optional[CostBudget] = None,
+    preset: Optional[OCRPreset] = None,
+    thresholds: Optional[DetectionThresholds] = None,
+    model: str = DEFAULT_MODEL,
+):
     """
     Background worker function for asynchronous OCR processing.
     Updates the job status in the JobStore throughout the process.
+    With a cost budget, the job stays pending until the budget has room for it.
     """
     job = job_store.get(job_id)
     if job is None:
         return
 
-    if engine is None:
-        job.status = "failed"
-        job.error = "Engine not initialized"
-        return
-
+    reservation = None
     try:
+        if engine is None:
+            job.status = "failed"
+            job.error = "Engine not initialized"
+            return
+
+        # Multi-page TIFFs reserve their cost chunk by chunk instead (see _process_pages)
+        multipage = _frame_count(img) > 1
+        on_layout = None
+        if cost_budget is not None and not multipage:
+            # Defer (rather than reject) jobs while the server is over budget
+            reservation = cost_budget.reserve(
+                cost_budget.estimate_pixels(img.width * img.height),
+                should_abort=lambda: cancel_token is not None and cancel_token.cancelled,
+            )
+            if reservation is not None:
+                on_layout = _layout_cost_tracker(reservation, cost_budget, engine, preset)
+
+        if cancel_token is not None and cancel_token.cancelled:
+            _mark_job_cancelled(job, cancel_token)
+            return
+
         job.status = "processing"
-        # Synchronous call to engine.ocr (run in background task thread)
-        result = engine.ocr(img, img_name=filename)
-        
-        # Convert engine output to API schema
-        page = _engine_result_to_ocr_page(result)
-        
-        job.result = OCRResponse(
-            model="ndlocr-lite",
-            pages=[page],
-            usage={"pages": 1}
+        # Synchronous call to engine.ocr (run on the scheduler's batch lane)
+        if multipage:
+            pages = [
+                _page_model(page) for page in _process_pages(
+                    _iter_frames(img, filename), engine, cancel_token, cost_budget,
+                    preset=preset, thresholds=thresholds, chunk_pages=MULTIPAGE_CHUNK_PAGES,
+                )
+            ]
+        else:
+            result = engine.ocr(img, img_name=filename, cancel_token=cancel_token, on_layout=on_layout, preset=preset, thresholds=thresholds)
+            # Convert engine output to API schema
+            pages = [_engine_result_to_ocr_page(result)]
+
+        if cancel_token is not None and cancel_token.cancelled:
+            _mark_job_cancelled(job, cancel_token)
+            return
+
+        result = OCRResponse(
+            model=model,
+            pages=pages,
+            usage={"pages": len(pages), "preset": (preset or get_preset()).name}
         )
+        # Completed results never change: serialize and compress them once for all polls. Only the
+        # compressed payload is kept; the job record itself holds no result.
+        completed = job.model_copy(update={"status": "completed", "result": result})
+        job_store.set_payload(job_id, CompressedPayload(completed.model_dump_json().encode("utf-8")))
         job.status = "completed"
+    except OCRCancelledError:
+        _mark_job_cancelled(job, cancel_token)
     except Exception:
         # Log unexpected errors to aid debugging while keeping client error messages generic
         logger.exception("An error occurred during background OCR processing")
         job.status = "failed"
         job.error = "An internal error occurred during OCR processing"
+    finally:
+        if reservation is not None:
+            reservation.release()
+
+def _mark_job_cancelled(job: OCRJobResult, token: Optional[CancellationToken]):
+    job.status = "cancelled"
+    job.result = None
+    job.error = "Job deadline exceeded" if token is not None and token.reason == DEADLINE_EXCEEDED else "Job cancelled"
 
 @app.post("/v1/ocr", response_model=OCRResponse)
 async def ocr_endpoint(
     request: Request,
     file: Optional[UploadFile] = File(None),
+    mode: str = "full",
+    preset: Optional[str] = None,
+    det_score_threshold: Optional[float] = None,
+    det_conf_threshold: Optional[float] = None,
+    det_iou_threshold: Optional[float] = None,
+    model: Optional[str] = None,
     engine: NDLOCREngine = Depends(get_engine),
+    scheduler: LaneScheduler = Depends(get_scheduler),
+    cost_budget: CostBudget = Depends(get_cost_budget),
 ):
     """
     Synchronous OCR endpoint.
     Processes the provided image (file or base64) and returns results immediately.
+    With `mode=detect`, only layout detection and reading order run and lines are returned
+    without text (their boxes can be passed to /v1/ocr/recognize later).
+    `preset` selects the speed/quality preset (fast, balanced or accurate), and the
+    det_*_threshold parameters override the detection thresholds for this request.
+    `model` (or the `model` field of a JSON body) selects the model set.
     """
+    if mode not in OCR_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode, expected one of: {', '.join(OCR_MODES)}")
+    thresholds = _detection_thresholds(engine, det_score_threshold, det_conf_threshold, det_iou_threshold)
+    # Optionally profile the handler and the engine call of this request: the event loop thread
+    # is sampled from the start, the page and recognition threads while they run the request's
+    # work (see _profiled)
+    profiler = None
+    if _should_profile(request):
+        profiler = SamplingProfiler(interval=PROFILE_INTERVAL, thread_idents=[threading.get_ident()])
+        request.state.profiler = profiler
+        profiler.start()
+    response = None
+    try:
+        response = await _run_sync_ocr(request, file, engine, scheduler, cost_budget, mode, preset, thresholds, model)
+        return response
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profile_id = get_profile_store(request).add(profiler, request.url.path)
+            if response is not None:
+                response.headers["X-Profile-Id"] = profile_id
+            logger.info(f"Stored request profile {profile_id} ({profiler.duration:.3f}s, {profiler.sample_count} samples)")
+
+async def _run_sync_ocr(
+    request: Request,
+    file: Optional[UploadFile],
+    engine: NDLOCREngine,
+    scheduler: LaneScheduler,
+    cost_budget: CostBudget,
+    mode: str = "full",
+    preset_name: Optional[str] = None,
+    thresholds: Optional[DetectionThresholds] = None,
+    model: Optional[str] = None,
+) -> Response:
     # Extract image from multipart/form-data or JSON body
-    img, filename = await _get_image_from_request(request, file)
+    img, filename, body, data = await _parse_image_request(request, file)
     
     if engine is None:
         raise HTTPException(status_code=503, detail="Engine not initialized")
+    model = model or (body.model if body is not None else None) or DEFAULT_MODEL
+    engine = await _resolve_engine(request, engine, model)
+    preset = _select_preset(preset_name, INTERACTIVE_LANE, scheduler, cost_budget)
+
+    token = CancellationToken.with_timeout(_request_timeout(request))
+    if _frame_count(img) > 1:
+        return await _run_multipage_ocr(request, img, filename, engine, scheduler, cost_budget, token, mode, preset, thresholds, model)
+    fmt = negotiate_format(request.headers.get("accept"))
+    # Layout formats are written from the page's XML tree, captured from the engine
+    layouts: List[PageLayout] = []
+
+    # Shed load when the projected cost of in-flight pages would exceed the budget
+    pixel_cost = cost_budget.estimate_pixels(img.width * img.height)
+    reservation = cost_budget.try_reserve(pixel_cost)
+    if reservation is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is overloaded, please retry later",
+            headers={"Retry-After": str(cost_budget.retry_after(pixel_cost))},
+        )
 
     try:
-        # Run CPU-bound OCR processing in a thread pool to avoid blocking the event loop
-        loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(None, engine.ocr, img, filename)
+        # Run CPU-bound OCR processing on the interactive lane to avoid blocking the event loop
+        if mode == "detect":
+            future = scheduler.submit(
+                INTERACTIVE_LANE, _profiled(request, engine.detect_lines), img, filename,
+                cancel_token=token,
+                on_layout=layouts.append if fmt in LAYOUT_FORMATS else None,
+                preset=preset,
+                thresholds=thresholds,
+                key=_fairness_key(request),
+            )
+        else:
+            track_cost = _layout_cost_tracker(reservation, cost_budget, engine, preset)
+
+            def on_layout(layout: PageLayout):
+                track_cost(layout)
+                if fmt in LAYOUT_FORMATS:
+                    layouts.append(layout)
+
+            future = scheduler.submit(
+                INTERACTIVE_LANE, _profiled(request, engine.ocr), img, filename,
+                cancel_token=token,
+                on_layout=on_layout,
+                preset=preset,
+                thresholds=thresholds,
+                key=_fairness_key(request),
+            )
+        # Released when the work finishes or is dropped from the queue
+        future.add_done_callback(lambda _: reservation.release())
+        result = await _await_cancellable(request, future, token)
 
         # Convert and return response
-        page = _engine_result_to_ocr_page(result)
-        return OCRResponse(model="ndlocr-lite", pages=[page], usage={"pages": 1})
+        if fmt in LAYOUT_FORMATS:
+            # The PDF embeds JPEG uploads as uploaded, without re-encoding
+            pdf_image = data if data is not None and img.format == "JPEG" else img
+            response = _layout_response(layouts, fmt, images=[pdf_image])
+        else:
+            response = _ocr_response([_engine_result_to_page(result)], {"pages": 1, "preset": preset.name}, fmt, model)
+        response.headers["X-OCR-Preset"] = preset.name
+        return response
+    except HTTPException:
+        raise
     except Exception:
         logger.exception("An error occurred during synchronous OCR processing")
         raise HTTPException(status_code=500, detail="An internal error occurred during OCR processing")
 
+async def _run_multipage_ocr(
+    request: Request,
+    img: Image.Image,
+    filename: str,
+    engine: NDLOCREngine,
+    scheduler: LaneScheduler,
+    cost_budget: CostBudget,
+    token: CancellationToken,
+    mode: str,
+    preset: OCRPreset,
+    thresholds: Optional[DetectionThresholds],
+    model: str,
+) -> Response:
+    """
+    OCRs a multi-page TIFF as one interactive task, returning one page per frame.
+    Frames are decoded and recognized MULTIPAGE_CHUNK_PAGES at a time. Like a single page, the
+    request is shed when its first chunk does not fit the cost budget; later chunks wait for room.
+    """
+    fmt = negotiate_format(request.headers.get("accept"), supported=MULTIPAGE_FORMATS)
+    layouts: Optional[List[PageLayout]] = [] if fmt in LAYOUT_FORMATS else None
+    images: Optional[List[PageImage]] = [] if fmt == "pdf" else None
+
+    # The first frame's size stands in for the frames of the first chunk
+    pixel_cost = cost_budget.estimate_pixels(img.width * img.height * min(_frame_count(img), MULTIPAGE_CHUNK_PAGES))
+    reservation = cost_budget.try_reserve(pixel_cost)
+    if reservation is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is overloaded, please retry later",
+            headers={"Retry-After": str(cost_budget.retry_after(pixel_cost))},
+        )
+    try:
+        future = scheduler.submit(
+            INTERACTIVE_LANE, _profiled(request, _process_pages), _iter_frames(img, filename), engine, token, cost_budget, layouts, images,
+            preset, thresholds, chunk_pages=MULTIPAGE_CHUNK_PAGES, detect_only=mode == "detect", reservation=reservation,
+            key=_fairness_key(request),
+        )
+        # Released by the first chunk, or here if the task fails or is dropped before reaching it
+        future.add_done_callback(lambda _: reservation.release())
+        pages = await _await_cancellable(request, future, token)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("An error occurred during multi-page OCR processing")
+        raise HTTPException(status_code=500, detail="An internal error occurred during OCR processing")
+
+    if layouts is not None:
+        response = _layout_response(layouts, fmt, images=images)
+    else:
+        response = _ocr_response(pages, {"pages": len(pages), "preset": preset.name}, fmt, model)
+    response.headers["X-OCR-Preset"] = preset.name
+    return response
+
+@app.post("/v1/ocr/recognize", response_model=OCRResponse)
+async def ocr_recognize_endpoint(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    lines: Optional[str] = Form(None),
+    preset: Optional[str] = None,
+    model: Optional[str] = None,
+    engine: NDLOCREngine = Depends(get_engine),
+    scheduler: LaneScheduler = Depends(get_scheduler),
+    cost_budget: CostBudget = Depends(get_cost_budget),
+):
+    """
+    Recognition-only endpoint.
+    Accepts an image plus line boxes from a previous run (e.g. /v1/ocr?mode=detect) and
+    recognizes only those lines, skipping detection and reading order analysis.
+    Boxes are sent as the `lines` form field (JSON array) with a file upload, or as the
+    `lines` field of the JSON body alongside the base64 image. `preset` applies as for /v1/ocr
+    (only its recognition options matter here), as does `model`.
+    """
+    img, filename, body, _ = await _parse_image_request(request, file, OCRRecognizeRequest)
+    if file:
+        line_boxes = _parse_line_boxes(lines)
+    else:
+        line_boxes = body.lines
+    if len(line_boxes) > MAX_RECOGNIZE_LINES:
+        raise HTTPException(status_code=400, detail=f"Too many lines (max {MAX_RECOGNIZE_LINES})")
+
+    boxes = []
+    for line in line_boxes:
+        if not line.boundingBox or any(len(point) != 2 for point in line.boundingBox):
+            raise HTTPException(status_code=400, detail="Invalid request: boundingBox must be a list of [x, y] points")
+        xs = [point[0] for point in line.boundingBox]
+        ys = [point[1] for point in line.boundingBox]
+        boxes.append({
+            "box": [min(xs), min(ys), max(xs), max(ys)],
+            "pred_char_count": line.pred_char_count,
+            "confidence": line.confidence,
+            "class_index": line.class_index,
+        })
+
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Engine not initialized")
+
+    ocr_preset = _select_preset(preset, INTERACTIVE_LANE, scheduler, cost_budget)
+    model = model or (body.model if body is not None else None) or DEFAULT_MODEL
+    engine = await _resolve_engine(request, engine, model)
+    token = CancellationToken.with_timeout(_request_timeout(request))
+    line_cost = cost_budget.estimate_lines(len(boxes))
+    reservation = cost_budget.try_reserve(line_cost)
+    if reservation is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is overloaded, please retry later",
+            headers={"Retry-After": str(cost_budget.retry_after(line_cost))},
+        )
+
+    try:
+        future = scheduler.submit(
+            INTERACTIVE_LANE, engine.recognize_lines, img, boxes, filename,
+            cancel_token=token,
+            preset=ocr_preset,
+            key=_fairness_key(request),
+        )
+        future.add_done_callback(lambda _: reservation.release())
+        result = await _await_cancellable(request, future, token)
+        # Recognized boxes have no layout tree, so only the JSON-based formats are offered
+        fmt = negotiate_format(request.headers.get("accept"), supported=("json", "columnar", "msgpack", "text"))
+        response = _ocr_response([_engine_result_to_page(result)], {"pages": 1, "lines": len(boxes), "preset": ocr_preset.name}, fmt, model)
+        response.headers["X-OCR-Preset"] = ocr_preset.name
+        return response
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("An error occurred during recognition-only OCR processing")
+        raise HTTPException(status_code=500, detail="An internal error occurred during OCR processing")
+
+def _parse_line_boxes(lines: Optional[str]) -> List[OCRLineBox]:
+    """Parses the JSON `lines` form field of a multipart recognition request."""
+    if not lines:
+        raise HTTPException(status_code=400, detail="No line boxes provided")
+    try:
+        entries = json.loads(lines)
+        if not isinstance(entries, list):
+            raise ValueError("lines must be a JSON array")
+        return [OCRLineBox(**entry) for entry in entries]
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Invalid line boxes: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid request: Invalid line boxes")
+
+@app.post("/v1/ocr/batch", response_model=OCRResponse)
+async def ocr_batch_endpoint(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    preset: Optional[str] = None,
+    det_score_threshold: Optional[float] = None,
+    det_conf_threshold: Optional[float] = None,
+    det_iou_threshold: Optional[float] = None,
+    model: str = DEFAULT_MODEL,
+    engine: NDLOCREngine = Depends(get_engine),
+    scheduler: LaneScheduler = Depends(get_scheduler),
+    cost_budget: CostBudget = Depends(get_cost_budget),
+):
+    """
+    Batch OCR endpoint.
+    Accepts several image files and/or zip/tar archives of images in one multipart request
+    and returns a single multi-page response (one page per image, in upload/archive order).
+    Pages are processed in chunks so recognition is batched across images.
+    `preset`, `model` and the det_*_threshold parameters apply to every page as for /v1/ocr.
+    """
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Engine not initialized")
+    engine = await _resolve_engine(request, engine, model)
+    ocr_preset = _select_preset(preset, BATCH_LANE, scheduler, cost_budget)
+    thresholds = _detection_thresholds(engine, det_score_threshold, det_conf_threshold, det_iou_threshold)
+
+    token = CancellationToken.with_timeout(_request_timeout(request))
+    fmt = negotiate_format(request.headers.get("accept"), supported=MULTIPAGE_FORMATS)
+    layouts: Optional[List[PageLayout]] = [] if fmt in LAYOUT_FORMATS else None
+    # The PDF embeds the uploaded image files as they are (JPEG is not re-encoded)
+    images: Optional[List[PageImage]] = [] if fmt == "pdf" else None
+    try:
+        future = scheduler.submit(BATCH_LANE, _process_batch, files, engine, token, cost_budget, layouts, images, ocr_preset, thresholds, key=_fairness_key(request))
+        pages = await _await_cancellable(request, future, token)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("An error occurred during batch OCR processing")
+        raise HTTPException(status_code=500, detail="An internal error occurred during OCR processing")
+
+    if layouts is not None:
+        response = _layout_response(layouts, fmt, images=images)
+    else:
+        response = _ocr_response(pages, {"pages": len(pages), "preset": ocr_preset.name}, fmt, model)
+    response.headers["X-OCR-Preset"] = ocr_preset.name
+    return response
+
+def _iter_batch_sources(files: List[UploadFile]) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yields (name, bytes) for every image in the uploaded files.
+    Archives are read member by member from the spooled upload, so they are never
+    loaded into memory as a whole. Enforces per-image, per-archive and count limits.
+    """
+    count = 0
+
+    def check_count():
+        nonlocal count
+        count += 1
+        if count > MAX_BATCH_IMAGES:
+            raise HTTPException(status_code=413, detail="Too many images in batch")
+
+    def read_limited(fileobj) -> bytes:
+        data = fileobj.read(MAX_IMAGE_SIZE + 1)
+        if len(data) > MAX_IMAGE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large")
+        return data
+
+    for upload in files:
+        fileobj = upload.file
+        fileobj.seek(0, os.SEEK_END)
+        upload_size = fileobj.tell()
+        fileobj.seek(0)
+        name = upload.filename or "uploaded_image.jpg"
+
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            if upload_size > MAX_ARCHIVE_SIZE:
+                raise HTTPException(status_code=413, detail="Archive too large")
+            with zipfile.ZipFile(fileobj) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    check_count()
+                    if info.file_size > MAX_IMAGE_SIZE:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    with zf.open(info) as member:
+                        yield info.filename, read_limited(member)
+            continue
+
+        fileobj.seek(0)
+        if _is_tarfile(fileobj):
+            if upload_size > MAX_ARCHIVE_SIZE:
+                raise HTTPException(status_code=413, detail="Archive too large")
+            with tarfile.open(fileobj=fileobj, mode="r:*") as tf:
+                for member in tf:
+                    if not member.isfile():
+                        continue
+                    check_count()
+                    if member.size > MAX_IMAGE_SIZE:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    yield member.name, read_limited(tf.extractfile(member))
+            continue
+
+        fileobj.seek(0)
+        check_count()
+        yield name, read_limited(fileobj)
+
+def _is_tarfile(fileobj) -> bool:
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r:*"):
+            return True
+    except tarfile.TarError:
+        return False
+    finally:
+        fileobj.seek(0)
+
+def _frame_count(img: Image.Image) -> int:
+    """Number of pages of an image file: the frames of a multi-page TIFF, otherwise 1."""
+    if img.format != "TIFF":
+        return 1
+    return getattr(img, "n_frames", 1)
+
+def _iter_frames(img: Image.Image, name: str) -> Iterator[Tuple[Image.Image, str, PageImage]]:
+    """
+    Yields (page image, name, image for PDF output) for each page of an image file.
+    Frames of a multi-page TIFF are decoded one at a time as the iteration reaches them and
+    named <stem>_0001<suffix> etc.; other images are yielded as they are. The PDF image of a
+    frame decodes it again from the file when the PDF is written, so decoded frames are not
+    kept for the whole document.
+    """
+    count = _frame_count(img)
+    if count <= 1:
+        yield img, name, img
+        return
+    stem, suffix = os.path.splitext(name)
+    for index in range(count):
+        img.seek(index)
+        if img.width * img.height > MAX_PIXELS:
+            raise HTTPException(status_code=400, detail="Image dimensions too large")
+        # Copied out, so the file can seek on while the frame is being processed
+        yield img.copy(), f"{stem}_{index + 1:04d}{suffix}", functools.partial(_decode_frame, img, index)
+
+def _decode_frame(img: Image.Image, index: int) -> Image.Image:
+    img.seek(index)
+    return img.copy()
+
+def _iter_batch_images(files: List[UploadFile]) -> Iterator[Tuple[Image.Image, str, PageImage]]:
+    """
+    Decodes the batch uploads lazily. Yields (page image, name, image for PDF output) per page,
+    expanding multi-page TIFFs into their frames.
+    """
+    for name, data in _iter_batch_sources(files):
+        try:
+            img = Image.open(io.BytesIO(data))
+        except (PIL.UnidentifiedImageError, ValueError) as e:
+            logger.warning(f"Invalid image in batch request: {str(e)}")
+            raise HTTPException(status_code=400, detail="Invalid request: Invalid image data or format")
+        if img.width * img.height > MAX_PIXELS:
+            raise HTTPException(status_code=400, detail="Image dimensions too large")
+        if _frame_count(img) > MAX_DOCUMENT_PAGES:
+            raise HTTPException(status_code=413, detail="Too many pages in document")
+        if _frame_count(img) == 1:
+            # The PDF embeds single images as uploaded (JPEG is not re-encoded)
+            yield img, name, data
+        else:
+            yield from _iter_frames(img, name)
+
+def _process_batch(
+    files: List[UploadFile],
+    engine: NDLOCREngine,
+    cancel_token: Optional[CancellationToken] = None,
+    cost_budget: Optional[CostBudget] = None,
+    layouts: Optional[List[PageLayout]] = None,
+    images: Optional[List[PageImage]] = None,
+    preset: Optional[OCRPreset] = None,
+    thresholds: Optional[DetectionThresholds] = None,
+) -> List[Dict[str, Any]]:
+    """Runs the pages of a batch upload through _process_pages in chunks of BATCH_CHUNK_PAGES."""
+    pages = _process_pages(_iter_batch_images(files), engine, cancel_token, cost_budget, layouts, images, preset, thresholds)
+    if not pages:
+        raise HTTPException(status_code=400, detail="No image provided")
+    return pages
+
+def _process_pages(
+    sources: Iterator[Tuple[Image.Image, str, PageImage]],
+    engine: NDLOCREngine,
+    cancel_token: Optional[CancellationToken] = None,
+    cost_budget: Optional[CostBudget] = None,
+    layouts: Optional[List[PageLayout]] = None,
+    images: Optional[List[PageImage]] = None,
+    preset: Optional[OCRPreset] = None,
+    thresholds: Optional[DetectionThresholds] = None,
+    chunk_pages: int = BATCH_CHUNK_PAGES,
+    detect_only: bool = False,
+    reservation: Optional[CostReservation] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Pulls (image, name, image for PDF output) pages from `sources` and runs them through engine.ocr_batch in chunks
+    of `chunk_pages`, bounding the number of decoded pages held in memory.
+    With a cost budget, each chunk waits until the budget has room for it; a `reservation`
+    already admitted by the caller is used for the first chunk instead.
+    If `layouts` is given, the page layouts are appended to it (for layout output formats);
+    if `images` is given, the images for PDF output are appended to it in the same order.
+    With `detect_only`, pages run through engine.detect_lines instead (lines without text).
+    """
+    pages: List[Dict[str, Any]] = []
+    chunk: List[Tuple[Image.Image, str]] = []
+
+    admitted = reservation
+
+    def flush():
+        nonlocal admitted
+        reservation, admitted = admitted, None
+        on_layout = None
+        if reservation is None and cost_budget is not None:
+            reservation = cost_budget.reserve(
+                cost_budget.estimate_pixels(sum(img.width * img.height for img, _ in chunk)),
+                should_abort=lambda: cancel_token is not None and cancel_token.cancelled,
+            )
+            if reservation is None:
+                cancel_token.raise_if_cancelled()
+        if reservation is not None and cost_budget is not None:
+            on_layout = _layout_cost_tracker(reservation, cost_budget, engine, preset)
+        chunk_layouts: List[PageLayout] = []
+
+        def capture(layout: PageLayout):
+            if on_layout is not None:
+                on_layout(layout)
+            chunk_layouts.append(layout)
+
+        try:
+            if detect_only:
+                results = [
+                    engine.detect_lines(img, name, cancel_token=cancel_token, on_layout=capture, preset=preset, thresholds=thresholds)
+                    for img, name in chunk
+                ]
+            else:
+                results = engine.ocr_batch(chunk, cancel_token=cancel_token, on_layout=capture if layouts is not None else on_layout,
+                                           preset=preset, thresholds=thresholds)
+        finally:
+            if reservation is not None:
+                reservation.release()
+        if layouts is not None:
+            for layout in chunk_layouts:
+                # Only the XML tree is needed from here on; drop the line crops (and the page image they view)
+                layout.recog_lines = []
+            layouts.extend(chunk_layouts)
+        for (_, name), result in zip(chunk, results):
+            pages.append(_engine_result_to_page(result, index=len(pages), name=name))
+        chunk.clear()
+
+    for img, name, image in sources:
+        chunk.append((img, name))
+        if images is not None:
+            images.append(image)
+        if len(chunk) >= chunk_pages:
+            flush()
+    if chunk:
+        flush()
+    return pages
+
 @app.post("/v1/ocr/jobs", response_model=OCRJobResponse)
 async def create_ocr_job(
-    background_tasks: BackgroundTasks,
     request: Request,
     file: Optional[UploadFile] = File(None),
+    preset: Optional[str] = None,
+    det_score_threshold: Optional[float] = None,
+    det_conf_threshold: Optional[float] = None,
+    det_iou_threshold: Optional[float] = None,
+    model: Optional[str] = None,
     engine: NDLOCREngine = Depends(get_engine),
     job_store: InMemoryJobStore = Depends(get_job_store),
+    scheduler: LaneScheduler = Depends(get_scheduler),
 ):
     """
     Asynchronous OCR endpoint.
     Accepts an image, initializes a background job, and returns a job_id for status polling.
+    `preset`, `model` and the det_*_threshold parameters apply as for /v1/ocr; the overload
+    fallback is decided and the model set loaded when the job is accepted.
     """
     # Extract image first to ensure it's valid before accepting the job
-    img, filename = await _get_image_from_request(request, file)
+    img, filename, body, _ = await _parse_image_request(request, file)
+    model = model or (body.model if body is not None else None) or DEFAULT_MODEL
+    engine = await _resolve_engine(request, engine, model)
+    cost_budget = get_cost_budget(request)
+    ocr_preset = _select_preset(preset, BATCH_LANE, scheduler, cost_budget)
+    thresholds = _detection_thresholds(engine, det_score_threshold, det_conf_threshold, det_iou_threshold)
     
+    token = CancellationToken.with_timeout(_request_timeout(request))
     job_id = str(uuid.uuid4())
     job_store.set(job_id, OCRJobResult(job_id=job_id, status="pending"))
     
-    # Delegate processing to background task
-    background_tasks.add_task(process_ocr_job, job_id, img, filename, engine, job_store)
+    # Delegate processing to the scheduler's batch lane
+    future = scheduler.submit(
+        BATCH_LANE, process_ocr_job, job_id, img, filename, engine, job_store, token, cost_budget, ocr_preset, thresholds, model,
+        key=_fairness_key(request),
+    )
+    job_store.set_cancellation(job_id, token, future)
+    # Runs immediately if the job already finished
+    future.add_done_callback(lambda _: job_store.clear_cancellation(job_id))
     
     return OCRJobResponse(job_id=job_id, status="pending")
 
 @app.get("/v1/ocr/jobs/{job_id}", response_model=OCRJobResult)
-async def get_ocr_job(job_id: str, job_store: InMemoryJobStore = Depends(get_job_store)):
+async def get_ocr_job(request: Request, job_id: str, job_store: InMemoryJobStore = Depends(get_job_store)):
     """
     Poll the status and results of an asynchronous OCR job.
+    Completed results are only kept as their pre-compressed serialization, served with an ETag;
+    a matching If-None-Match returns 304 Not Modified.
     """
     job = job_store.get(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    payload = job_store.get_payload(job_id)
+    if payload is not None:
+        return payload.response(request.headers.get("accept-encoding"), request.headers.get("if-none-match"))
     return job
 
-async def _get_image_from_request(request: Request, file: Optional[UploadFile]):
+@app.delete("/v1/ocr/jobs/{job_id}", response_model=OCRJobResponse)
+async def cancel_ocr_job(job_id: str, job_store: InMemoryJobStore = Depends(get_job_store)):
+    """
+    Cancel a queued or running asynchronous OCR job.
+    Queued jobs are dropped before they start; running jobs stop at the next
+    cancellation check inside the engine.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in ("completed", "failed", "cancelled"):
+        raise HTTPException(status_code=409, detail="Job already finished")
+
+    token, future = job_store.get_cancellation(job_id)
+    if token is not None:
+        token.cancel()
+    if future is not None:
+        future.cancel()
+    _mark_job_cancelled(job, token)
+    return OCRJobResponse(job_id=job_id, status=job.status)
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles(profile_store: InMemoryProfileStore = Depends(get_profile_store)):
+    """
+    Lists stored request profiles (admin only).
+    """
+    return {"profiles": profile_store.summaries()}
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str, format: str = "speedscope", profile_store: InMemoryProfileStore = Depends(get_profile_store)):
+    """
+    Retrieves a stored request profile (admin only).
+    `format=speedscope` returns a speedscope JSON document, `format=collapsed` returns
+    collapsed stacks suitable for flamegraph.pl.
+    """
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    if format == "speedscope":
+        return profiler.speedscope(name=profile_id)
+    raise HTTPException(status_code=400, detail="Unsupported profile format")
+
+@app.post("/admin/models/reload", dependencies=[Depends(require_admin)])
+async def reload_models(request: Request):
+    """
+    Reloads the model files of all loaded model sets without downtime (admin only).
+    New sessions are loaded and warmed up in the background and swapped in atomically;
+    requests already running finish on the old sessions, which are released afterwards.
+    Responds once the old sessions are drained (or RELOAD_DRAIN_TIMEOUT has passed).
+    """
+    registry: ModelRegistry = request.app.state.model_registry
+    try:
+        results = await asyncio.to_thread(registry.reload, RELOAD_DRAIN_TIMEOUT)
+    except ModelReloadInProgressError:
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+    except Exception:
+        logger.exception("Model reload failed")
+        raise HTTPException(status_code=500, detail="Model reload failed, the previous models are still served")
+    logger.info(f"Reloaded models: {results}")
+    return {"models": results}
+
+def _open_input_path(relative: str) -> Tuple[Image.Image, str]:
+    """Opens a file referenced by `path` under INPUT_ROOT. Returns (image, file name)."""
+    if not INPUT_ROOT:
+        raise HTTPException(status_code=400, detail="Path input is not enabled")
+    try:
+        path = resolve_input_path(INPUT_ROOT, relative)
+        return open_mapped_image(path, MAX_PATH_INPUT_SIZE), path.name
+    except InputTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+    except PIL.UnidentifiedImageError:
+        raise
+    except (InputPathError, OSError) as e:
+        # Same answer for every rejected path, so the file system cannot be probed
+        logger.warning(f"Rejected input path {relative!r}: {e}")
+        raise HTTPException(status_code=400, detail="Invalid input path")
+
+async def _parse_image_request(
+    request: Request,
+    file: Optional[UploadFile],
+    body_model: Type[BaseModel] = OCRRequest,
+) -> Tuple[Image.Image, str, Optional[BaseModel], Optional[bytes]]:
     """
     Internal helper to extract a PIL Image from the HTTP request.
     Supports:
     - Multipart file upload (via 'file' field)
     - JSON body with base64 encoded image (via 'image' field)
+    - JSON body referencing a file under INPUT_ROOT (via 'path' field), memory-mapped
 
     Includes security checks for body size, file size, and image dimensions.
+    Returns (image, filename, parsed JSON body as `body_model` or None for multipart uploads,
+    the encoded image file or None for path input, which stays memory-mapped).
     """
     img = None
     filename = "image.jpg"
+    ocr_req = None
+    contents = None
     try:
         if file:
             # Handle multipart/form-data
@@ -228,12 +1333,21 @@ async def _get_image_from_request(request: Request, file: Optional[UploadFile]):
                 raise HTTPException(status_code=400, detail="Empty request body")
 
             body = json.loads(body_bytes)
-            ocr_req = OCRRequest(**body)
-            # Remove data URI prefix if present
-            header, encoded = ocr_req.image.split(",", 1) if "," in ocr_req.image else (None, ocr_req.image)
-            contents = base64.b64decode(encoded)
-            img = Image.open(io.BytesIO(contents))
-            filename = "base64_image.jpg"
+            ocr_req = body_model(**body)
+            if ocr_req.path is not None:
+                if ocr_req.image is not None:
+                    raise HTTPException(status_code=400, detail="Send either image or path, not both")
+                img, filename = _open_input_path(ocr_req.path)
+            elif ocr_req.image is not None:
+                # Remove data URI prefix if present
+                header, encoded = ocr_req.image.split(",", 1) if "," in ocr_req.image else (None, ocr_req.image)
+                contents = base64.b64decode(encoded)
+                img = Image.open(io.BytesIO(contents))
+                filename = "base64_image.jpg"
+            else:
+                raise HTTPException(status_code=400, detail="Invalid request: image or path is required")
+        if img is not None and _frame_count(img) > MAX_DOCUMENT_PAGES:
+            raise HTTPException(status_code=413, detail="Too many pages in document")
     except HTTPException:
         raise
     except (binascii.Error, PIL.UnidentifiedImageError, ValueError) as e:
@@ -251,13 +1365,31 @@ async def _get_image_from_request(request: Request, file: Optional[UploadFile]):
     if img.width * img.height > MAX_PIXELS:
         raise HTTPException(status_code=400, detail="Image dimensions too large")
 
-    return img, filename
+    return img, filename, ocr_req, contents
 
 @app.get("/health")
 async def health(request: Request):
     """
     Health check endpoint.
     Indicates if the API is running and if the OCR engine has been initialized.
+    Answers 503 while the startup warmup (WARMUP_ON_STARTUP) is still running.
     """
     engine_ready = hasattr(request.app.state, "engine") and request.app.state.engine is not None
-    return {"status": "ok", "engine_ready": engine_ready}
+    ready = getattr(request.app.state, "ready", True)
+    status = {"status": "ok" if ready else "warming_up", "engine_ready": engine_ready, "ready": ready}
+    if hasattr(request.app.state, "scheduler"):
+        status["lanes"] = request.app.state.scheduler.stats()
+    if hasattr(request.app.state, "cost_budget"):
+        status["load"] = request.app.state.cost_budget.usage()
+    if engine_ready:
+        status["concurrency"] = request.app.state.engine.concurrency_limits()
+        status["reload"] = request.app.state.engine.reload_stats()
+        status["pages"] = request.app.state.engine.page_stats()
+        if hasattr(request.app.state, "model_registry"):
+            status["models"] = request.app.state.model_registry.stats()
+        cache = request.app.state.engine.cache_stats()
+        if cache:
+            status["cache"] = cache
+    if not ready:
+        return JSONResponse(status, status_code=503)
+    return status
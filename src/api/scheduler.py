@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from src.core.pool import task_priority
+
+# Lane names used by the API
+INTERACTIVE_LANE = "interactive"
+BATCH_LANE = "batch"
+
+
+class LaneScheduler:
+    """
+    Priority-lane scheduler for CPU-bound OCR work.
+
+    Each lane has its own concurrency limit and queue, and all work runs on one dedicated,
+    bounded ThreadPoolExecutor sized to the sum of the lane limits. Because every lane's
+    slots are reserved, a flood of batch jobs can never occupy the threads that serve
+    interactive requests.
+
+    Work runs under its lane's priority (see task_priority in src/core/pool.py): lanes are
+    listed from highest to lowest priority, so the line recognition an interactive page fans
+    out to the engine's shared recognition pool is served ahead of queued batch lines.
+
+    Within a lane, queued work is grouped by a fairness key (e.g. the API key) and
+    dispatched round-robin across keys, so one client's backlog does not delay others.
+    """
+    def __init__(self, lane_limits: Dict[str, int], executor: Optional[ThreadPoolExecutor] = None):
+        if not lane_limits or any(limit < 1 for limit in lane_limits.values()):
+            raise ValueError("Every lane needs a concurrency limit of at least 1")
+        self.lane_limits = dict(lane_limits)
+        self.lane_priorities = {lane: priority for priority, lane in enumerate(self.lane_limits)}
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=sum(self.lane_limits.values()),
+            thread_name_prefix="ocr_page"
+        )
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {lane: 0 for lane in self.lane_limits}
+        # lane -> fairness key -> queued (fn, args, kwargs, future)
+        self._queues: Dict[str, "OrderedDict[str, Deque[Tuple[Callable, tuple, dict, Future]]]"] = {
+            lane: OrderedDict() for lane in self.lane_limits
+        }
+
+    def submit(self, lane: str, fn: Callable, *args, key: str = "default", **kwargs) -> Future:
+        """
+        Queues fn(*args, **kwargs) on the given lane and returns a Future for its result.
+        A Future that is cancelled before it starts is dropped without running.
+        """
+        if lane not in self.lane_limits:
+            raise ValueError(f"Unknown lane: {lane}")
+        future: Future = Future()
+        with self._lock:
+            self._queues[lane].setdefault(key, deque()).append((fn, args, kwargs, future))
+            self._dispatch_locked(lane)
+        return future
+
+    def _dispatch_locked(self, lane: str):
+        queues = self._queues[lane]
+        while self._running[lane] < self.lane_limits[lane] and queues:
+            # Round-robin: take the head of the first key's queue, then move that key to the back
+            key, queue = next(iter(queues.items()))
+            item = queue.popleft()
+            if queue:
+                queues.move_to_end(key)
+            else:
+                del queues[key]
+            if item[3].cancelled():
+                continue
+            self._running[lane] += 1
+            self.executor.submit(self._run, lane, item)
+
+    def _run(self, lane: str, item: Tuple[Callable, tuple, dict, Future]):
+        fn, args, kwargs, future = item
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    with task_priority(self.lane_priorities[lane]):
+                        future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running[lane] -= 1
+                self._dispatch_locked(lane)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns running/queued counts and the limit of every lane."""
+        with self._lock:
+            return {
+                lane: {
+                    "running": self._running[lane],
+                    "queued": sum(len(q) for q in self._queues[lane].values()),
+                    "limit": limit,
+                }
+                for lane, limit in self.lane_limits.items()
+            }
+
+    def shutdown(self):
+        """Cancels queued work and shuts down the executor if the scheduler owns it."""
+        with self._lock:
+            for queues in self._queues.values():
+                for queue in queues.values():
+                    for _, _, _, future in queue:
+                        future.cancel()
+                queues.clear()
+        if self._owns_executor:
+            self.executor.shutdown()
+
+
+class CostReservation:
+    """A share of a CostBudget held by one unit of in-flight work."""
+    def __init__(self, budget: "CostBudget", cost: float):
+        self._budget = budget
+        self.cost = cost
+        self.released = False
+
+    def update(self, cost: float):
+        """Replaces the projected cost, e.g. once the line count is known after detection."""
+        self._budget._update(self, cost)
+
+    def release(self):
+        """Returns the reservation to the budget. Safe to call more than once."""
+        self._budget._release(self)
+
+
+class CostBudget:
+    """
+    Admission control based on the estimated cost of in-flight pages.
+
+    Cost is expressed in abstract units: a page is estimated from its pixel count at admission
+    (`cost_per_megapixel`, which covers detection and the recognition it usually implies) and
+    re-estimated from its weighted line count once detection has run (`cost_per_line`).
+    When the projected in-flight cost would exceed `budget`, new work is rejected
+    (try_reserve) or waits for capacity (reserve). A budget <= 0 disables shedding
+    while still tracking usage.
+    """
+    def __init__(self, budget: float, cost_per_megapixel: float = 1.0, cost_per_line: float = 0.05):
+        self.budget = budget
+        self.cost_per_megapixel = cost_per_megapixel
+        self.cost_per_line = cost_per_line
+        self._cond = threading.Condition()
+        self._in_flight = 0.0
+        self._reservations = 0
+        self._rejected = 0
+        # Exponential moving average of released cost per second, used for Retry-After hints
+        self._drain_rate = 0.0
+        self._last_release: Optional[float] = None
+
+    def estimate_pixels(self, pixels: int) -> float:
+        return pixels / 1_000_000 * self.cost_per_megapixel
+
+    def estimate_lines(self, weighted_lines: float) -> float:
+        return weighted_lines * self.cost_per_line
+
+    def _fits(self, cost: float) -> bool:
+        # An idle server always admits work, so a single page larger than the budget is not starved
+        return self.budget <= 0 or self._reservations == 0 or self._in_flight + cost <= self.budget
+
+    def _admit(self, cost: float) -> CostReservation:
+        self._in_flight += cost
+        self._reservations += 1
+        return CostReservation(self, cost)
+
+    def try_reserve(self, cost: float) -> Optional[CostReservation]:
+        """Reserves `cost` if it fits the budget, otherwise returns None (caller should shed the request)."""
+        with self._cond:
+            if not self._fits(cost):
+                self._rejected += 1
+                return None
+            return self._admit(cost)
+
+    def reserve(self, cost: float, should_abort: Optional[Callable[[], bool]] = None, poll_interval: float = 0.5) -> Optional[CostReservation]:
+        """
+        Blocks until `cost` fits the budget and reserves it (deferring the work).
+        Returns None if `should_abort` becomes true while waiting.
+        """
+        with self._cond:
+            while not self._fits(cost):
+                if should_abort is not None and should_abort():
+                    return None
+                self._cond.wait(poll_interval)
+            return self._admit(cost)
+
+    def _update(self, reservation: CostReservation, cost: float):
+        with self._cond:
+            if reservation.released:
+                return
+            self._in_flight += cost - reservation.cost
+            reservation.cost = cost
+            self._cond.notify_all()
+
+    def _release(self, reservation: CostReservation):
+        with self._cond:
+            if reservation.released:
+                return
+            reservation.released = True
+            self._in_flight = max(0.0, self._in_flight - reservation.cost)
+            self._reservations -= 1
+            now = time.monotonic()
+            if self._last_release is not None and now > self._last_release:
+                rate = reservation.cost / (now - self._last_release)
+                self._drain_rate = rate if self._drain_rate == 0 else 0.8 * self._drain_rate + 0.2 * rate
+            self._last_release = now
+            self._cond.notify_all()
+
+    def retry_after(self, cost: float) -> int:
+        """Suggested seconds before retrying a shed request, from the recent drain rate."""
+        with self._cond:
+            overflow = self._in_flight + cost - self.budget
+            if overflow <= 0 or self._drain_rate <= 0:
+                return 1
+            return int(min(60, max(1, overflow / self._drain_rate + 0.999)))
+
+    def utilization(self) -> Optional[float]:
+        """Fraction of the budget held by in-flight work (None when shedding is disabled)."""
+        with self._cond:
+            return self._in_flight / self.budget if self.budget > 0 else None
+
+    def usage(self) -> Dict[str, Any]:
+        """Current budget usage for monitoring."""
+        with self._cond:
+            return {
+                "budget": self.budget,
+                "in_flight_cost": round(self._in_flight, 3),
+                "utilization": round(self._in_flight / self.budget, 3) if self.budget > 0 else None,
+                "in_flight": self._reservations,
+                "rejected": self._rejected,
+            }
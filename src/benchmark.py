@@ -0,0 +1,329 @@
+"""
+Offline benchmark harness for NDLOCREngine and the HTTP API.
+
+Runs the OCR pipeline over a corpus of images with warmup iterations, reports
+per-stage latency percentiles, throughput and peak RSS, and optionally compares
+the report against a stored baseline JSON to flag regressions.
+
+Usage:
+    PYTHONPATH=. python -m src.benchmark --images path/to/corpus --iterations 5
+    PYTHONPATH=. python -m src.benchmark --stub --save-baseline bench_baseline.json
+    PYTHONPATH=. python -m src.benchmark --stub --baseline bench_baseline.json
+
+The `--stub` mode replaces the ONNX detector and recognizers with lightweight
+stand-ins so the non-inference Python overhead (XML building, reading order,
+cascade routing, result formatting, request handling) can be measured without
+model files.
+"""
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.core.engine import NDLOCREngine
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".jp2"}
+STAGES = ["detect", "layout", "recognition", "format", "total"]
+PERCENTILES = [50, 90, 95, 99]
+
+# Fallback class mapping used by the stub detector when the submodule config is unavailable
+STUB_CLASSES = {
+    0: "text_block", 1: "line_main", 2: "line_caption", 3: "line_ad", 4: "line_note",
+    5: "line_note_tochu", 6: "block_fig", 7: "block_ad", 8: "block_pillar", 9: "block_folio",
+    10: "block_rubi", 11: "block_chart", 12: "block_eqn", 13: "block_cfm", 14: "block_eng",
+    15: "block_table", 16: "line_title",
+}
+
+
+class StubDetector:
+    """
+    Stand-in for DEIM that returns a deterministic grid of horizontal line boxes.
+    The number of lines per page is fixed so runs are comparable.
+    """
+    def __init__(self, classes: Dict[int, str], lines_per_page: int = 40):
+        self.classes = classes
+        self.lines_per_page = lines_per_page
+
+    def detect(self, img: np.ndarray) -> List[Dict[str, Any]]:
+        img_h, img_w = img.shape[:2]
+        margin_x = max(1, img_w // 20)
+        pitch = max(2, (img_h - 2 * margin_x) // max(1, self.lines_per_page))
+        detections = [{
+            "box": [margin_x, margin_x, img_w - margin_x, img_h - margin_x],
+            "confidence": 0.9,
+            "class_index": 0,
+            "pred_char_count": 100.0,
+        }]
+        for i in range(self.lines_per_page):
+            ymin = margin_x + i * pitch
+            ymax = min(img_h - 1, ymin + max(1, pitch - 2))
+            if ymax <= ymin:
+                break
+            detections.append({
+                "box": [margin_x, ymin, img_w - margin_x, ymax],
+                "confidence": 0.8,
+                "class_index": 1,
+                # Spread lines across the three cascade tiers
+                "pred_char_count": [3.0, 2.0, 100.0][i % 3],
+            })
+        return detections
+
+
+class StubRecognizer:
+    """Stand-in for PARSEQ that returns a string whose length tracks the line width."""
+    def __init__(self, max_len: int):
+        self.max_len = max_len
+
+    def read(self, img: np.ndarray) -> str:
+        img_h, img_w = img.shape[:2]
+        length = max(1, min(self.max_len - 1, max(img_h, img_w) // max(1, min(img_h, img_w))))
+        return "あ" * length
+
+
+class StubNDLOCREngine(NDLOCREngine):
+    """NDLOCREngine whose ONNX sessions are replaced by stubs (no model files required)."""
+
+    def _load_models(self, shared=None):
+        classes = STUB_CLASSES
+        try:
+            from yaml import safe_load
+            with open(self.det_classes, encoding="utf-8") as f:
+                classes = safe_load(f)["names"]
+        except (OSError, KeyError, TypeError):
+            pass
+        self.detector = StubDetector(classes)
+        self.recognizer30 = StubRecognizer(30)
+        self.recognizer50 = StubRecognizer(50)
+        self.recognizer100 = StubRecognizer(100)
+
+
+def percentile_summary(samples: List[float]) -> Dict[str, float]:
+    """Returns mean/max and the configured percentiles of latency samples (in milliseconds)."""
+    if not samples:
+        return {}
+    arr = np.asarray(samples, dtype=np.float64) * 1000.0
+    summary = {f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES}
+    summary["mean"] = float(arr.mean())
+    summary["max"] = float(arr.max())
+    return summary
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Returns the peak resident set size of this process in MiB, if measurable."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def load_corpus(paths: List[str]) -> List[Tuple[str, Image.Image]]:
+    """Loads images from files and directories (non-recursive for files, recursive for directories)."""
+    corpus = []
+    for p in paths:
+        path = Path(p)
+        files = sorted(f for f in path.rglob("*") if f.suffix.lower() in IMAGE_EXTENSIONS) if path.is_dir() else [path]
+        for f in files:
+            with Image.open(f) as img:
+                corpus.append((f.name, img.convert("RGB")))
+    return corpus
+
+
+def synthetic_corpus(count: int = 3, size: Tuple[int, int] = (1200, 1700)) -> List[Tuple[str, Image.Image]]:
+    """Generates simple page-like images (dark bars on white) for runs without a corpus."""
+    corpus = []
+    for n in range(count):
+        img = Image.new("RGB", size, (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        for y in range(80, size[1] - 80, 40):
+            draw.rectangle([60, y, size[0] - 60 - (n * 37 + y) % 300, y + 18], fill=(30, 30, 30))
+        corpus.append((f"synthetic_{n}.png", img))
+    return corpus
+
+
+def benchmark_engine(engine: NDLOCREngine, corpus: List[Tuple[str, Image.Image]], warmup: int, iterations: int) -> Dict[str, Any]:
+    """Runs each pipeline stage of NDLOCREngine.ocr separately and records per-stage latencies."""
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    total_lines = 0
+    total_pages = 0
+    wall = 0.0
+
+    for rnd in range(warmup + iterations):
+        measured = rnd >= warmup
+        for name, pil_image in corpus:
+            t0 = time.perf_counter()
+            img = np.array(pil_image.convert("RGB"))
+            detections = engine._detect(img)
+            t1 = time.perf_counter()
+            layout = engine._build_layout(img, detections, name)
+            t2 = time.perf_counter()
+            texts = engine._process_cascade(layout.recog_lines, is_cascade=True)
+            t3 = time.perf_counter()
+            result = engine._build_result(layout, texts)
+            t4 = time.perf_counter()
+            if not measured:
+                continue
+            timings["detect"].append(t1 - t0)
+            timings["layout"].append(t2 - t1)
+            timings["recognition"].append(t3 - t2)
+            timings["format"].append(t4 - t3)
+            timings["total"].append(t4 - t0)
+            wall += t4 - t0
+            total_pages += 1
+            total_lines += len(result["lines"])
+
+    return _report(timings, total_pages, total_lines, wall)
+
+
+def benchmark_api(corpus: List[Tuple[str, Image.Image]], warmup: int, iterations: int) -> Dict[str, Any]:
+    """Posts each image to /v1/ocr through an in-process TestClient and records request latencies."""
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    payloads = []
+    for name, pil_image in corpus:
+        buf = io.BytesIO()
+        pil_image.save(buf, format="PNG")
+        payloads.append((Path(name).stem + ".png", buf.getvalue()))
+
+    timings: Dict[str, List[float]] = {"total": []}
+    total_lines = 0
+    total_pages = 0
+    wall = 0.0
+    with TestClient(app) as client:
+        for rnd in range(warmup + iterations):
+            for name, data in payloads:
+                t0 = time.perf_counter()
+                response = client.post("/v1/ocr", files={"file": (name, data, "image/png")})
+                elapsed = time.perf_counter() - t0
+                response.raise_for_status()
+                if rnd < warmup:
+                    continue
+                timings["total"].append(elapsed)
+                wall += elapsed
+                total_pages += 1
+                total_lines += sum(len(page["lines"]) for page in response.json()["pages"])
+
+    return _report(timings, total_pages, total_lines, wall)
+
+
+def _report(timings: Dict[str, List[float]], pages: int, lines: int, wall: float) -> Dict[str, Any]:
+    return {
+        "pages": pages,
+        "lines": lines,
+        "stages": {stage: percentile_summary(samples) for stage, samples in timings.items() if samples},
+        "throughput": {
+            "pages_per_sec": pages / wall if wall > 0 else 0.0,
+            "lines_per_sec": lines / wall if wall > 0 else 0.0,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compares a report to a baseline and returns human readable regression messages.
+    Latencies and RSS regress when they grow beyond the tolerance; throughput when it shrinks.
+    """
+    regressions = []
+
+    def check(metric: str, current: Optional[float], base: Optional[float], higher_is_worse: bool):
+        if current is None or not base:
+            return
+        ratio = current / base
+        if higher_is_worse and ratio > 1.0 + tolerance:
+            regressions.append(f"{metric}: {base:.3f} -> {current:.3f} (+{(ratio - 1.0) * 100:.1f}%)")
+        elif not higher_is_worse and ratio < 1.0 - tolerance:
+            regressions.append(f"{metric}: {base:.3f} -> {current:.3f} ({(ratio - 1.0) * 100:.1f}%)")
+
+    for stage, summary in report.get("stages", {}).items():
+        base_summary = baseline.get("stages", {}).get(stage, {})
+        for key in ("p50", "p95"):
+            check(f"stages.{stage}.{key}", summary.get(key), base_summary.get(key), higher_is_worse=True)
+    for key, value in report.get("throughput", {}).items():
+        check(f"throughput.{key}", value, baseline.get("throughput", {}).get(key), higher_is_worse=False)
+    check("peak_rss_mb", report.get("peak_rss_mb"), baseline.get("peak_rss_mb"), higher_is_worse=True)
+    return regressions
+
+
+def print_report(report: Dict[str, Any], out: Callable[[str], None] = print):
+    out(f"[INFO] pages={report['pages']} lines={report['lines']}")
+    for stage, summary in report["stages"].items():
+        cols = " ".join(f"{k}={v:.2f}ms" for k, v in summary.items())
+        out(f"[INFO] {stage:<12} {cols}")
+    tp = report["throughput"]
+    out(f"[INFO] throughput   {tp['pages_per_sec']:.2f} pages/s, {tp['lines_per_sec']:.1f} lines/s")
+    if report.get("peak_rss_mb") is not None:
+        out(f"[INFO] peak RSS     {report['peak_rss_mb']:.1f} MiB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark for NDLOCR-Lite engine and API")
+    parser.add_argument("--images", nargs="*", default=[], help="Image files or directories to use as corpus")
+    parser.add_argument("--target", choices=["engine", "api"], default="engine", help="Benchmark the engine stages or the /v1/ocr endpoint")
+    parser.add_argument("--stub", action="store_true", help="Replace ONNX sessions with stubs to measure Python overhead only")
+    parser.add_argument("--warmup", type=int, default=1, help="Warmup rounds over the corpus (not measured)")
+    parser.add_argument("--iterations", type=int, default=3, help="Measured rounds over the corpus")
+    parser.add_argument("--synthetic-pages", type=int, default=3, help="Synthetic pages to generate when no --images are given")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare against")
+    parser.add_argument("--save-baseline", help="Write the JSON report as a new baseline to this path")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression before failing (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.images) if args.images else synthetic_corpus(args.synthetic_pages)
+    if not corpus:
+        print("[ERROR] No images found in corpus")
+        return 2
+
+    engine_cls = StubNDLOCREngine if args.stub else NDLOCREngine
+    if args.target == "engine":
+        engine = engine_cls(device="cpu")
+        try:
+            report = benchmark_engine(engine, corpus, args.warmup, args.iterations)
+        finally:
+            engine.shutdown()
+    else:
+        with patch("src.api.main.NDLOCREngine", engine_cls):
+            report = benchmark_api(corpus, args.warmup, args.iterations)
+
+    report["config"] = {
+        "target": args.target,
+        "stub": args.stub,
+        "corpus_pages": len(corpus),
+        "warmup": args.warmup,
+        "iterations": args.iterations,
+    }
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            for msg in regressions:
+                print(f"[WARNING] Regression {msg}")
+            return 1
+        print("[INFO] No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
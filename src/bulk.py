@@ -0,0 +1,247 @@
+"""
+Bulk OCR runner for large local corpora, using NDLOCREngine directly (no HTTP).
+
+Walks a directory (or reads a manifest), OCRs every image with a pool of worker
+processes, writes JSON/text outputs incrementally next to their relative paths,
+records finished inputs in a checkpoint file so interrupted runs can resume, and
+reports throughput as it goes.
+
+Usage:
+    PYTHONPATH=. python -m src.bulk --input scans/ --output out/ --workers 4
+    PYTHONPATH=. python -m src.bulk --manifest pages.txt --output out/ --formats json,txt
+
+A manifest is a text file with one image path per line (relative paths are resolved
+against --input, or the manifest's directory when --input is omitted).
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from PIL import Image
+
+from src.core.engine import NDLOCREngine
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".jp2"}
+OUTPUT_FORMATS = {"json", "txt"}
+
+# Per-process engine, created by _init_worker, or the reason it could not be created
+_engine: Optional[NDLOCREngine] = None
+_init_error: Optional[str] = None
+
+
+def iter_directory(root: Path) -> Iterator[Tuple[Path, str]]:
+    """Yields (absolute path, relative key) for every image under root, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if Path(filename).suffix.lower() in IMAGE_EXTENSIONS:
+                path = Path(dirpath) / filename
+                yield path, path.relative_to(root).as_posix()
+
+
+def iter_manifest(manifest: Path, root: Optional[Path]) -> Iterator[Tuple[Path, str]]:
+    """Yields (absolute path, relative key) for each non-empty, non-comment manifest line."""
+    base = root or manifest.parent
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            path = Path(entry)
+            if not path.is_absolute():
+                path = base / path
+            try:
+                key = path.resolve().relative_to(base.resolve()).as_posix()
+            except ValueError:
+                key = path.resolve().as_posix().lstrip("/")
+            yield path, key
+
+
+def load_checkpoint(checkpoint: Path, retry_failed: bool = False) -> Set[str]:
+    """Returns the keys already handled by a previous run (failed ones too unless retry_failed)."""
+    done: Set[str] = set()
+    if not checkpoint.exists():
+        return done
+    with open(checkpoint, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            if entry.get("status") == "done" or not retry_failed:
+                done.add(entry["key"])
+    return done
+
+
+def _init_worker(engine_kwargs: Dict[str, Any]):
+    # An initializer that raises makes multiprocessing.Pool respawn the worker forever, so the
+    # error is kept and reported by process_one instead
+    global _engine, _init_error
+    _engine, _init_error = None, None
+    try:
+        _engine = NDLOCREngine(**engine_kwargs)
+    except Exception as e:
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _write_atomic(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def process_one(task: Tuple[str, str, str, List[str]]) -> Dict[str, Any]:
+    """OCRs a single image and writes its outputs. Runs inside a worker process."""
+    path, key, output_dir, formats = task
+    started = time.perf_counter()
+    if _engine is None:
+        return {"key": key, "status": "fatal", "error": _init_error, "seconds": 0.0}
+    try:
+        with Image.open(path) as img:
+            result = _engine.ocr(img, img_name=Path(path).name)
+        out_base = Path(output_dir) / key
+        if "json" in formats:
+            _write_atomic(out_base.with_name(out_base.name + ".json"), json.dumps(result, ensure_ascii=False))
+        if "txt" in formats:
+            _write_atomic(out_base.with_name(out_base.name + ".txt"), result["text"])
+        return {"key": key, "status": "done", "lines": len(result["lines"]), "seconds": time.perf_counter() - started}
+    except Exception as e:
+        return {"key": key, "status": "failed", "error": f"{type(e).__name__}: {e}", "seconds": time.perf_counter() - started}
+
+
+def run(
+    tasks: Iterator[Tuple[Path, str]],
+    output_dir: Path,
+    checkpoint: Path,
+    workers: int,
+    formats: List[str],
+    engine_kwargs: Dict[str, Any],
+    retry_failed: bool = False,
+    report_every: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    Processes all tasks not yet recorded in the checkpoint and returns run statistics.
+    Tasks are consumed lazily, so the corpus is never listed in memory; progress reports
+    therefore show no total.
+    With workers=0 everything runs in the current process (useful for debugging).
+    Raises RuntimeError if the engine cannot be loaded.
+    """
+    done = load_checkpoint(checkpoint, retry_failed=retry_failed)
+    print(f"[INFO] {len(done)} images already in checkpoint")
+
+    stats = {"done": 0, "failed": 0, "lines": 0, "skipped": 0, "seconds": 0.0}
+
+    def iter_pending():
+        for path, key in tasks:
+            if key in done:
+                stats["skipped"] += 1
+                continue
+            yield str(path), key, str(output_dir), formats
+
+    pending = iter_pending()
+    first = next(pending, None)
+    if first is None:
+        return stats
+    pending = itertools.chain([first], pending)
+
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    last_report = started
+
+    if workers > 0:
+        ctx = multiprocessing.get_context("spawn")
+        pool = ctx.Pool(processes=workers, initializer=_init_worker, initargs=(engine_kwargs,))
+        results = pool.imap_unordered(process_one, pending, chunksize=1)
+    else:
+        pool = None
+        _init_worker(engine_kwargs)
+        results = map(process_one, pending)
+
+    try:
+        with open(checkpoint, "a", encoding="utf-8") as ckpt:
+            for outcome in results:
+                if outcome["status"] == "fatal":
+                    raise RuntimeError(f"Failed to load the OCR engine: {outcome['error']}")
+                ckpt.write(json.dumps({k: outcome[k] for k in ("key", "status")}, ensure_ascii=False) + "\n")
+                ckpt.flush()
+                if outcome["status"] == "done":
+                    stats["done"] += 1
+                    stats["lines"] += outcome["lines"]
+                else:
+                    stats["failed"] += 1
+                    print(f"[WARNING] Failed {outcome['key']}: {outcome['error']}")
+
+                now = time.perf_counter()
+                if now - last_report >= report_every:
+                    last_report = now
+                    _print_progress(stats, now - started)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        elif _engine is not None:
+            _engine.shutdown()
+
+    stats["seconds"] = time.perf_counter() - started
+    _print_progress(stats, stats["seconds"])
+    return stats
+
+
+def _print_progress(stats: Dict[str, Any], elapsed: float):
+    processed = stats["done"] + stats["failed"]
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    line_rate = stats["lines"] / elapsed if elapsed > 0 else 0.0
+    print(
+        f"[INFO] {processed} images ({stats['failed']} failed, {stats['skipped']} skipped), "
+        f"{rate:.2f} pages/s, {line_rate:.1f} lines/s, elapsed {elapsed:.0f}s"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk OCR of a local corpus with NDLOCR-Lite")
+    parser.add_argument("--input", help="Directory to walk for images (or base directory for manifest entries)")
+    parser.add_argument("--manifest", help="Text file listing one image path per line")
+    parser.add_argument("--output", required=True, help="Directory for output files")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 4) // 4), help="Worker processes (0 runs in-process)")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="Recognition threads per worker (default: CPUs / workers)")
+    parser.add_argument("--formats", default="json,txt", help="Comma separated output formats: json, txt")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>/.checkpoint.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="Reprocess images recorded as failed in the checkpoint")
+    parser.add_argument("--enable-tcy", action="store_true", help="Enable Tate-Chu-Yoko recognition")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between throughput reports")
+    args = parser.parse_args(argv)
+
+    if not args.input and not args.manifest:
+        parser.error("one of --input or --manifest is required")
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - OUTPUT_FORMATS
+    if unknown:
+        parser.error(f"unsupported formats: {', '.join(sorted(unknown))}")
+
+    root = Path(args.input) if args.input else None
+    tasks = iter_manifest(Path(args.manifest), root) if args.manifest else iter_directory(root)
+    output_dir = Path(args.output)
+    checkpoint = Path(args.checkpoint) if args.checkpoint else output_dir / ".checkpoint.jsonl"
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 4) // max(1, args.workers))
+    engine_kwargs = {"device": "cpu", "enable_tcy": args.enable_tcy, "num_workers": threads}
+
+    try:
+        stats = run(tasks, output_dir, checkpoint, args.workers, formats, engine_kwargs,
+                    retry_failed=args.retry_failed, report_every=args.report_every)
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Cheap blank-page detection, run before layout detection.
+
+A page is split into a coarse grid of blocks; a block holds ink when its pixel values spread by
+more than a contrast threshold. Measuring local contrast rather than darkness keeps uniformly
+coloured covers, paper tone and lighting gradients from counting as ink, while a page number
+or a single short line still covers several blocks. The page margins are ignored, since scans
+often show the paper edge or shadows there. Large pages are sampled on a strided grid first,
+so the check costs about the same on a 12 MP scan as on a 1 MP one; strokes at scanning
+resolution are several pixels wide, so marks still show up in the sample.
+"""
+import numpy as np
+
+BLANK_GRID = 128        # Blocks along the long side of the page
+BLANK_CONTRAST = 64     # Minimum max-min spread (0-255) within a block to count as ink
+BLANK_MARGIN = 0.05     # Fraction of the width/height ignored on each side
+BLANK_MIN_SIDE = 64     # Pages smaller than this (in pixels) are never considered blank
+BLANK_SAMPLE_SIDE = 1024  # Pages are sampled down to about this many pixels along the long side
+
+
+def ink_ratio(img: np.ndarray, grid: int = BLANK_GRID, contrast: int = BLANK_CONTRAST, margin: float = BLANK_MARGIN) -> float:
+    """Share of grid blocks containing ink in an RGB (or grayscale) numpy image, from 0 to 1."""
+    img_h, img_w = img.shape[:2]
+    if max(img_h, img_w) < BLANK_MIN_SIDE:
+        return 1.0
+    y0, x0 = int(img_h * margin), int(img_w * margin)
+    # Green carries most of the luminance; no colour conversion of the full page needed
+    step = max(1, max(img_h, img_w) // BLANK_SAMPLE_SIDE)
+    channel = img[y0:img_h - y0:step, x0:img_w - x0:step]
+    if channel.ndim == 3:
+        channel = channel[..., 1]
+    inner_h, inner_w = channel.shape
+    block = max(2, max(inner_h, inner_w) // grid)
+    rows, cols = inner_h // block, inner_w // block
+    if rows == 0 or cols == 0:
+        return 1.0
+    blocks = channel[:rows * block, :cols * block].reshape(rows, block, cols, block)
+    spread = blocks.max(axis=(1, 3)).astype(np.int16) - blocks.min(axis=(1, 3))
+    return float(np.count_nonzero(spread > contrast)) / spread.size
@@ -0,0 +1,161 @@
+"""
+Vectorized post-processing of layout detections.
+
+The detector session runs with permissive thresholds and no effective NMS, so its raw
+output can be cached and re-thresholded per request without rerunning the network.
+Detections are dicts with "box" ([xmin, ymin, xmax, ymax]), "confidence", "class_index"
+and optionally "pred_char_count", as returned by DEIM.detect().
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Thresholds the detector itself is constructed with: low enough that every request threshold
+# at or above them can be applied afterwards, and an IoU of 1 so it suppresses nothing
+RAW_SCORE_THRESHOLD = 0.05
+RAW_IOU_THRESHOLD = 1.0
+
+
+class DetectionThresholds:
+    """
+    Detection post-processing thresholds.
+    Candidates scoring below `score` are dropped before NMS, boxes overlapping a better box of
+    the same class by more than `iou` are suppressed, and survivors below `conf` are dropped.
+    Score thresholds below RAW_SCORE_THRESHOLD have no further effect.
+    """
+    def __init__(self, score: float = 0.2, conf: float = 0.25, iou: float = 0.2):
+        self.score = score
+        self.conf = conf
+        self.iou = iou
+
+    def key(self) -> Tuple[float, float, float]:
+        return (self.score, self.conf, self.iou)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DetectionThresholds) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        return f"DetectionThresholds(score={self.score}, conf={self.conf}, iou={self.iou})"
+
+
+class LineFilter:
+    """
+    Noise filters applied to text lines before recognition.
+    Lines smaller than `min_area` square pixels, with a confidence below `min_conf`, whose long
+    side exceeds `max_aspect` times their short side, or of which more than `max_overlap` of the
+    area lies inside a single larger line are dropped. A zero limit (or a `max_overlap` of 1)
+    disables that filter.
+    """
+    def __init__(self, min_area: float = 0.0, min_conf: float = 0.0, max_aspect: float = 0.0, max_overlap: float = 1.0):
+        self.min_area = min_area
+        self.min_conf = min_conf
+        self.max_aspect = max_aspect
+        self.max_overlap = max_overlap
+
+    @property
+    def enabled(self) -> bool:
+        return self.min_area > 0 or self.min_conf > 0 or self.max_aspect > 0 or self.max_overlap < 1.0
+
+    def __repr__(self) -> str:
+        return (f"LineFilter(min_area={self.min_area}, min_conf={self.min_conf}, "
+                f"max_aspect={self.max_aspect}, max_overlap={self.max_overlap})")
+
+
+def detection_arrays(detections: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (boxes (N, 4) float, confidences (N,), class indices (N,)) of a detection list."""
+    if not detections:
+        return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+    boxes = np.array([det["box"] for det in detections], dtype=np.float64).reshape(-1, 4)
+    scores = np.array([det["confidence"] for det in detections], dtype=np.float64)
+    classes = np.array([det["class_index"] for det in detections], dtype=np.int64)
+    return boxes, scores, classes
+
+
+def box_areas(boxes: np.ndarray) -> np.ndarray:
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def intersection_matrix(boxes: np.ndarray, other: Optional[np.ndarray] = None) -> np.ndarray:
+    """Pairwise intersection areas of (N, 4) and (M, 4) boxes as an (N, M) matrix."""
+    other = boxes if other is None else other
+    x0 = np.maximum(boxes[:, None, 0], other[None, :, 0])
+    y0 = np.maximum(boxes[:, None, 1], other[None, :, 1])
+    x1 = np.minimum(boxes[:, None, 2], other[None, :, 2])
+    y1 = np.minimum(boxes[:, None, 3], other[None, :, 3])
+    return np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+
+
+def iou_matrix(boxes: np.ndarray, other: Optional[np.ndarray] = None) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) boxes as an (N, M) matrix (boxes with itself by default)."""
+    other = boxes if other is None else other
+    inter = intersection_matrix(boxes, other)
+    union = box_areas(boxes)[:, None] + box_areas(other)[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Class-wise greedy non-maximum suppression. Returns the indices of the kept boxes in
+    descending score order. The IoU matrix is computed once; boxes of different classes
+    never suppress each other.
+    """
+    order = np.argsort(-scores, kind="stable")
+    if len(order) == 0 or iou_threshold >= 1.0:
+        return order
+    ordered = boxes[order]
+    overlaps = (iou_matrix(ordered) > iou_threshold) & (classes[order][:, None] == classes[order][None, :])
+    # Only higher-scoring boxes can suppress lower-scoring ones
+    overlaps = np.triu(overlaps, k=1)
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep &= ~overlaps[i]
+    return order[keep]
+
+
+def filter_detections(detections: List[Dict[str, Any]], thresholds: DetectionThresholds) -> List[Dict[str, Any]]:
+    """
+    Applies score filtering, class-wise NMS and the confidence threshold to raw detections.
+    Returns the surviving detections in their original order (the input list is not modified).
+    """
+    boxes, scores, classes = detection_arrays(detections)
+    candidates = np.flatnonzero(scores >= thresholds.score)
+    kept = candidates[nms(boxes[candidates], scores[candidates], classes[candidates], thresholds.iou)]
+    kept = np.sort(kept[scores[kept] >= thresholds.conf])
+    return [detections[i] for i in kept]
+
+
+def line_filter_mask(boxes: np.ndarray, scores: np.ndarray, line_filter: LineFilter,
+                     classes: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns a boolean mask of the (N, 4) line boxes that pass `line_filter`.
+    Overlap is measured against the lines of the same class (per `classes`, when given) passing
+    the other filters, so ruby or captions inside a body line are kept; of two equally large
+    lines covering each other, the first one is kept.
+    """
+    keep = np.ones(len(boxes), dtype=bool)
+    if len(boxes) == 0:
+        return keep
+    widths = np.clip(boxes[:, 2] - boxes[:, 0], 0, None)
+    heights = np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+    areas = widths * heights
+    keep &= areas > 0
+    if line_filter.min_area > 0:
+        keep &= areas >= line_filter.min_area
+    if line_filter.min_conf > 0:
+        keep &= scores >= line_filter.min_conf
+    if line_filter.max_aspect > 0:
+        keep &= np.maximum(widths, heights) <= line_filter.max_aspect * np.minimum(widths, heights)
+    if line_filter.max_overlap < 1.0 and np.count_nonzero(keep) > 1:
+        candidates = np.flatnonzero(keep)
+        cand_areas = areas[candidates]
+        # covered[i, j]: share of line i inside line j
+        covered = intersection_matrix(boxes[candidates]) / cand_areas[:, None]
+        larger = (cand_areas[None, :] > cand_areas[:, None]) | np.tril(cand_areas[None, :] == cand_areas[:, None], k=-1)
+        if classes is not None:
+            larger &= classes[candidates][None, :] == classes[candidates][:, None]
+        keep[candidates[((covered > line_filter.max_overlap) & larger).any(axis=1)]] = False
+    return keep
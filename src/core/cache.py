@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Resubmitted pages are identified in two steps: a coarse gradient hash buckets the page
+# (with a dead zone so flat areas and small edits do not flip bits), then a small grayscale
+# thumbnail is compared with the cached one. Pages only match if the mean absolute difference
+# of their thumbnails is within PAGE_MATCH_TOLERANCE gray levels, which admits a few corrected
+# characters but not a different page with a similar layout. A match only selects the line texts
+# to reuse (by exact region hash); it also admits an added line, so detection is never skipped.
+PAGE_HASH_SIZE = 16
+PAGE_HASH_DEAD_ZONE = 24
+PAGE_THUMB_SIZE = 64
+PAGE_MATCH_TOLERANCE = 2.0
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded least-recently-used cache with hit/miss counters.
+    Shared by the engine's page and line caches.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def record_hit(self):
+        """Counts a lookup answered without get(), e.g. a duplicate key within one batch."""
+        with self._lock:
+            self.hits += 1
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the size, capacity, hit/miss counts and hit rate of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def page_signature(pil_image: Image.Image) -> Tuple[Tuple[int, int, bytes], np.ndarray]:
+    """
+    Perceptual signature of a page: a cache key (exact size plus a coarse difference hash)
+    and a grayscale thumbnail used to confirm a match with pages_match().
+    """
+    gray = pil_image.convert("L")
+    small = np.asarray(gray.resize((PAGE_HASH_SIZE + 1, PAGE_HASH_SIZE + 1), Image.BILINEAR), dtype=np.int16)
+    horizontal = small[:-1, 1:] - small[:-1, :-1]
+    vertical = small[1:, :-1] - small[:-1, :-1]
+    bits = np.concatenate([
+        (horizontal > PAGE_HASH_DEAD_ZONE).ravel(), (horizontal < -PAGE_HASH_DEAD_ZONE).ravel(),
+        (vertical > PAGE_HASH_DEAD_ZONE).ravel(), (vertical < -PAGE_HASH_DEAD_ZONE).ravel(),
+    ])
+    thumb = np.asarray(gray.resize((PAGE_THUMB_SIZE, PAGE_THUMB_SIZE), Image.BILINEAR), dtype=np.uint8)
+    return (pil_image.width, pil_image.height, np.packbits(bits).tobytes()), thumb
+
+
+def pages_match(thumb: np.ndarray, other: np.ndarray, tolerance: float = PAGE_MATCH_TOLERANCE) -> bool:
+    """True if two page thumbnails differ by at most `tolerance` gray levels on average."""
+    return float(np.abs(thumb.astype(np.int16) - other.astype(np.int16)).mean()) <= tolerance
+
+
+def region_hash(npimg: np.ndarray) -> bytes:
+    """Fast exact hash of an image region (shape and pixel bytes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(npimg.shape).encode())
+    digest.update(np.ascontiguousarray(npimg).tobytes())
+    return digest.digest()
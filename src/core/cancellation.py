@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Optional
+
+# Cancellation reasons
+CANCELLED = "cancelled"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CLIENT_DISCONNECTED = "client_disconnected"
+
+
+class OCRCancelledError(Exception):
+    """Raised inside the OCR pipeline when its CancellationToken has been cancelled or has expired."""
+    def __init__(self, reason: str = CANCELLED):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with an optional deadline.
+    Created by the API for each request/job and checked cooperatively by the engine
+    between pipeline stages and before each line recognition.
+    """
+    def __init__(self, deadline: Optional[float] = None):
+        # Deadline is an absolute time.monotonic() value
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> "CancellationToken":
+        """Creates a token that expires `seconds` from now (no deadline if None or <= 0)."""
+        if seconds is None or seconds <= 0:
+            return cls()
+        return cls(deadline=time.monotonic() + seconds)
+
+    def cancel(self, reason: str = CANCELLED):
+        """Marks the token as cancelled. The first reason given wins."""
+        if self._reason is None:
+            self._reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+            return True
+        return False
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason if self.cancelled else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None when there is no deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OCRCancelledError(self._reason or CANCELLED)
@@ -1,13 +1,27 @@
 import sys
 import os
+import copy
+import time
+import asyncio
+import threading
 import numpy as np
 from PIL import Image
 from defusedxml import ElementTree as ET
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 from yaml import safe_load
 
+from src.core.blank import ink_ratio
+from src.core.boxes import (
+    DetectionThresholds, LineFilter, RAW_IOU_THRESHOLD, RAW_SCORE_THRESHOLD, filter_detections, line_filter_mask,
+)
+from src.core.cache import LRUCache, page_signature, pages_match, region_hash
+from src.core.cancellation import CancellationToken
+from src.core.pool import PriorityThreadPool
+from src.core.presets import OCRPreset, get_preset
+
 # Add submodule src to path to allow imports from it
 # This is necessary because the ndlocr-lite submodule expects its internal structure to be on the PYTHONPATH.
 SUBMODULE_SRC = Path(__file__).resolve().parent.parent.parent / "extern" / "ndlocr-lite" / "src"
@@ -19,6 +33,10 @@ from parseq import PARSEQ  # noqa: E402
 from reading_order.xy_cut.eval import eval_xml  # noqa: E402
 from ndl_parser import convert_to_xml_string3  # noqa: E402
 
+class ModelReloadInProgressError(Exception):
+    """Raised when a model reload is requested while another one is running."""
+
+
 class RecogLine:
     """
     Data class representing a line image and its metadata for recognition.
@@ -33,6 +51,47 @@ class RecogLine:
     def __lt__(self, other):
         return self.idx < other.idx
 
+class PageLayout:
+    """
+    Intermediate state of a page between layout analysis and recognition.
+    Holds the XML tree, its LINE elements in reading order and the line images to recognize.
+    """
+    def __init__(
+        self,
+        img_w: int,
+        img_h: int,
+        img_name: str,
+        classeslist: List[str],
+        root: Any,
+        lines: List[Any],
+        recog_lines: List[RecogLine],
+        tatelinecnt: int,
+        alllinecnt: int,
+        detections: Optional[List[Dict[str, Any]]] = None,
+        noise_lines: Optional[List[Any]] = None,
+    ):
+        self.img_w = img_w
+        self.img_h = img_h
+        self.img_name = img_name
+        self.classeslist = classeslist
+        self.root = root
+        self.lines = lines
+        self.recog_lines = recog_lines
+        self.tatelinecnt = tatelinecnt
+        self.alllinecnt = alllinecnt
+        self.detections = detections
+        # LINE elements dropped by the line filter and reported without text
+        self.noise_lines = noise_lines or []
+        # Page cache key and the line texts of the previous version of this page (region hash -> text)
+        self.cache_key: Optional[Any] = None
+        self.cache_thumb: Optional[np.ndarray] = None
+        self.cached_lines: Optional[Dict[bytes, str]] = None
+
+    @property
+    def is_vertical(self) -> bool:
+        """True if most lines are vertical (the page text is then read right to left)."""
+        return self.alllinecnt > 0 and self.tatelinecnt / self.alllinecnt > 0.5
+
 class NDLOCREngine:
     """
     Wrapper for the NDLOCR-Lite engine.
@@ -46,6 +105,22 @@ class NDLOCREngine:
     CASCADE_RECOG30_MAX_LEN = 25
     CASCADE_RECOG50_MAX_LEN = 45
 
+    # Relative recognition cost of a line per cascade entry tier, and the aspect ratio above
+    # which a line is likely to hit the long-line split round (costing an extra PARSEQ-100 pass)
+    LINE_COST_SMALL = 0.4
+    LINE_COST_MEDIUM = 0.6
+    LINE_COST_LARGE = 1.0
+    LONG_LINE_ASPECT = 40.0
+
+    # Synthetic warmup inputs: a page at the detector input size (deim-s-1024x1024) and line
+    # crops of a width typical for each recognition tier
+    WARMUP_PAGE_SIZE = 1024
+    WARMUP_LINE_HEIGHT = 32
+    WARMUP_LINE_WIDTHS = {"30": 256, "50": 512, "100": 1024}
+
+    # Attributes holding the ONNX sessions, swapped together by reload_models()
+    MODEL_ATTRS = ("detector", "recognizer100", "recognizer30", "recognizer50")
+
     def __init__(
         self,
         device: str = "cpu",
@@ -59,10 +134,39 @@ class NDLOCREngine:
         det_conf_threshold: float = 0.25,
         det_iou_threshold: float = 0.2,
         enable_tcy: bool = False,
+        num_workers: Optional[int] = None,
+        page_workers: int = 2,
+        page_cache_size: int = 0,
+        line_cache_size: int = 0,
+        detection_cache_size: int = 0,
+        blank_ink_ratio: float = 0.0,
+        line_min_area: float = 0.0,
+        line_min_conf: float = 0.0,
+        line_max_aspect: float = 0.0,
+        line_max_overlap: float = 1.0,
+        report_filtered_lines: bool = False,
+        shared: Optional[List["NDLOCREngine"]] = None,
     ):
         """
         Initializes the engine with model paths and detection thresholds.
         Loads ONNX models into memory.
+        `num_workers` sizes the recognition thread pool (defaults to the CPU count).
+        `page_workers` sizes the page executor used by aocr()/aocr_batch() (pages in flight).
+        `page_cache_size` enables incremental re-OCR for that many recently seen pages (0 disables it).
+        `line_cache_size` bounds the cache of PARSEQ results for repeated line crops (0 disables it).
+        `detection_cache_size` bounds the cache of raw detector outputs per image, so the same
+        image can be re-thresholded without rerunning detection (0 disables it).
+        Pages whose ink ratio (src/core/blank.py) is below `blank_ink_ratio` are returned empty
+        without running detection (0 disables the check).
+        The line_* limits filter noise lines out before recognition (see LineFilter in
+        src/core/boxes.py; the defaults disable every filter). With `report_filtered_lines`
+        the dropped lines are still returned, without text and marked as filtered.
+        The det_* thresholds are the defaults of the detection post-processing and can be
+        overridden per call with a DetectionThresholds (src/core/boxes.py).
+        Per-call speed/quality options are given as an OCRPreset (src/core/presets.py).
+        With `shared` engines (other model sets served by the same process), this engine uses their
+        executors instead of creating its own, and reuses their loaded detector and recognizers
+        wherever the model files match.
         """
         self.device = device
         self.enable_tcy = enable_tcy
@@ -79,36 +183,228 @@ class NDLOCREngine:
         self.det_score_threshold = det_score_threshold
         self.det_conf_threshold = det_conf_threshold
         self.det_iou_threshold = det_iou_threshold
+        self.default_thresholds = DetectionThresholds(det_score_threshold, det_conf_threshold, det_iou_threshold)
 
         self.detector = None
         self.recognizer100 = None
         self.recognizer30 = None
         self.recognizer50 = None
+        # TCY wrapper id -> (wrapper, wrapped PARSEQ), for presets that skip TCY
+        self._plain_recognizers: Dict[int, Tuple[Any, Any]] = {}
         
-        # ThreadPoolExecutor for parallelizing character recognition across lines
-        self.executor = ThreadPoolExecutor(
-            max_workers=os.cpu_count() or 4,
-            thread_name_prefix="ocr_worker"
-        )
+        # Incremental re-OCR: page signature key -> {"thumb", "lines": {region hash: text}}
+        self.page_cache = LRUCache(page_cache_size) if page_cache_size > 0 else None
+        self._reused_lines = 0
+        self._recognized_lines = 0
+        self._stats_lock = threading.Lock()
+        # Recognition results of repeated line crops: (tier, region hash) -> text
+        self.line_cache = LRUCache(line_cache_size) if line_cache_size > 0 else None
+        # Raw (unthresholded) detector output: (image hash, detection size) -> detections
+        self.detection_cache = LRUCache(detection_cache_size) if detection_cache_size > 0 else None
+        # Pages skipped as blank before detection, and pages on which detection found nothing
+        self.blank_ink_ratio = blank_ink_ratio
+        self._blank_pages = 0
+        self._empty_pages = 0
+        self.line_filter = LineFilter(line_min_area, line_min_conf, line_max_aspect, line_max_overlap)
+        self.report_filtered_lines = report_filtered_lines
+        self._noise_lines = 0
 
-        self._load_models()
-
-    def _load_models(self):
-        """Loads ONNX models for detection and recognition."""
-        print(f"[INFO] Loading detector from {self.det_weights}")
-        self.detector = DEIM(
-            model_path=self.det_weights,
-            class_mapping_path=self.det_classes,
-            score_threshold=self.det_score_threshold,
-            conf_threshold=self.det_conf_threshold,
-            iou_threshold=self.det_iou_threshold,
-            device=self.device
-        )
+        # Hot reload: generation of the serving models and calls in flight per generation
+        self.model_generation = 0
+        self._inflight: Dict[int, int] = {}
+        self._inflight_cond = threading.Condition()
+        self._reload_lock = threading.Lock()
+        self._reloads = 0
+
+        # Shared engines are only used during construction: keeping references to them would keep
+        # unloaded model sets alive
+        shared = list(shared or [])
+        self._owns_executors = not shared
+        if shared:
+            self.num_workers = shared[0].num_workers
+            self.executor = shared[0].executor
+            self.page_workers = shared[0].page_workers
+            self.page_executor = shared[0].page_executor
+        else:
+            # Thread pool for parallelizing character recognition across lines, drained in the
+            # priority of the submitting page (see task_priority in src/core/pool.py)
+            self.num_workers = num_workers or os.cpu_count() or 4
+            self.executor = PriorityThreadPool(
+                max_workers=self.num_workers,
+                thread_name_prefix="ocr_worker"
+            )
+
+            # Page-level executor: each thread drives one page through detection and layout, then
+            # fans its lines out to the recognition pool above and waits. Keeping page work off the
+            # recognition pool means a page never blocks on recognition slots held by itself, and the
+            # total thread count stays page_workers + num_workers whatever the callers' concurrency.
+            if page_workers < 1:
+                raise ValueError("page_workers must be at least 1")
+            self.page_workers = page_workers
+            self.page_executor = ThreadPoolExecutor(
+                max_workers=self.page_workers,
+                thread_name_prefix="ocr_page"
+            )
+
+        self._load_models(shared)
+
+    def _load_models(self, shared: Optional[List["NDLOCREngine"]] = None):
+        """Loads ONNX models for detection and recognition (reusing matching models of `shared` engines)."""
+        shared = shared or []
+        self.detector = self._shared_detector(shared)
+        if self.detector is None:
+            print(f"[INFO] Loading detector from {self.det_weights}")
+            # Thresholds and NMS are applied afterwards (filter_detections), so one session serves
+            # every threshold setting
+            self.detector = DEIM(
+                model_path=self.det_weights,
+                class_mapping_path=self.det_classes,
+                score_threshold=RAW_SCORE_THRESHOLD,
+                conf_threshold=RAW_SCORE_THRESHOLD,
+                iou_threshold=RAW_IOU_THRESHOLD,
+                device=self.device
+            )
+        else:
+            print(f"[INFO] Sharing detector {self.det_weights}")
 
         print("[INFO] Loading recognizers")
-        self.recognizer100 = self._get_recognizer(self.rec_weights)
-        self.recognizer30 = self._get_recognizer(self.rec_weights30)
-        self.recognizer50 = self._get_recognizer(self.rec_weights50)
+        self.recognizer100 = self._shared_recognizer(shared, self.rec_weights) or self._get_recognizer(self.rec_weights)
+        self.recognizer30 = self._shared_recognizer(shared, self.rec_weights30) or self._get_recognizer(self.rec_weights30)
+        self.recognizer50 = self._shared_recognizer(shared, self.rec_weights50) or self._get_recognizer(self.rec_weights50)
+
+    def reload_models(
+        self,
+        drain_timeout: Optional[float] = None,
+        shared: Optional[List["NDLOCREngine"]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reloads the model files without interrupting service.
+        The new sessions are loaded and warmed up next to the serving ones, then swapped in
+        together; calls started afterwards use the new models. The old sessions are released
+        once the calls started before the swap have finished (waiting up to `drain_timeout`
+        seconds, None waits indefinitely). A call in flight during the swap may detect with the
+        old detector and recognize with the new recognizers; each cascade run uses one set.
+        The caches are cleared, since their entries were produced by the old models.
+        Matching models of the `shared` engines are reused (see __init__); without them, every
+        model is loaded anew.
+        If loading fails, the serving models are kept and the error is raised.
+        Raises ModelReloadInProgressError if a reload is already running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ModelReloadInProgressError("A model reload is already running")
+        try:
+            started = time.perf_counter()
+            # A shallow copy loads the new sessions without touching the serving ones
+            staging = copy.copy(self)
+            staging._plain_recognizers = {}
+            staging._load_models(shared)
+            staging.warmup()
+            load_seconds = time.perf_counter() - started
+
+            with self._inflight_cond:
+                old_models = {name: getattr(self, name) for name in self.MODEL_ATTRS}
+                for name in self.MODEL_ATTRS:
+                    setattr(self, name, getattr(staging, name))
+                self._plain_recognizers = staging._plain_recognizers
+                old_generation = self.model_generation
+                self.model_generation += 1
+                self._reloads += 1
+            self._clear_caches()
+            print(f"[INFO] Swapped in models generation {self.model_generation} ({load_seconds:.2f}s to load)")
+
+            drained = self._wait_for_drain(old_generation, drain_timeout)
+            # Drop entries that calls of the old generation stored while draining
+            self._clear_caches()
+            del old_models
+            if not drained:
+                print(f"[WARNING] Calls on models generation {old_generation} still running after {drain_timeout}s")
+            return {"generation": self.model_generation, "load_seconds": load_seconds, "drained": drained}
+        finally:
+            self._reload_lock.release()
+
+    def warmup(self) -> Dict[str, float]:
+        """
+        Runs synthetic inputs through the detector and each recognizer tier, so ONNX Runtime
+        allocates its buffers and selects kernels before real traffic arrives.
+        The detector reads a page at its input size; each tier reads horizontal and vertical
+        lines of a typical width for that tier on all recognition threads at once, as a page does.
+        Returns the seconds spent per model.
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        page = np.full((self.WARMUP_PAGE_SIZE, self.WARMUP_PAGE_SIZE, 3), 255, dtype=np.uint8)
+        # A dark band so detection post-processing runs on some candidates
+        page[self.WARMUP_PAGE_SIZE // 4:self.WARMUP_PAGE_SIZE // 4 + 32, 64:-64] = 0
+        self.detector.detect(page)
+        timings["detector"] = time.perf_counter() - started
+
+        for tier, recognizer in (("30", self.recognizer30), ("50", self.recognizer50), ("100", self.recognizer100)):
+            width = self.WARMUP_LINE_WIDTHS[tier]
+            line = np.full((self.WARMUP_LINE_HEIGHT, width, 3), 255, dtype=np.uint8)
+            line[8:-8, 8:-8] = 0
+            lines = [line, np.ascontiguousarray(line.transpose(1, 0, 2))] * max(1, self.num_workers // 2)
+            started = time.perf_counter()
+            list(self.executor.map(recognizer.read, lines))
+            timings[f"recognizer{tier}"] = time.perf_counter() - started
+        return timings
+
+    @contextmanager
+    def _models_in_use(self) -> Iterator[int]:
+        """Counts a call as in flight on the current model generation until it returns."""
+        with self._inflight_cond:
+            generation = self.model_generation
+            self._inflight[generation] = self._inflight.get(generation, 0) + 1
+        try:
+            yield generation
+        finally:
+            with self._inflight_cond:
+                self._inflight[generation] -= 1
+                if not self._inflight[generation]:
+                    del self._inflight[generation]
+                self._inflight_cond.notify_all()
+
+    def _wait_for_drain(self, generation: int, timeout: Optional[float] = None) -> bool:
+        """Waits until no call started on `generation` or earlier is in flight. False on timeout."""
+        with self._inflight_cond:
+            return self._inflight_cond.wait_for(
+                lambda: not any(g <= generation for g in self._inflight), timeout=timeout
+            )
+
+    def _clear_caches(self):
+        for cache in (self.page_cache, self.line_cache, self.detection_cache):
+            if cache is not None:
+                cache.clear()
+
+    def reload_stats(self) -> Dict[str, Any]:
+        """Model generation and calls in flight per generation."""
+        with self._inflight_cond:
+            return {"generation": self.model_generation, "reloads": self._reloads, "in_flight": dict(self._inflight)}
+
+    def _shared_detector(self, shared: List["NDLOCREngine"]):
+        """A loaded detector of a shared engine with the same weights and classes, if any."""
+        for other in shared:
+            if other.detector is not None and (other.det_weights, other.det_classes) == (self.det_weights, self.det_classes):
+                return other.detector
+        return None
+
+    def _shared_recognizer(self, shared: List["NDLOCREngine"], weights_path: str):
+        """A loaded recognizer of a shared engine with the same weights, charset and TCY setting, if any."""
+        for other in shared:
+            if (other.rec_classes, other.enable_tcy) != (self.rec_classes, self.enable_tcy):
+                continue
+            for path, recognizer in ((other.rec_weights, other.recognizer100), (other.rec_weights30, other.recognizer30), (other.rec_weights50, other.recognizer50)):
+                if path == weights_path and recognizer is not None:
+                    print(f"[INFO] Sharing recognizer {weights_path}")
+                    # Only this recognizer's entry: the others would keep the other engine's sessions alive
+                    entry = other._plain_recognizers.get(id(recognizer))
+                    if entry is not None:
+                        self._plain_recognizers[id(recognizer)] = entry
+                    return recognizer
+        return None
+
+    def model_paths(self) -> List[str]:
+        """Weight files of the engine's models (used to estimate their memory footprint)."""
+        return [self.det_weights, self.rec_weights, self.rec_weights30, self.rec_weights50]
 
     def _get_recognizer(self, weights_path: str):
         """Helper to initialize a PARSEQ recognizer with a specific weight file."""
@@ -120,24 +416,133 @@ class NDLOCREngine:
         if self.enable_tcy:
             try:
                 from tcy_wrapper import TateChuYokoWrapper
-                recognizer = TateChuYokoWrapper(recognizer)
+                plain = recognizer
+                recognizer = TateChuYokoWrapper(plain)
+                self._plain_recognizers[id(recognizer)] = (recognizer, plain)
                 print(f"[INFO] TCY enabled for recognizer: {weights_path}")
             except ImportError:
                 print("[WARNING] Could not import TateChuYokoWrapper. TCY will be disabled.")
         
         return recognizer
 
+    def _tier_recognizer(self, recognizer, preset: OCRPreset):
+        """The recognizer to use under `preset`: TCY wrappers are bypassed when the preset disables TCY."""
+        if preset.tcy:
+            return recognizer
+        entry = self._plain_recognizers.get(id(recognizer))
+        return entry[1] if entry is not None and entry[0] is recognizer else recognizer
+
     def shutdown(self):
-        """Shuts down the internal thread pool."""
-        self.executor.shutdown()
+        """Shuts down the page executor and the recognition thread pool (unless they are shared)."""
+        if self._owns_executors:
+            self.page_executor.shutdown()
+            self.executor.shutdown()
+
+    def concurrency_limits(self) -> Dict[str, int]:
+        """Sizes of the engine's executors."""
+        return {"page_workers": self.page_workers, "recognition_workers": self.num_workers}
+
+    async def aocr(
+        self,
+        pil_image: Image.Image,
+        img_name: str = "image.jpg",
+        cancel_token: Optional[CancellationToken] = None,
+        on_layout: Optional[Callable[["PageLayout"], None]] = None,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> Dict[str, Any]:
+        """
+        Awaitable ocr(): runs the page on the engine's page executor without blocking the event loop.
+        At most `page_workers` pages run at once; further calls wait in the executor queue.
+        """
+        future = self.page_executor.submit(
+            self.ocr, pil_image, img_name, cancel_token=cancel_token, on_layout=on_layout, preset=preset, thresholds=thresholds
+        )
+        return await asyncio.wrap_future(future)
+
+    async def aocr_batch(
+        self,
+        images: List[Tuple[Image.Image, str]],
+        cancel_token: Optional[CancellationToken] = None,
+        on_layout: Optional[Callable[["PageLayout"], None]] = None,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> List[Dict[str, Any]]:
+        """Awaitable ocr_batch(), run on the page executor."""
+        future = self.page_executor.submit(
+            self.ocr_batch, images, cancel_token=cancel_token, on_layout=on_layout, preset=preset, thresholds=thresholds
+        )
+        return await asyncio.wrap_future(future)
+
+    def _read_lines(
+        self,
+        recognizer,
+        images: List[np.ndarray],
+        cancel_token: Optional[CancellationToken] = None,
+        tier: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Recognizes a batch of line images on the thread pool.
+        With a cancellation token, each line checks it before inference so a cancelled
+        request stops consuming CPU within one line's recognition time.
+        With the line cache enabled, crops already recognized by the same tier (running
+        headers, page numbers, form labels) are answered from the cache.
+        """
+        line_cache = self.line_cache if tier is not None else None
+
+        def read(npimg: np.ndarray) -> str:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            return recognizer.read(npimg)
+
+        if line_cache is None:
+            return list(self.executor.map(read if cancel_token is not None else recognizer.read, images))
 
-    def _process_cascade(self, alllineobj: List[RecogLine], is_cascade: bool = True) -> List[str]:
+        # Look up each distinct crop once; duplicates within the batch count as hits
+        keys = [(tier, digest) for digest in self.executor.map(region_hash, images)]
+        known: Dict[Any, str] = {}
+        misses: Dict[Any, np.ndarray] = {}
+        for key, npimg in zip(keys, images):
+            if key in known or key in misses:
+                line_cache.record_hit()
+                continue
+            pred_str = line_cache.get(key)
+            if pred_str is None:
+                misses[key] = npimg
+            else:
+                known[key] = pred_str
+
+        for key, pred_str in zip(misses, self.executor.map(read, misses.values())):
+            line_cache.put(key, pred_str)
+            known[key] = pred_str
+        return [known[key] for key in keys]
+
+    def _process_cascade(
+        self,
+        alllineobj: List[RecogLine],
+        is_cascade: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+        preset: Optional[OCRPreset] = None,
+    ) -> List[str]:
         """
         Recognition cascading strategy.
         1. Routes lines to PARSEQ-30, 50, or 100 based on 'pred_char_cnt' from the detector.
         2. If a smaller model yields a result longer than its training length, it cascades to the next larger model.
         3. For extremely long lines (>=98 chars), splits the line and re-recognizes (v1.2.1 improvement).
+        The preset can disable routing (step 1), raise the cascade thresholds (step 2), skip
+        step 3 and bypass TCY.
+        Raises OCRCancelledError between and during tiers if `cancel_token` is cancelled.
         """
+        preset = preset or get_preset()
+        is_cascade = is_cascade and preset.cascade
+        recog30_max_len = preset.recog30_max_len or self.CASCADE_RECOG30_MAX_LEN
+        recog50_max_len = preset.recog50_max_len or self.CASCADE_RECOG50_MAX_LEN
+        recognizer30 = self._tier_recognizer(self.recognizer30, preset)
+        recognizer50 = self._tier_recognizer(self.recognizer50, preset)
+        recognizer100 = self._tier_recognizer(self.recognizer100, preset)
+        # Line cache entries are only shared between runs using the same recognizers
+        tier_suffix = "" if recognizer100 is self.recognizer100 else "/no-tcy"
+
         targetdflist30 = []
         targetdflist50 = []
         targetdflist100 = []
@@ -155,10 +560,10 @@ class NDLOCREngine:
 
         # Level 1: PARSEQ-30 (Fastest, short lines)
         if len(targetdflist30) > 0:
-            resultlines30 = list(self.executor.map(self.recognizer30.read, [t.npimg for t in targetdflist30]))
+            resultlines30 = self._read_lines(recognizer30, [t.npimg for t in targetdflist30], cancel_token, tier="30" + tier_suffix)
             for i, pred_str in enumerate(resultlines30):
                 lineobj = targetdflist30[i]
-                if len(pred_str) >= self.CASCADE_RECOG30_MAX_LEN:
+                if len(pred_str) >= recog30_max_len:
                     targetdflist50.append(lineobj) # Cascade up
                 else:
                     lineobj.pred_str = pred_str
@@ -166,10 +571,10 @@ class NDLOCREngine:
 
         # Level 2: PARSEQ-50 (Medium lines)
         if len(targetdflist50) > 0:
-            resultlines50 = list(self.executor.map(self.recognizer50.read, [t.npimg for t in targetdflist50]))
+            resultlines50 = self._read_lines(recognizer50, [t.npimg for t in targetdflist50], cancel_token, tier="50" + tier_suffix)
             for i, pred_str in enumerate(resultlines50):
                 lineobj = targetdflist50[i]
-                if len(pred_str) >= self.CASCADE_RECOG50_MAX_LEN:
+                if len(pred_str) >= recog50_max_len:
                     targetdflist100.append(lineobj) # Cascade up
                 else:
                     lineobj.pred_str = pred_str
@@ -177,12 +582,12 @@ class NDLOCREngine:
 
         # Level 3: PARSEQ-100 (Highest capacity, long lines)
         if len(targetdflist100) > 0:
-            resultlines100 = list(self.executor.map(self.recognizer100.read, [t.npimg for t in targetdflist100]))
+            resultlines100 = self._read_lines(recognizer100, [t.npimg for t in targetdflist100], cancel_token, tier="100" + tier_suffix)
             for i, pred_str in enumerate(resultlines100):
                 lineobj = targetdflist100[i]
                 lineobj.pred_str = pred_str
                 # Long line splitting logic (v1.2.1)
-                if len(pred_str) >= 98 and lineobj.npimg.shape[0] < lineobj.npimg.shape[1]:
+                if preset.long_line_split and len(pred_str) >= 98 and lineobj.npimg.shape[0] < lineobj.npimg.shape[1]:
                     baseimg = lineobj.npimg
                     # Split into two halves
                     tmplineobj_1 = RecogLine(npimg=baseimg[:, :baseimg.shape[1]//2, :], idx=lineobj.idx, pred_char_cnt=100)
@@ -194,7 +599,7 @@ class NDLOCREngine:
 
         # Level 4: Extremely long lines (Split and recognized by PARSEQ-100)
         if len(targetdflist200) > 0:
-            resultlines200 = list(self.executor.map(self.recognizer100.read, [t.npimg for t in targetdflist200]))
+            resultlines200 = self._read_lines(recognizer100, [t.npimg for t in targetdflist200], cancel_token, tier="100" + tier_suffix)
             for i in range(0, len(targetdflist200) - 1, 2):
                 idx_orig = targetdflist200[i].idx
                 combined_str = resultlines200[i] + resultlines200[i+1]
@@ -205,21 +610,349 @@ class NDLOCREngine:
         targetdflistall = sorted(targetdflistall)
         return [t.pred_str for t in targetdflistall]
 
-    def ocr(self, pil_image: Image.Image, img_name: str = "image.jpg") -> Dict[str, Any]:
+    def ocr(
+        self,
+        pil_image: Image.Image,
+        img_name: str = "image.jpg",
+        cancel_token: Optional[CancellationToken] = None,
+        on_layout: Optional[Callable[["PageLayout"], None]] = None,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> Dict[str, Any]:
         """
         Main OCR pipeline.
         1. Layout Detection
         2. XML Representation
         3. Reading Order
         4. Recognition
+
+        If `cancel_token` is given, it is checked between stages and before each line
+        recognition; OCRCancelledError is raised once it is cancelled or its deadline passes.
+        `on_layout` is called with the PageLayout once lines are known, before recognition
+        (used by the API to re-estimate the cost of in-flight work).
+        `preset` selects the speed/quality options (the default preset if None) and
+        `thresholds` the detection thresholds (the engine's defaults if None).
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        preset = preset or get_preset()
+
+        with self._models_in_use():
+            # 1-3. Detection (reused for a resubmitted page), XML conversion, reading order and line extraction
+            layout = self._prepare_page(pil_image, img_name, preset, thresholds)
+            if on_layout is not None:
+                on_layout(layout)
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            # 4. Recognition (using cascade and thread pool)
+            resultlinesall = self._recognize_pages([layout], cancel_token=cancel_token, preset=preset)[0]
+
+        return self._build_result(layout, resultlinesall)
+
+    def ocr_batch(
+        self,
+        images: List[Tuple[Image.Image, str]],
+        cancel_token: Optional[CancellationToken] = None,
+        on_layout: Optional[Callable[["PageLayout"], None]] = None,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        OCR pipeline for several pages at once.
+        Detection and layout analysis run concurrently on the thread pool (the DEIM session
+        takes a single image per run), then the line images of all pages are routed through
+        a single recognition cascade so each PARSEQ tier sees one large batch.
+        Returns one result dictionary per input image, in order.
+        """
+        preset = preset or get_preset()
+
+        def prepare(item: Tuple[Image.Image, str]) -> PageLayout:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            pil_image, img_name = item
+            return self._prepare_page(pil_image, img_name, preset, thresholds)
+
+        with self._models_in_use():
+            layouts = list(self.executor.map(prepare, images))
+            if on_layout is not None:
+                for layout in layouts:
+                    on_layout(layout)
+
+            resultlines = self._recognize_pages(layouts, cancel_token=cancel_token, preset=preset)
+        return [self._build_result(layout, texts) for layout, texts in zip(layouts, resultlines)]
+
+    def _prepare_page(
+        self,
+        pil_image: Image.Image,
+        img_name: str,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> "PageLayout":
+        """
+        Detection and layout analysis of one page.
+        With the page cache enabled, a page whose perceptual hash matches a recently processed
+        page (under the same preset and thresholds) remembers that page's line texts for
+        incremental recognition. Detection always runs: a perceptual match cannot tell whether
+        a line was added, so only lines with identical pixels reuse their text.
+        """
+        preset = preset or get_preset()
+        thresholds = thresholds or self.default_thresholds
+        img = np.array(pil_image.convert('RGB'))
+        cache_key = thumb = cached = None
+        if self.page_cache is not None:
+            signature, thumb = page_signature(pil_image)
+            cache_key = (preset.name, thresholds.key(), signature)
+            cached = self.page_cache.get(cache_key)
+            if cached is not None and not pages_match(thumb, cached["thumb"]):
+                # Same bucket but a different page
+                cached = None
+
+        detections = self._detect(img, preset.det_max_side, thresholds)
+        layout = self._build_layout(img, detections, img_name)
+        layout.cache_key = cache_key
+        layout.cache_thumb = thumb
+        if cached is not None:
+            layout.cached_lines = cached["lines"]
+        return layout
+
+    def _recognize_pages(
+        self,
+        layouts: List["PageLayout"],
+        cancel_token: Optional[CancellationToken] = None,
+        preset: Optional[OCRPreset] = None,
+    ) -> List[List[str]]:
+        """
+        Recognizes the lines of one or more pages in a single cascade run, so each PARSEQ tier
+        sees one large batch. Returns the line texts of each page in reading order.
+        Lines whose pixels are unchanged from the cached version of their page reuse its text;
+        only new or edited lines are recognized.
+        """
+        results: List[List[str]] = []
+        line_hashes: List[Optional[List[bytes]]] = []
+        pending: List[Tuple[int, int]] = []
+        alllineobj: List[RecogLine] = []
+        for page_no, layout in enumerate(layouts):
+            texts = [""] * len(layout.recog_lines)
+            hashes = [region_hash(lineobj.npimg) for lineobj in layout.recog_lines] if layout.cache_key is not None else None
+            for line_no, lineobj in enumerate(layout.recog_lines):
+                if layout.cached_lines is not None and hashes[line_no] in layout.cached_lines:
+                    texts[line_no] = layout.cached_lines[hashes[line_no]]
+                    continue
+                # Batch-wide index so the cascade can restore the original order
+                alllineobj.append(RecogLine(lineobj.npimg, len(alllineobj), lineobj.pred_char_cnt))
+                pending.append((page_no, line_no))
+            results.append(texts)
+            line_hashes.append(hashes)
+
+        resultlinesall = self._process_cascade(alllineobj, is_cascade=True, cancel_token=cancel_token, preset=preset) if alllineobj else []
+        for (page_no, line_no), pred_str in zip(pending, resultlinesall):
+            results[page_no][line_no] = pred_str
+
+        if self.page_cache is not None:
+            with self._stats_lock:
+                self._reused_lines += sum(len(texts) for texts in results) - len(pending)
+                self._recognized_lines += len(pending)
+            for layout, texts, hashes in zip(layouts, results, line_hashes):
+                self.page_cache.put(layout.cache_key, {
+                    "thumb": layout.cache_thumb,
+                    "lines": dict(zip(hashes, texts)),
+                })
+        return results
+
+    def page_stats(self) -> Dict[str, int]:
+        """Counts of pages short-circuited as blank, of pages without detections and of lines filtered as noise."""
+        with self._stats_lock:
+            return {"blank_pages": self._blank_pages, "empty_pages": self._empty_pages, "noise_lines": self._noise_lines}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit rates of the engine's caches (empty when caching is disabled)."""
+        stats: Dict[str, Any] = {}
+        if self.page_cache is not None:
+            stats["pages"] = self.page_cache.stats()
+            stats["pages"]["reused_lines"] = self._reused_lines
+            stats["pages"]["recognized_lines"] = self._recognized_lines
+        if self.line_cache is not None:
+            stats["lines"] = self.line_cache.stats()
+        if self.detection_cache is not None:
+            stats["detections"] = self.detection_cache.stats()
+        return stats
+
+    def detect_lines(
+        self,
+        pil_image: Image.Image,
+        img_name: str = "image.jpg",
+        cancel_token: Optional[CancellationToken] = None,
+        on_layout: Optional[Callable[["PageLayout"], None]] = None,
+        preset: Optional[OCRPreset] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> Dict[str, Any]:
+        """
+        Detection-only pipeline: layout detection and reading order, without recognition.
+        Returns the same structure as ocr() with empty line texts. Each line keeps its
+        `pred_char_count` so the boxes can later be passed to recognize_lines().
         """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        preset = preset or get_preset()
+        img = np.array(pil_image.convert('RGB'))
+        with self._models_in_use():
+            detections = self._detect(img, preset.det_max_side, thresholds)
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            layout = self._build_layout(img, detections, img_name)
+            if on_layout is not None:
+                on_layout(layout)
+        return self._build_result(layout, [""] * len(layout.lines))
+
+    def recognize_lines(
+        self,
+        pil_image: Image.Image,
+        boxes: List[Dict[str, Any]],
+        img_name: str = "image.jpg",
+        cancel_token: Optional[CancellationToken] = None,
+        preset: Optional[OCRPreset] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recognition-only pipeline for line boxes from a previous run (e.g. detect_lines()).
+        Each box is a dict with "box" ([xmin, ymin, xmax, ymax]) and optionally
+        "pred_char_count", "confidence" and "class_index". Boxes are clipped to the image and
+        recognized in the given order through the cascade; detection and reading order are skipped.
+        Lines without a pred_char_count go straight to PARSEQ-100.
+        """
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         img = np.array(pil_image.convert('RGB'))
         img_h, img_w = img.shape[:2]
-        
-        # 1. Detection
-        detections = self.detector.detect(img)
+
+        recog_lines = []
+        clipped = []
+        tatelinecnt = 0
+        for idx, entry in enumerate(boxes):
+            xmin, ymin, xmax, ymax = (int(v) for v in entry["box"])
+            xmin, xmax = max(0, min(xmin, img_w)), max(0, min(xmax, img_w))
+            ymin, ymax = max(0, min(ymin, img_h)), max(0, min(ymax, img_h))
+            clipped.append((xmin, ymin, xmax, ymax))
+            if xmax <= xmin or ymax <= ymin:
+                # Degenerate box: nothing to recognize
+                continue
+            if ymax - ymin > xmax - xmin:
+                tatelinecnt += 1
+            pred_char_cnt = entry.get("pred_char_count")
+            recog_lines.append(RecogLine(img[ymin:ymax, xmin:xmax, :], idx, 100.0 if pred_char_cnt is None else float(pred_char_cnt)))
+
+        with self._models_in_use():
+            recognized = self._process_cascade(recog_lines, is_cascade=True, cancel_token=cancel_token, preset=preset)
+        texts = [""] * len(boxes)
+        for lineobj, pred_str in zip(recog_lines, recognized):
+            texts[lineobj.idx] = pred_str
+
+        # Same verticality rule as full OCR
+        if recog_lines and tatelinecnt / len(recog_lines) > 0.5:
+            full_text = "\n".join(texts[::-1])
+        else:
+            full_text = "\n".join(texts)
+
+        resjsonarray = []
+        for idx, (entry, (xmin, ymin, xmax, ymax)) in enumerate(zip(boxes, clipped)):
+            resjsonarray.append({
+                "boundingBox": [[xmin, ymin], [xmin, ymax], [xmax, ymax], [xmax, ymin]],
+                "id": idx,
+                "text": texts[idx],
+                "confidence": entry.get("confidence") or 0.0,
+                "class_index": entry.get("class_index"),
+                "pred_char_count": entry.get("pred_char_count"),
+            })
+
+        return {
+            "text": full_text,
+            "lines": resjsonarray,
+            "img_info": {
+                "width": img_w,
+                "height": img_h,
+                "name": img_name
+            }
+        }
+
+    def estimate_recognition_cost(self, layout: "PageLayout", preset: Optional[OCRPreset] = None) -> float:
+        """
+        Estimates the recognition work of a page as a weighted line count.
+        Lines routed to smaller PARSEQ tiers are cheaper; very elongated lines are counted
+        twice since they usually go through the long-line split round.
+        """
+        preset = preset or get_preset()
+        cost = 0.0
+        for lineobj in layout.recog_lines:
+            if lineobj.pred_char_cnt == self.CASCADE_PRED_CHAR_SMALL and preset.cascade:
+                cost += self.LINE_COST_SMALL
+            elif lineobj.pred_char_cnt == self.CASCADE_PRED_CHAR_MEDIUM and preset.cascade:
+                cost += self.LINE_COST_MEDIUM
+            else:
+                cost += self.LINE_COST_LARGE
+            line_h, line_w = lineobj.npimg.shape[:2]
+            if preset.long_line_split and min(line_h, line_w) > 0 and max(line_h, line_w) / min(line_h, line_w) > self.LONG_LINE_ASPECT:
+                cost += self.LINE_COST_LARGE
+        return cost
+
+    def _detect(
+        self,
+        img: np.ndarray,
+        max_side: Optional[int] = None,
+        thresholds: Optional[DetectionThresholds] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs layout detection on an RGB numpy image and applies the detection thresholds
+        and NMS (the engine's defaults if `thresholds` is None).
+        With the detection cache enabled, the raw detector output of an identical image is reused.
+        Blank pages (see `blank_ink_ratio`) yield no detections without running the detector.
+        """
+        thresholds = thresholds or self.default_thresholds
+        if self.blank_ink_ratio > 0 and ink_ratio(img) < self.blank_ink_ratio:
+            with self._stats_lock:
+                self._blank_pages += 1
+            return []
+        if self.detection_cache is None:
+            raw = self._detect_raw(img, max_side)
+        else:
+            key = (region_hash(img), max_side)
+            raw = self.detection_cache.get(key)
+            if raw is None:
+                raw = self._detect_raw(img, max_side)
+                self.detection_cache.put(key, raw)
+        detections = filter_detections(raw, thresholds)
+        if not detections:
+            with self._stats_lock:
+                self._empty_pages += 1
+        return detections
+
+    def _detect_raw(self, img: np.ndarray, max_side: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Runs the detector. With `max_side`, a larger page is downscaled to that long side
+        first and the boxes are mapped back to the original image.
+        """
+        img_h, img_w = img.shape[:2]
+        if max_side is None or max(img_h, img_w) <= max_side:
+            return self.detector.detect(img)
+        scale = max_side / max(img_h, img_w)
+        size = (max(1, round(img_w * scale)), max(1, round(img_h * scale)))
+        small = np.asarray(Image.fromarray(img).resize(size, Image.BILINEAR, reducing_gap=2.0))
+        detections = self.detector.detect(small)
+        for det in detections:
+            xmin, ymin, xmax, ymax = det["box"]
+            det["box"] = [
+                min(img_w, int(round(xmin / scale))), min(img_h, int(round(ymin / scale))),
+                min(img_w, int(round(xmax / scale))), min(img_h, int(round(ymax / scale))),
+            ]
+        return detections
+
+    def _build_layout(self, img: np.ndarray, detections: List[Dict[str, Any]], img_name: str) -> "PageLayout":
+        """
+        Converts detections into the NDL-style XML tree, runs reading order analysis
+        and extracts the line images to recognize, in logical reading order.
+        """
+        img_h, img_w = img.shape[:2]
         classeslist = list(self.detector.classes.values())
-        
+
         # Prepare data for NDL-style XML conversion
         resultobj = [dict(), dict()]
         resultobj[0][0] = list()
@@ -237,18 +970,23 @@ class NDLOCREngine:
         # Security: Sanitize img_name to prevent XML injection
         safe_img_name = "".join(c for c in img_name if c.isalnum() or c in "._- ")
 
-        # 2. Convert Detections to XML string and then parse with defusedxml (Security)
+        # Convert Detections to XML string and then parse with defusedxml (Security)
         xmlstr = convert_to_xml_string3(img_w, img_h, safe_img_name, classeslist, resultobj)
         xmlstr = "<OCRDATASET>" + xmlstr + "</OCRDATASET>"
         root = ET.fromstring(xmlstr)
 
-        # 3. Reading Order Analysis (modifies XML tree in-place)
-        eval_xml(root, logger=None)
+        # Reading Order Analysis (modifies XML tree in-place); nothing to order on an empty page
+        if detections:
+            eval_xml(root, logger=None)
         
+        lines = root.findall(".//LINE")
+        # Fallback: if XY-Cut fails to find lines but we have detections
+        if len(lines) == 0 and len(detections) > 0:
+            lines = self._detection_lines(root.find("PAGE"), detections, classeslist)
+        lines, noise_lines = self._filter_lines(root, lines)
+
         # Extract line images based on logical reading order from XML
         alllineobj = []
-        lines = root.findall(".//LINE")
-        
         tatelinecnt = 0
         alllinecnt = 0
         
@@ -269,73 +1007,134 @@ class NDLOCREngine:
             lineimg = img[ymin:ymin+line_h, xmin:xmin+line_w, :]
             alllineobj.append(RecogLine(lineimg, idx, pred_char_cnt))
 
-        # Fallback: if XY-Cut fails to find lines but we have detections
-        if len(alllineobj) == 0 and len(detections) > 0:
-            page = root.find("PAGE")
-            for idx, det in enumerate(detections):
-                xmin, ymin, xmax, ymax = det["box"]
-                line_w = int(xmax - xmin)
-                line_h = int(ymax - ymin)
-                if line_w > 0 and line_h > 0:
-                    line_elem = ET.SubElement(page, "LINE")
-                    c_idx = int(det["class_index"])
-                    type_name = classeslist[c_idx] if c_idx < len(classeslist) else "本文"
-                    line_elem.set("TYPE", type_name)
-                    line_elem.set("X", str(int(xmin)))
-                    line_elem.set("Y", str(int(ymin)))
-                    line_elem.set("WIDTH", str(line_w))
-                    line_elem.set("HEIGHT", str(line_h))
-                    line_elem.set("CONF", f"{det['confidence']:0.3f}")
-                    pred_char_cnt = det.get("pred_char_count", 100.0)
-                    line_elem.set("PRED_CHAR_CNT", f"{pred_char_cnt:0.3f}")
-                    if line_h > line_w:
-                        tatelinecnt += 1
-                    alllinecnt += 1
-                    lineimg = img[int(ymin):int(ymax), int(xmin):int(xmax), :]
-                    alllineobj.append(RecogLine(lineimg, idx, pred_char_cnt))
-            lines = root.findall(".//LINE")
-
-        # 4. Recognition (using cascade and thread pool)
-        resultlinesall = self._process_cascade(alllineobj, is_cascade=True)
-        
+        return PageLayout(
+            img_w=img_w,
+            img_h=img_h,
+            img_name=img_name,
+            classeslist=classeslist,
+            root=root,
+            lines=lines,
+            recog_lines=alllineobj,
+            tatelinecnt=tatelinecnt,
+            alllinecnt=alllinecnt,
+            detections=detections,
+            noise_lines=noise_lines,
+        )
+
+    def _detection_lines(self, page: Any, detections: List[Dict[str, Any]], classeslist: List[str]) -> List[Any]:
+        """Adds a LINE element to `page` for every raw detection with a non-empty box and returns them."""
+        lines = []
+        for det in detections:
+            xmin, ymin, xmax, ymax = det["box"]
+            line_w = int(xmax - xmin)
+            line_h = int(ymax - ymin)
+            if line_w > 0 and line_h > 0:
+                line_elem = ET.SubElement(page, "LINE")
+                c_idx = int(det["class_index"])
+                type_name = classeslist[c_idx] if c_idx < len(classeslist) else "本文"
+                line_elem.set("TYPE", type_name)
+                line_elem.set("X", str(int(xmin)))
+                line_elem.set("Y", str(int(ymin)))
+                line_elem.set("WIDTH", str(line_w))
+                line_elem.set("HEIGHT", str(line_h))
+                line_elem.set("CONF", f"{det['confidence']:0.3f}")
+                pred_char_cnt = det.get("pred_char_count", 100.0)
+                line_elem.set("PRED_CHAR_CNT", f"{pred_char_cnt:0.3f}")
+                lines.append(line_elem)
+        return lines
+
+    def _filter_lines(self, root: Any, lines: List[Any]) -> Tuple[List[Any], List[Any]]:
+        """
+        Applies the line filter to LINE elements. Returns the lines to recognize, in their
+        original order, and the filtered lines to report (empty unless `report_filtered_lines`).
+        Filtered lines that are not reported are removed from the XML tree; reported ones stay,
+        marked FILTERED="1".
+        """
+        if not lines or not self.line_filter.enabled:
+            return lines, []
+        boxes = np.zeros((len(lines), 4))
+        scores = np.ones(len(lines))
+        # Line types as class ids, so overlap is only checked between lines of the same type
+        _, classes = np.unique([lineobj.get("TYPE", "") for lineobj in lines], return_inverse=True)
+        for i, lineobj in enumerate(lines):
+            xmin, ymin = int(lineobj.get("X")), int(lineobj.get("Y"))
+            boxes[i] = (xmin, ymin, xmin + int(lineobj.get("WIDTH")), ymin + int(lineobj.get("HEIGHT")))
+            try:
+                scores[i] = float(lineobj.get("CONF"))
+            except (ValueError, TypeError):
+                pass  # No confidence: never filtered on it
+        keep = line_filter_mask(boxes, scores, self.line_filter, classes)
+        noise = [lineobj for lineobj, kept in zip(lines, keep) if not kept]
+        if not noise:
+            return lines, []
+        with self._stats_lock:
+            self._noise_lines += len(noise)
+        if self.report_filtered_lines:
+            # Kept in the tree for the JSON result only; layout formats skip them
+            for lineobj in noise:
+                lineobj.set("FILTERED", "1")
+        else:
+            parents = {child: parent for parent in root.iter() for child in parent}
+            for lineobj in noise:
+                parents[lineobj].remove(lineobj)
+            noise = []
+        return [lineobj for lineobj, kept in zip(lines, keep) if kept], noise
+
+    def _build_result(self, layout: "PageLayout", resultlinesall: List[str]) -> Dict[str, Any]:
+        """Writes recognized strings back into the XML tree and builds the result dictionary."""
         # v1.2.1 Verticality check (Reverse text order if majority vertical)
-        if alllinecnt > 0 and tatelinecnt / alllinecnt > 0.5:
+        if layout.is_vertical:
             full_text = "\n".join(resultlinesall[::-1])
         else:
             full_text = "\n".join(resultlinesall)
         
         # Format results into final JSON structure
         resjsonarray = []
-        for idx, lineobj in enumerate(lines):
+        for idx, lineobj in enumerate(layout.lines):
             lineobj.set("STRING", resultlinesall[idx])
-            xmin = int(lineobj.get("X"))
-            ymin = int(lineobj.get("Y"))
-            line_w = int(lineobj.get("WIDTH"))
-            line_h = int(lineobj.get("HEIGHT"))
-            try:
-                conf = float(lineobj.get("CONF"))
-            except (ValueError, TypeError):
-                conf = 0.0
-                
-            # XML TYPE -> c_idx (v1.2.1 improvement)
-            type_str = lineobj.get("TYPE", "")
-            c_idx = classeslist.index(type_str) if type_str in classeslist else 1
-            
-            jsonobj = {
-                "boundingBox": [[xmin, ymin], [xmin, ymin+line_h], [xmin+line_w, ymin+line_h], [xmin+line_w, ymin]],
-                "id": idx,
-                "text": resultlinesall[idx],
-                "confidence": conf,
-                "class_index": c_idx
-            }
+            resjsonarray.append(self._line_result(lineobj, idx, resultlinesall[idx], layout.classeslist))
+        # Lines filtered as noise follow, without text
+        for idx, lineobj in enumerate(layout.noise_lines, start=len(layout.lines)):
+            jsonobj = self._line_result(lineobj, idx, "", layout.classeslist)
+            jsonobj["filtered"] = True
             resjsonarray.append(jsonobj)
             
         return {
             "text": full_text,
             "lines": resjsonarray,
             "img_info": {
-                "width": img_w,
-                "height": img_h,
-                "name": img_name
+                "width": layout.img_w,
+                "height": layout.img_h,
+                "name": layout.img_name
             }
         }
+
+    @staticmethod
+    def _line_result(lineobj: Any, idx: int, text: str, classeslist: List[str]) -> Dict[str, Any]:
+        """Builds the result dictionary of one LINE element."""
+        xmin = int(lineobj.get("X"))
+        ymin = int(lineobj.get("Y"))
+        line_w = int(lineobj.get("WIDTH"))
+        line_h = int(lineobj.get("HEIGHT"))
+        try:
+            conf = float(lineobj.get("CONF"))
+        except (ValueError, TypeError):
+            conf = 0.0
+            
+        try:
+            pred_char_cnt = float(lineobj.get("PRED_CHAR_CNT"))
+        except (ValueError, TypeError):
+            pred_char_cnt = None
+
+        # XML TYPE -> c_idx (v1.2.1 improvement)
+        type_str = lineobj.get("TYPE", "")
+        c_idx = classeslist.index(type_str) if type_str in classeslist else 1
+        
+        return {
+            "boundingBox": [[xmin, ymin], [xmin, ymin+line_h], [xmin+line_w, ymin+line_h], [xmin+line_w, ymin]],
+            "id": idx,
+            "text": text,
+            "confidence": conf,
+            "class_index": c_idx,
+            "pred_char_count": pred_char_cnt
+        }
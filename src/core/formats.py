@@ -0,0 +1,124 @@
+"""
+Streaming writers for layout-aware output formats (ALTO, PAGE XML, hOCR).
+
+Writers read the NDL-style XML tree kept in each PageLayout after recognition
+(OCRDATASET/PAGE with TEXTBLOCK/LINE elements in reading order and STRING set on
+every LINE) and yield the document in small string chunks, so large multi-page
+outputs can be streamed without building a second tree or going through JSON.
+"""
+from datetime import datetime, timezone
+from typing import Any, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from src.core.engine import PageLayout
+
+ALTO_NAMESPACE = "http://www.loc.gov/standards/alto/ns-v4#"
+PAGE_XML_NAMESPACE = "http://schema.primaresearch.org/PAGE/gts/pagecontent/2019-07-15"
+CREATOR = "ndlocr-lite"
+
+Box = Tuple[int, int, int, int]
+
+
+def _line_box(line: Any) -> Box:
+    x, y = int(line.get("X")), int(line.get("Y"))
+    return x, y, x + int(line.get("WIDTH")), y + int(line.get("HEIGHT"))
+
+
+def _union(boxes: List[Box]) -> Box:
+    return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+
+def iter_blocks(layout: PageLayout) -> Iterator[Tuple[Box, List[Any]]]:
+    """
+    Yields (bounding box, LINE elements) for each text block of a page in reading order.
+    A LINE directly under PAGE forms a block of its own. Lines filtered as noise are skipped.
+    """
+    for page in layout.root.iter("PAGE"):
+        for child in page:
+            lines = [child] if child.tag == "LINE" else child.findall(".//LINE")
+            lines = [line for line in lines if line.get("FILTERED") is None]
+            if lines:
+                yield _union([_line_box(line) for line in lines]), lines
+
+
+def _text(line: Any) -> str:
+    return line.get("STRING") or ""
+
+
+def iter_alto(layouts: List[PageLayout]) -> Iterator[str]:
+    """ALTO v4, one Page per layout."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<alto xmlns="{ALTO_NAMESPACE}">\n'
+    yield '<Description><MeasurementUnit>pixel</MeasurementUnit>'
+    if len(layouts) == 1:
+        yield f'<sourceImageInformation><fileName>{escape(layouts[0].img_name)}</fileName></sourceImageInformation>'
+    yield f'<OCRProcessing ID="ocr"><ocrProcessingStep><processingSoftware><softwareName>{CREATOR}</softwareName></processingSoftware></ocrProcessingStep></OCRProcessing>'
+    yield '</Description>\n<Layout>\n'
+    for page_no, layout in enumerate(layouts, start=1):
+        yield (f'<Page ID="p{page_no}" PHYSICAL_IMG_NR="{page_no}" WIDTH="{layout.img_w}" HEIGHT="{layout.img_h}">'
+               f'<PrintSpace HPOS="0" VPOS="0" WIDTH="{layout.img_w}" HEIGHT="{layout.img_h}">\n')
+        for block_no, (box, lines) in enumerate(iter_blocks(layout), start=1):
+            block_id = f"p{page_no}_b{block_no}"
+            yield f'<TextBlock ID="{block_id}" {_alto_box(box)}>\n'
+            for line_no, line in enumerate(lines, start=1):
+                line_box = _alto_box(_line_box(line))
+                yield (f'<TextLine ID="{block_id}_l{line_no}" {line_box}>'
+                       f'<String CONTENT={quoteattr(_text(line))} {line_box}/></TextLine>\n')
+            yield '</TextBlock>\n'
+        yield '</PrintSpace></Page>\n'
+    yield '</Layout>\n</alto>\n'
+
+
+def _alto_box(box: Box) -> str:
+    return f'HPOS="{box[0]}" VPOS="{box[1]}" WIDTH="{box[2] - box[0]}" HEIGHT="{box[3] - box[1]}"'
+
+
+def iter_page_xml(layout: PageLayout) -> Iterator[str]:
+    """PAGE XML (2019-07-15 schema) for a single page, with an explicit reading order."""
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    blocks = list(iter_blocks(layout))
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<PcGts xmlns="{PAGE_XML_NAMESPACE}">\n'
+    yield f'<Metadata><Creator>{CREATOR}</Creator><Created>{now}</Created><LastChange>{now}</LastChange></Metadata>\n'
+    yield f'<Page imageFilename={quoteattr(layout.img_name)} imageWidth="{layout.img_w}" imageHeight="{layout.img_h}">\n'
+    if blocks:
+        yield '<ReadingOrder><OrderedGroup id="ro">'
+        for block_no in range(1, len(blocks) + 1):
+            yield f'<RegionRefIndexed index="{block_no - 1}" regionRef="r{block_no}"/>'
+        yield '</OrderedGroup></ReadingOrder>\n'
+    for block_no, (box, lines) in enumerate(blocks, start=1):
+        yield f'<TextRegion id="r{block_no}"><Coords points="{_points(box)}"/>\n'
+        for line_no, line in enumerate(lines, start=1):
+            yield (f'<TextLine id="r{block_no}l{line_no}"><Coords points="{_points(_line_box(line))}"/>'
+                   f'<TextEquiv><Unicode>{escape(_text(line))}</Unicode></TextEquiv></TextLine>\n')
+        yield '</TextRegion>\n'
+    yield '</Page>\n</PcGts>\n'
+
+
+def _points(box: Box) -> str:
+    x0, y0, x1, y1 = box
+    return f"{x0},{y0} {x1},{y0} {x1},{y1} {x0},{y1}"
+
+
+def iter_hocr(layouts: List[PageLayout]) -> Iterator[str]:
+    """hOCR 1.2, one ocr_page per layout."""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<!DOCTYPE html>\n<html xmlns="http://www.w3.org/1999/xhtml">\n<head>\n<title></title>\n'
+    yield '<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>\n'
+    yield f'<meta name="ocr-system" content="{CREATOR}"/>\n'
+    yield '<meta name="ocr-capabilities" content="ocr_page ocr_carea ocr_line"/>\n</head>\n<body>\n'
+    for page_no, layout in enumerate(layouts, start=1):
+        title = f'image "{layout.img_name}"; bbox 0 0 {layout.img_w} {layout.img_h}; ppageno {page_no - 1}'
+        yield f'<div class="ocr_page" id="page_{page_no}" title={quoteattr(title)}>\n'
+        for block_no, (box, lines) in enumerate(iter_blocks(layout), start=1):
+            yield f'<div class="ocr_carea" id="block_{page_no}_{block_no}" title="{_hocr_bbox(box)}">\n'
+            for line_no, line in enumerate(lines, start=1):
+                yield (f'<span class="ocr_line" id="line_{page_no}_{block_no}_{line_no}" title="{_hocr_bbox(_line_box(line))}">'
+                       f'{escape(_text(line))}</span>\n')
+            yield '</div>\n'
+        yield '</div>\n'
+    yield '</body>\n</html>\n'
+
+
+def _hocr_bbox(box: Box) -> str:
+    return f"bbox {box[0]} {box[1]} {box[2]} {box[3]}"
@@ -0,0 +1,172 @@
+"""
+Searchable PDF writer: each page image with an invisible (render mode 3) text layer.
+
+The document is written incrementally. Each page's image, content stream and page object
+are emitted as soon as the page is drawn; only the object offsets are kept until the page
+tree, cross-reference table and trailer are written at the end, so memory stays bounded
+to one page whatever the page count.
+
+Text is placed from the LINE elements of each PageLayout (after recognition), scaled
+to fill the line box so that selection and search highlight the right region.
+All lines use the UniJIS-UCS2-H CMap; vertical lines are drawn with the text matrix rotated
+a quarter turn clockwise, so the text runs down the line. The HeiseiKakuGo-W5 CID font is
+referenced, not embedded, since its glyphs are never drawn; every glyph is declared 1 em
+wide, and the text scaling assumes the same width.
+
+Without the font's outlines, pdfium (used by Chrome and pypdfium2) sees each glyph as a point
+and skips text runs without horizontal extent. Vertical CMaps and an exactly vertical
+baseline therefore make vertical lines unextractable, so their baseline is slanted by
+VERTICAL_SLANT (a fraction of the line height, well under a pixel on a normal line).
+"""
+import io
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from src.core.engine import PageLayout
+
+PDF_FONT = "HeiseiKakuGo-W5"
+# Page images that are not already JPEG are re-encoded at this quality
+PDF_JPEG_QUALITY = 85
+# Fraction of the line height used as font size (leaves room for descenders)
+FONT_HEIGHT_RATIO = 0.85
+# Horizontal drift of the baseline of vertical lines per unit of line height (see above)
+VERTICAL_SLANT = 0.01
+
+# An encoded image file (embedded as-is when JPEG), a decoded page, or a callable decoding
+# the page when it is written (so decoded pages need not be kept until then)
+PageImage = Union[bytes, Image.Image, Callable[[], Image.Image]]
+
+# Object numbers of the document-level objects; pages are numbered after them
+CATALOG, PAGES, FONT, CID_FONT, FONT_DESCRIPTOR, INFO = range(1, 7)
+
+
+def _num(value: float) -> str:
+    return f"{value:.4f}".rstrip("0").rstrip(".") or "0"
+
+
+class _PDFWriter:
+    """Serializes numbered objects in order and records their byte offsets for the xref table."""
+    def __init__(self):
+        self.offset = 0
+        self.offsets: Dict[int, int] = {}
+        self.next_number = INFO + 1
+
+    def reserve(self) -> int:
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def write(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def obj(self, number: int, body: str, stream: Optional[bytes] = None) -> bytes:
+        self.offsets[number] = self.offset
+        data = f"{number} 0 obj\n{body}\n".encode("ascii")
+        if stream is not None:
+            data += b"stream\n" + stream + b"\nendstream\n"
+        return self.write(data + b"endobj\n")
+
+    def trailer(self) -> bytes:
+        size = max(self.offsets) + 1
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for number in range(1, size):
+            if number in self.offsets:
+                xref.append(f"{self.offsets[number]:010d} 00000 n \n")
+            else:
+                xref.append("0000000000 65535 f \n")
+        xref.append(f"trailer\n<< /Size {size} /Root {CATALOG} 0 R /Info {INFO} 0 R >>\nstartxref\n{self.offset}\n%%EOF\n")
+        return self.write("".join(xref).encode("ascii"))
+
+
+def _document_objects(writer: _PDFWriter) -> bytes:
+    cid_system_info = "<< /Registry (Adobe) /Ordering (Japan1) /Supplement 2 >>"
+    return b"".join([
+        writer.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"),
+        writer.obj(CATALOG, f"<< /Type /Catalog /Pages {PAGES} 0 R >>"),
+        writer.obj(FONT, f"<< /Type /Font /Subtype /Type0 /BaseFont /{PDF_FONT}-UniJIS-UCS2-H "
+                         f"/Encoding /UniJIS-UCS2-H /DescendantFonts [ {CID_FONT} 0 R ] >>"),
+        writer.obj(CID_FONT, f"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /{PDF_FONT} "
+                             f"/CIDSystemInfo {cid_system_info} /FontDescriptor {FONT_DESCRIPTOR} 0 R /DW 1000 >>"),
+        writer.obj(FONT_DESCRIPTOR, f"<< /Type /FontDescriptor /FontName /{PDF_FONT} /Flags 4 "
+                                    "/FontBBox [ -92 -250 1010 922 ] /ItalicAngle 0 /Ascent 752 /Descent -221 "
+                                    "/CapHeight 737 /StemV 114 >>"),
+    ])
+
+
+def _jpeg_image(image: PageImage) -> Tuple[bytes, Tuple[int, int], str, Optional[Tuple[float, float]]]:
+    """Returns the JPEG data of the page image, its size, PDF colour space and resolution (dpi) if recorded."""
+    if callable(image):
+        image = image()
+    pil = Image.open(io.BytesIO(image)) if isinstance(image, bytes) else image
+    dpi = pil.info.get("dpi")
+    if isinstance(image, bytes) and pil.format == "JPEG" and pil.mode in ("L", "RGB"):
+        # Embedded without decoding
+        data = image
+    else:
+        pil = pil.convert("L" if pil.mode in ("1", "L") else "RGB")
+        buf = io.BytesIO()
+        pil.save(buf, format="JPEG", quality=PDF_JPEG_QUALITY)
+        data = buf.getvalue()
+    return data, pil.size, "DeviceGray" if pil.mode == "L" else "DeviceRGB", dpi
+
+
+def _text_layer(layout: PageLayout, scale: float) -> List[str]:
+    """Content stream operators drawing each recognized line as invisible text."""
+    page_h = layout.img_h * scale
+    ops = []
+    for line in layout.root.iter("LINE"):
+        text = line.get("STRING")
+        if not text:
+            continue
+        x, y = int(line.get("X")) * scale, int(line.get("Y")) * scale
+        w, h = int(line.get("WIDTH")) * scale, int(line.get("HEIGHT")) * scale
+        if w <= 0 or h <= 0:
+            continue
+        codes = text.encode("utf-16-be")
+        count = len(codes) // 2
+        if h > w:
+            # Vertical: rotated clockwise, the baseline runs down from the top of the box and the
+            # glyphs extend to its right, so the right edge of the box plays the part of the top
+            size = w * FONT_HEIGHT_RATIO
+            ops.append(f"BT 3 Tr /F1 {_num(size)} Tf {_num(100.0 * h / (size * count))} Tz "
+                       f"{_num(VERTICAL_SLANT)} -1 1 0 {_num(x + w - size)} {_num(page_h - y)} Tm <{codes.hex()}> Tj ET")
+        else:
+            size = h * FONT_HEIGHT_RATIO
+            ops.append(f"BT 3 Tr /F1 {_num(size)} Tf {_num(100.0 * w / (size * count))} Tz "
+                       f"1 0 0 1 {_num(x)} {_num(page_h - y - size)} Tm <{codes.hex()}> Tj ET")
+    return ops
+
+
+def iter_searchable_pdf(pages: Iterable[Tuple[PageImage, PageLayout]]) -> Iterator[bytes]:
+    """
+    Writes a searchable PDF, one page per (image, layout) pair, yielding each page as soon
+    as it is written. Page size follows the image resolution when recorded (72 dpi otherwise).
+    """
+    writer = _PDFWriter()
+    yield _document_objects(writer)
+    kids = []
+    for image, layout in pages:
+        data, (img_w, img_h), colorspace, dpi = _jpeg_image(image)
+        scale = 72.0 / dpi[0] if dpi and dpi[0] else 1.0
+        width, height = layout.img_w * scale, layout.img_h * scale
+        content = "\n".join([f"q {_num(width)} 0 0 {_num(height)} 0 0 cm /Im0 Do Q"] + _text_layer(layout, scale))
+        content = zlib.compress(content.encode("ascii"))
+        image_no, content_no, page_no = writer.reserve(), writer.reserve(), writer.reserve()
+        kids.append(page_no)
+        yield b"".join([
+            writer.obj(image_no, f"<< /Type /XObject /Subtype /Image /Width {img_w} /Height {img_h} "
+                                 f"/ColorSpace /{colorspace} /BitsPerComponent 8 /Filter [ /DCTDecode ] /Length {len(data)} >>", data),
+            writer.obj(content_no, f"<< /Filter [ /FlateDecode ] /Length {len(content)} >>", content),
+            writer.obj(page_no, f"<< /Type /Page /Parent {PAGES} 0 R /MediaBox [ 0 0 {_num(width)} {_num(height)} ] "
+                                f"/Resources << /XObject << /Im0 {image_no} 0 R >> /Font << /F1 {FONT} 0 R >> >> "
+                                f"/Contents {content_no} 0 R >>"),
+        ])
+        del data, content
+    yield b"".join([
+        writer.obj(PAGES, f"<< /Type /Pages /Kids [ {' '.join(f'{kid} 0 R' for kid in kids)} ] /Count {len(kids)} >>"),
+        writer.obj(INFO, "<< /Producer (ndlocr-lite) /Creator (ndlocr-lite) >>"),
+        writer.trailer(),
+    ])
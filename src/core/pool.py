@@ -0,0 +1,112 @@
+import contextvars
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Priority of the work submitted from the current context (lower runs first), and wrappers applied
+# to each task submitted from it (e.g. a profiler tracking the threads working for a request).
+# Tasks run in a copy of the submitter's context, so work they submit in turn keeps both.
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("task_priority", default=0)
+_wrappers: contextvars.ContextVar[Tuple[Callable[[Callable], Callable], ...]] = contextvars.ContextVar("task_wrappers", default=())
+
+
+@contextmanager
+def task_priority(priority: int):
+    """Runs the block with `priority` for the pool tasks it submits (0 is the highest)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def task_wrapper(wrap: Callable[[Callable], Callable]):
+    """Runs the block with `wrap` applied to every pool task it submits."""
+    token = _wrappers.set(_wrappers.get() + (wrap,))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
+
+
+class PriorityThreadPool:
+    """
+    Fixed-size thread pool drained in priority order.
+
+    A drop-in for the ThreadPoolExecutor methods the engine uses (submit, map, shutdown).
+    Each task takes the priority of the context submitting it (see task_priority), and idle
+    workers always take the highest-priority task queued, first in first out within a priority.
+    Lines of an interactive page therefore only wait for the lines already being recognized,
+    not for the whole backlog of a batch chunk.
+    """
+    def __init__(self, max_workers: int, thread_name_prefix: str = "pool"):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix
+        self._queue: "queue.PriorityQueue[Tuple[float, int, Optional[tuple]]]" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queues fn(*args, **kwargs) at the current context's priority and returns its Future."""
+        for wrap in _wrappers.get():
+            fn = wrap(fn)
+        future: Future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queue.put((_priority.get(), next(self._sequence), (fn, args, kwargs, future, contextvars.copy_context())))
+            if len(self._threads) < self._max_workers:
+                thread = threading.Thread(
+                    target=self._work, name=f"{self._thread_name_prefix}_{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def map(self, fn: Callable, *iterables: Iterable) -> Iterator[Any]:
+        """Like Executor.map: results in order; tasks not yet started are cancelled if iteration stops early."""
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+
+        def results():
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        return results()
+
+    def _work(self):
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                # Passed on so every worker sees it
+                self._queue.put((float("inf"), next(self._sequence), None))
+                return
+            fn, args, kwargs, future, context = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(context.run(fn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait: bool = True):
+        """Stops accepting work; workers exit once the tasks already queued have run."""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._queue.put((float("inf"), next(self._sequence), None))
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,58 @@
+"""
+Speed/quality presets of the OCR pipeline.
+
+A preset bundles the knobs that trade accuracy for latency without reloading models:
+- det_max_side: long side the page is downscaled to before layout detection (None = full
+  resolution). Boxes are mapped back to the original image, so line crops keep full resolution.
+- cascade: route short lines to PARSEQ-30/50 by the detector's character count estimate;
+  without it every line goes straight to PARSEQ-100.
+- recog30_max_len / recog50_max_len: result lengths at which a small-model result is re-read
+  by the next larger model (None = the engine's defaults). Higher values cascade less.
+- long_line_split: re-recognize lines that fill PARSEQ-100 as two halves.
+- tcy: apply Tate-Chu-Yoko recognition when the engine has it enabled.
+"""
+from typing import Dict, Optional
+
+
+class OCRPreset:
+    """Named set of pipeline options, see the module docstring."""
+    def __init__(
+        self,
+        name: str,
+        det_max_side: Optional[int] = None,
+        cascade: bool = True,
+        recog30_max_len: Optional[int] = None,
+        recog50_max_len: Optional[int] = None,
+        long_line_split: bool = True,
+        tcy: bool = True,
+    ):
+        self.name = name
+        self.det_max_side = det_max_side
+        self.cascade = cascade
+        self.recog30_max_len = recog30_max_len
+        self.recog50_max_len = recog50_max_len
+        self.long_line_split = long_line_split
+        self.tcy = tcy
+
+    def __repr__(self) -> str:
+        return f"OCRPreset({self.name!r})"
+
+
+PRESETS: Dict[str, OCRPreset] = {
+    # Detection at the detector's own input size, small-model results kept unless they hit the
+    # model's capacity, no split round and no TCY
+    "fast": OCRPreset("fast", det_max_side=1024, recog30_max_len=29, recog50_max_len=49, long_line_split=False, tcy=False),
+    # The engine's standard pipeline
+    "balanced": OCRPreset("balanced"),
+    # Every line through PARSEQ-100
+    "accurate": OCRPreset("accurate", cascade=False),
+}
+DEFAULT_PRESET = "balanced"
+
+
+def get_preset(name: Optional[str] = None) -> OCRPreset:
+    """Returns the named preset (the default one for None). Raises ValueError for unknown names."""
+    try:
+        return PRESETS[name or DEFAULT_PRESET]
+    except KeyError:
+        raise ValueError(f"Unknown preset: {name}") from None
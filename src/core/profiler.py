@@ -0,0 +1,178 @@
+import functools
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.core.pool import task_wrapper
+
+# Leaf frames that indicate a thread is parked (idle pool workers, event loop waiting on I/O).
+# Samples ending in these frames are dropped so flamegraphs only show work.
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+class SamplingProfiler:
+    """
+    Lightweight wall-clock sampling profiler.
+    A daemon thread periodically snapshots the Python stacks of all other threads via
+    sys._current_frames() and aggregates them. The result can be exported as collapsed
+    stacks (flamegraph.pl / speedscope compatible) or as a speedscope JSON document.
+    With `thread_idents`, only those threads (and threads added later with track() or
+    wrap()) are sampled, so concurrent work on other threads stays out of the profile.
+    """
+    def __init__(self, interval: float = 0.005, max_samples: int = 200_000, thread_idents: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.max_samples = max_samples
+        # Thread ident -> number of tracked calls running on it
+        self._idents: Optional[Counter] = Counter(thread_idents) if thread_idents is not None else None
+        self._idents_lock = threading.Lock()
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the sampling thread."""
+        self.started_at = time.perf_counter()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling_profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling and waits for the sampling thread to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started_at is not None:
+            self.duration = time.perf_counter() - self.started_at
+
+    def track(self, ident: int):
+        """Adds a thread to the sampled threads (no-op when sampling all threads)."""
+        if self._idents is not None:
+            with self._idents_lock:
+                self._idents[ident] += 1
+
+    def untrack(self, ident: int):
+        if self._idents is not None:
+            with self._idents_lock:
+                self._idents[ident] -= 1
+                if self._idents[ident] <= 0:
+                    del self._idents[ident]
+
+    def _tracked(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def tracked(*args, **kwargs):
+            ident = threading.get_ident()
+            self.track(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.untrack(ident)
+        return tracked
+
+    def wrap(self, fn: Callable) -> Callable:
+        """
+        Wraps `fn` so the thread running it is sampled for the duration of the call, along with
+        the pool threads running the tasks it submits (e.g. the engine's line recognition, see
+        task_wrapper in src/core/pool.py).
+        """
+        tracked = self._tracked(fn)
+
+        @functools.wraps(fn)
+        def traced(*args, **kwargs):
+            with task_wrapper(self._tracked):
+                return tracked(*args, **kwargs)
+        return traced
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            if self.sample_count >= self.max_samples:
+                continue
+            idents = None
+            if self._idents is not None:
+                with self._idents_lock:
+                    idents = set(self._idents)
+            if idents is not None and not idents:
+                continue
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or (idents is not None and ident not in idents):
+                    continue
+                leaf = (Path(frame.f_code.co_filename).name, frame.f_code.co_name)
+                if leaf in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, f"thread-{ident}"))
+                self.samples[tuple(reversed(stack))] += 1
+                self.sample_count += 1
+
+    def collapsed(self) -> str:
+        """Returns the profile in collapsed-stack format ("frame;frame;frame count" per line)."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def speedscope(self, name: str = "profile") -> Dict[str, Any]:
+        """Returns the profile as a speedscope "sampled" document with one profile per thread."""
+        frames: list = []
+        frame_index: Dict[str, int] = {}
+        per_thread: Dict[str, Tuple[list, list]] = {}
+
+        for stack, count in self.samples.items():
+            thread_name, frame_labels = stack[0], stack[1:]
+            indices = []
+            for label in frame_labels:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            samples, weights = per_thread.setdefault(thread_name, ([], []))
+            samples.append(indices)
+            weights.append(count * self.interval)
+
+        profiles = []
+        for thread_name, (samples, weights) in per_thread.items():
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "ndlocr-lite-api",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
@@ -0,0 +1,183 @@
+"""
+Registry of model sets served by one process, keyed by the request `model` name.
+
+The default model set is the engine created at startup. Other sets are described in a YAML
+file and loaded on first use as engines that share the default engine's executors and reuse
+any detector or recognizer whose model files match an already loaded one. Least recently
+used sets are unloaded when the weight files of all loaded sets exceed the memory budget.
+
+Example registry file (paths are relative to the file; omitted fields follow the default set):
+
+    models:
+      ndlocr-lite-2025:
+        rec_weights: models/parseq-ndl-16x768-100.onnx
+        rec_weights30: models/parseq-ndl-16x256-30.onnx
+        rec_weights50: models/parseq-ndl-16x384-50.onnx
+      tegaki-finetune:
+        rec_weights: models/parseq-tegaki-100.onnx
+        enable_tcy: true
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from yaml import safe_load
+
+from src.core.engine import NDLOCREngine
+
+DEFAULT_MODEL = "ndlocr-lite"
+
+# Engine arguments a registry entry may set
+MODEL_PATH_FIELDS = ("det_weights", "det_classes", "rec_weights", "rec_weights30", "rec_weights50", "rec_classes")
+MODEL_FIELDS = MODEL_PATH_FIELDS + ("enable_tcy",)
+
+
+def load_model_specs(path: str) -> Dict[str, Dict[str, Any]]:
+    """Reads model set definitions from a registry YAML file. Raises ValueError for invalid entries."""
+    base_dir = Path(path).resolve().parent
+    with open(path, encoding="utf-8") as f:
+        config = safe_load(f) or {}
+    specs: Dict[str, Dict[str, Any]] = {}
+    for name, entry in (config.get("models") or {}).items():
+        entry = entry or {}
+        unknown = set(entry) - set(MODEL_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields for model {name}: {', '.join(sorted(unknown))}")
+        spec = dict(entry)
+        for field in MODEL_PATH_FIELDS:
+            if field in spec:
+                spec[field] = str(base_dir / spec[field])
+        specs[str(name)] = spec
+    return specs
+
+
+class ModelRegistry:
+    """
+    Lazily loaded engines per model name, with LRU unloading under a memory budget.
+    `memory_budget` is in bytes of model weight files (0 = unlimited); files shared between
+    loaded sets are counted once. The default engine is always loaded and never unloaded.
+    """
+    def __init__(
+        self,
+        default_engine: NDLOCREngine,
+        specs: Optional[Dict[str, Dict[str, Any]]] = None,
+        memory_budget: int = 0,
+        engine_kwargs: Optional[Dict[str, Any]] = None,
+        default_name: str = DEFAULT_MODEL,
+    ):
+        self.default_engine = default_engine
+        self.default_name = default_name
+        self.specs = dict(specs or {})
+        self.specs.pop(default_name, None)
+        self.memory_budget = memory_budget
+        self.engine_kwargs = dict(engine_kwargs or {})
+        self._engines: "OrderedDict[str, NDLOCREngine]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._evictions = 0
+
+    def names(self) -> List[str]:
+        """All model names that can be requested."""
+        return [self.default_name] + list(self.specs)
+
+    def get(self, name: Optional[str] = None) -> NDLOCREngine:
+        """
+        Returns the engine serving `name` (the default model for None), loading it on first use.
+        Blocks while the model set loads. Raises KeyError for unknown names.
+        """
+        if name is None or name == self.default_name:
+            return self.default_engine
+        if name not in self.specs:
+            raise KeyError(name)
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is not None:
+                self._engines.move_to_end(name)
+                return engine
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One load per name at a time; concurrent requests for the same model wait for it
+        with load_lock:
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is not None:
+                    self._engines.move_to_end(name)
+                    return engine
+                shared = [self.default_engine] + list(self._engines.values())
+            spec = self.specs[name]
+            # Omitted fields follow the default model set
+            kwargs = dict(self.engine_kwargs, enable_tcy=self.default_engine.enable_tcy)
+            kwargs.update({field: getattr(self.default_engine, field) for field in MODEL_PATH_FIELDS})
+            kwargs.update(spec)
+            engine = NDLOCREngine(shared=shared, **kwargs)
+            with self._lock:
+                self._engines[name] = engine
+                self._loads += 1
+                self._evict_locked(keep=name)
+        return engine
+
+    def _resident_bytes_locked(self) -> int:
+        paths = set(self.default_engine.model_paths())
+        for engine in self._engines.values():
+            paths.update(engine.model_paths())
+        return sum(_file_size(path) for path in paths)
+
+    def _evict_locked(self, keep: str):
+        """Unloads least recently used model sets until the loaded weights fit the budget."""
+        if self.memory_budget <= 0:
+            return
+        while self._resident_bytes_locked() > self.memory_budget:
+            victim = next((name for name in self._engines if name != keep), None)
+            if victim is None:
+                return
+            engine = self._engines.pop(victim)
+            self._evictions += 1
+            # Requests still running on it keep it alive until they finish
+            engine.shutdown()
+            print(f"[INFO] Unloaded model {victim}")
+
+    def reload(self, drain_timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Reloads the model files of the default set and every loaded set without interrupting
+        service (see NDLOCREngine.reload_models). Sets are reloaded one after another, each
+        sharing the new sessions of the sets reloaded before it. Returns the result per set.
+        """
+        with self._lock:
+            engines = list(self._engines.items())
+        results = {self.default_name: self.default_engine.reload_models(drain_timeout)}
+        reloaded = [self.default_engine]
+        for name, engine in engines:
+            results[name] = engine.reload_models(drain_timeout, shared=reloaded)
+            reloaded.append(engine)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded model sets and memory use for monitoring."""
+        with self._lock:
+            return {
+                "default": self.default_name,
+                "available": self.names(),
+                "loaded": [self.default_name] + list(self._engines),
+                "resident_bytes": self._resident_bytes_locked(),
+                "memory_budget": self.memory_budget,
+                "loads": self._loads,
+                "evictions": self._evictions,
+            }
+
+    def shutdown(self):
+        """Shuts down the lazily loaded engines (the default engine is shut down by its owner)."""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.shutdown()
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
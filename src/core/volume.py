@@ -0,0 +1,71 @@
+"""
+Reading inputs from a shared volume.
+
+Co-located services can reference a file under a configured root directory instead of
+uploading it. Paths are resolved strictly inside the root (no absolute paths, no `..`,
+no symlinks leading out of it), and files are memory-mapped so PIL decodes them directly
+from the page cache without copying them through a request body.
+"""
+import mmap
+import os
+import stat
+from pathlib import Path, PurePosixPath
+
+from PIL import Image
+
+
+class InputPathError(ValueError):
+    """Raised for a path that is not a regular file inside the input root."""
+
+
+class InputTooLargeError(ValueError):
+    """Raised for a file above the size limit."""
+
+
+def resolve_input_path(root: str, relative: str) -> Path:
+    """
+    Resolves `relative` (a POSIX path relative to `root`) to an existing regular file inside
+    `root`. Symlinks are followed, but the resolved file must still lie inside the resolved root.
+    Raises InputPathError otherwise.
+    """
+    if not relative or "\0" in relative or "\\" in relative:
+        raise InputPathError("Invalid characters in path")
+    rel = PurePosixPath(relative)
+    if rel.is_absolute() or ".." in rel.parts:
+        raise InputPathError("Path must stay inside the input root")
+    base = Path(root).resolve(strict=True)
+    try:
+        path = (base / rel).resolve(strict=True)
+    except (OSError, RuntimeError):
+        raise InputPathError("File not found")
+    if not path.is_relative_to(base) or path == base:
+        raise InputPathError("Path must stay inside the input root")
+    if not path.is_file():
+        raise InputPathError("Not a regular file")
+    return path
+
+
+def open_mapped_image(path: Path, max_size: int) -> Image.Image:
+    """
+    Opens an image file through a read-only memory mapping. The returned image keeps the
+    mapping alive and decodes from it lazily. Raises InputTooLargeError above `max_size` bytes.
+    """
+    # O_NOFOLLOW: the last component must not have been replaced by a symlink since resolving
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    try:
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode):
+            raise InputPathError("Not a regular file")
+        if info.st_size > max_size:
+            raise InputTooLargeError("File too large")
+        if info.st_size == 0:
+            raise InputPathError("Empty file")
+        # The mapping keeps its own reference to the file, so the descriptor can be closed
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    try:
+        return Image.open(mapped)
+    except Exception:
+        mapped.close()
+        raise
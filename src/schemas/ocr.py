@@ -7,9 +7,12 @@ class OCRLine(BaseModel):
     confidence: float
     boundingBox: List[List[int]]
     class_index: Optional[int] = None
+    pred_char_count: Optional[float] = None # Detector's character count estimate (routes the recognition cascade)
+    filtered: bool = False # Dropped as noise before recognition (reported without text)
 
 class OCRPage(BaseModel):
     index: int
+    name: Optional[str] = None # Source file name (set for multi-image requests)
     markdown: str
     width: int
     height: int
@@ -22,7 +25,7 @@ class OCRResponse(BaseModel):
 
 class OCRJobResponse(BaseModel):
     job_id: str
-    status: str # "pending", "processing", "completed", "failed"
+    status: str # "pending", "processing", "completed", "failed", "cancelled"
 
 class OCRJobResult(BaseModel):
     job_id: str
@@ -31,5 +34,15 @@ class OCRJobResult(BaseModel):
     error: Optional[str] = None
 
 class OCRRequest(BaseModel):
-    image: str = Field(..., max_length=15 * 1024 * 1024) # Base64 encoded image (limit 15MB)
+    image: Optional[str] = Field(None, max_length=15 * 1024 * 1024) # Base64 encoded image (limit 15MB)
+    path: Optional[str] = Field(None, max_length=4096) # File under the server's INPUT_ROOT, instead of image
     model: Optional[str] = "ndlocr-lite"
+
+class OCRLineBox(BaseModel):
+    boundingBox: List[List[int]] # Corner points, as returned in OCRLine.boundingBox
+    pred_char_count: Optional[float] = None
+    confidence: Optional[float] = None
+    class_index: Optional[int] = None
+
+class OCRRecognizeRequest(OCRRequest):
+    lines: List[OCRLineBox]
@@ -166,3 +166,17 @@ def test_ocr_internal_error(client, sample_image_path, monkeypatch):
         )
     assert response.status_code == 500
     assert "An internal error occurred during OCR processing" in response.json()["detail"]
+
+@pytest.mark.parametrize("recognition_workers,web_concurrency,expected", [
+    (0, 1, 8),
+    (0, 4, 2),
+    (0, 16, 1),
+    (3, 4, 3),
+])
+def test_recognition_workers_default(monkeypatch, recognition_workers, web_concurrency, expected):
+    from src.api import main
+    monkeypatch.setattr(main, "RECOGNITION_WORKERS", recognition_workers)
+    monkeypatch.setattr(main, "WEB_CONCURRENCY", web_concurrency)
+    monkeypatch.setattr(main.os, "cpu_count", lambda: 8)
+    with TestClient(app):
+        assert app.state.engine.num_workers == expected
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+import pytest
+from PIL import Image
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", num_workers=3, page_workers=2)
+        yield engine
+        engine.shutdown()
+
+def test_concurrency_limits(engine):
+    assert engine.concurrency_limits() == {"page_workers": 2, "recognition_workers": 3}
+    with pytest.raises(ValueError):
+        with patch('src.core.engine.DEIM'), patch('src.core.engine.PARSEQ'), patch('src.core.engine.safe_load'):
+            NDLOCREngine(device="cpu", page_workers=0)
+
+def test_aocr_runs_on_page_executor_with_bounded_concurrency(engine):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_ocr(img, img_name="image.jpg", **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {"thread": threading.current_thread().name, "name": img_name}
+
+    engine.ocr = fake_ocr
+
+    async def run():
+        img = Image.new('RGB', (10, 10))
+        return await asyncio.gather(*(engine.aocr(img, img_name=f"{i}.jpg") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert [r["name"] for r in results] == [f"{i}.jpg" for i in range(5)]
+    assert all(r["thread"].startswith("ocr_page") for r in results)
+    assert peak == 2
+
+def test_scheduler_shares_engine_page_executor():
+    with TestClient(app) as client:
+        assert app.state.scheduler.executor is app.state.engine.page_executor
+        limits = client.get("/health").json()["concurrency"]
+        assert limits["page_workers"] == sum(app.state.scheduler.lane_limits.values())
@@ -0,0 +1,107 @@
+import io
+import tarfile
+import zipfile
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+import src.api.main
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        engine.detector.classes = {0: "text_block", 1: "line_main"}
+        yield engine
+        engine.shutdown()
+
+def test_ocr_batch_keeps_page_order(engine):
+    engine.detector.detect.return_value = [{"box": [0, 0, 50, 10], "confidence": 0.9, "class_index": 1}]
+    xml = {
+        "a.jpg": '<PAGE><LINE X="0" Y="0" WIDTH="50" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/></PAGE>',
+        "b.jpg": '<PAGE><LINE X="0" Y="0" WIDTH="60" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/>'
+                 '<LINE X="0" Y="20" WIDTH="70" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/></PAGE>',
+    }
+    # Recognized text encodes the crop width so results can be traced back to their page
+    engine.recognizer100.read.side_effect = lambda img: f"w{img.shape[1]}"
+
+    images = [(Image.new('RGB', (100, 100)), "a.jpg"), (Image.new('RGB', (100, 100)), "b.jpg")]
+    with patch('src.core.engine.convert_to_xml_string3', side_effect=lambda w, h, name, c, r: xml[name]), \
+         patch('src.core.engine.eval_xml'):
+        results = engine.ocr_batch(images)
+
+    assert [r["img_info"]["name"] for r in results] == ["a.jpg", "b.jpg"]
+    assert [line["text"] for line in results[0]["lines"]] == ["w50"]
+    assert [line["text"] for line in results[1]["lines"]] == ["w60", "w70"]
+    assert [line["id"] for line in results[1]["lines"]] == [0, 1]
+    assert engine.recognizer100.read.call_count == 3
+
+def _image_bytes(color='white'):
+    buf = io.BytesIO()
+    Image.new('RGB', (20, 20), color=color).save(buf, format='PNG')
+    return buf.getvalue()
+
+def _fake_ocr_batch(images, **kwargs):
+    return [
+        {"text": name, "lines": [], "img_info": {"width": img.width, "height": img.height, "name": name}}
+        for img, name in images
+    ]
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr_batch", _fake_ocr_batch)
+        yield client
+
+def test_batch_multiple_files(client):
+    response = client.post(
+        "/v1/ocr/batch",
+        files=[("files", ("one.png", _image_bytes(), "image/png")), ("files", ("two.png", _image_bytes(), "image/png"))],
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["usage"] == {"pages": 2, "preset": "balanced"}
+    assert [p["name"] for p in data["pages"]] == ["one.png", "two.png"]
+    assert [p["index"] for p in data["pages"]] == [0, 1]
+
+def test_batch_zip_and_tar_archives(client, monkeypatch):
+    monkeypatch.setattr(src.api.main, "BATCH_CHUNK_PAGES", 2)
+    zbuf = io.BytesIO()
+    with zipfile.ZipFile(zbuf, "w") as zf:
+        for name in ("p1.png", "p2.png", "p3.png"):
+            zf.writestr(name, _image_bytes())
+    tbuf = io.BytesIO()
+    with tarfile.open(fileobj=tbuf, mode="w:gz") as tf:
+        data = _image_bytes()
+        info = tarfile.TarInfo("p4.png")
+        info.size = len(data)
+        tf.addfile(info, io.BytesIO(data))
+
+    response = client.post(
+        "/v1/ocr/batch",
+        files=[("files", ("pages.zip", zbuf.getvalue(), "application/zip")), ("files", ("pages.tar.gz", tbuf.getvalue(), "application/gzip"))],
+    )
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()["pages"]] == ["p1.png", "p2.png", "p3.png", "p4.png"]
+
+def test_batch_too_many_images(client, monkeypatch):
+    monkeypatch.setattr(src.api.main, "MAX_BATCH_IMAGES", 1)
+    response = client.post(
+        "/v1/ocr/batch",
+        files=[("files", ("one.png", _image_bytes(), "image/png")), ("files", ("two.png", _image_bytes(), "image/png"))],
+    )
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Too many images in batch"
+
+def test_batch_invalid_image(client):
+    response = client.post("/v1/ocr/batch", files=[("files", ("bad.png", b"not an image", "image/png"))])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid request: Invalid image data or format"
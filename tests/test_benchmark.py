@@ -0,0 +1,56 @@
+import json
+from src.benchmark import (
+    StubNDLOCREngine,
+    benchmark_engine,
+    compare_to_baseline,
+    main,
+    percentile_summary,
+    synthetic_corpus,
+)
+
+def test_percentile_summary():
+    summary = percentile_summary([0.001, 0.002, 0.003, 0.004])
+    assert summary["max"] == 4.0
+    assert summary["mean"] == 2.5
+    assert summary["p50"] == 2.5
+    assert percentile_summary([]) == {}
+
+def test_benchmark_engine_stub():
+    engine = StubNDLOCREngine(device="cpu")
+    try:
+        report = benchmark_engine(engine, synthetic_corpus(1, size=(400, 600)), warmup=1, iterations=2)
+    finally:
+        engine.shutdown()
+
+    assert report["pages"] == 2
+    assert report["lines"] > 0
+    for stage in ("detect", "layout", "recognition", "format", "total"):
+        assert "p95" in report["stages"][stage]
+    assert report["throughput"]["pages_per_sec"] > 0
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {
+        "stages": {"total": {"p50": 10.0, "p95": 20.0}},
+        "throughput": {"pages_per_sec": 5.0},
+        "peak_rss_mb": 100.0,
+    }
+    same = json.loads(json.dumps(baseline))
+    assert compare_to_baseline(same, baseline, tolerance=0.1) == []
+
+    slower = {
+        "stages": {"total": {"p50": 15.0, "p95": 20.0}},
+        "throughput": {"pages_per_sec": 3.0},
+        "peak_rss_mb": 105.0,
+    }
+    regressions = compare_to_baseline(slower, baseline, tolerance=0.1)
+    assert any(r.startswith("stages.total.p50") for r in regressions)
+    assert any(r.startswith("throughput.pages_per_sec") for r in regressions)
+    assert not any(r.startswith("peak_rss_mb") for r in regressions)
+
+def test_main_stub_with_baseline(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    args = ["--stub", "--synthetic-pages", "1", "--warmup", "0", "--iterations", "1"]
+    assert main(args + ["--save-baseline", str(baseline_path)]) == 0
+    assert "stages" in json.loads(baseline_path.read_text())
+    # A generous tolerance should never flag the same configuration
+    assert main(args + ["--baseline", str(baseline_path), "--tolerance", "100"]) == 0
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from src.core.blank import ink_ratio
+from src.core.engine import NDLOCREngine
+
+def _page(value=255):
+    return np.full((1200, 900, 3), value, dtype=np.uint8)
+
+def test_ink_ratio_white_page():
+    assert ink_ratio(_page()) == 0.0
+
+def test_ink_ratio_ignores_margins_and_tone():
+    img = _page(235)
+    img[:, :20] = 0                                  # scanner edge in the margin
+    img[:, 450:] = 215                               # paper tone change
+    img += np.linspace(0, 20, 900, dtype=np.uint8)[:, None]  # lighting gradient
+    assert ink_ratio(img) == 0.0
+    # A uniformly dark cover has no ink either
+    assert ink_ratio(_page(30)) == 0.0
+
+def test_ink_ratio_small_mark():
+    img = _page()
+    img[1100:1110, 440:460] = 0   # page number
+    assert 0 < ink_ratio(img) < 0.01
+    assert ink_ratio(np.zeros((10, 10, 3), dtype=np.uint8)) == 1.0
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", blank_ink_ratio=0.0005)
+        engine.detector = MagicMock()
+        engine.detector.classes = {i: f"class{i}" for i in range(17)}
+        engine.detector.detect.return_value = []
+        yield engine
+        engine.shutdown()
+
+def test_blank_page_skips_detection(engine):
+    result = engine.ocr(Image.fromarray(_page()), img_name="blank.jpg")
+    assert result["text"] == "" and result["lines"] == []
+    engine.detector.detect.assert_not_called()
+    assert engine.page_stats() == {"blank_pages": 1, "empty_pages": 0, "noise_lines": 0}
+
+def test_empty_detections_skip_reading_order(engine):
+    img = _page()
+    img[100:900:40, 100:800] = 0
+    with patch('src.core.engine.eval_xml') as eval_xml:
+        result = engine.ocr(Image.fromarray(img), img_name="empty.jpg")
+    assert result["lines"] == []
+    engine.detector.detect.assert_called_once()
+    eval_xml.assert_not_called()
+    assert engine.page_stats() == {"blank_pages": 0, "empty_pages": 1, "noise_lines": 0}
+
+def test_ink_ratio_samples_large_pages():
+    img = np.full((4000, 3000, 3), 255, dtype=np.uint8)
+    assert ink_ratio(img) == 0.0
+    img[3700:3730, 1480:1500] = 0   # page number, a few strokes wide
+    img[3700:3730, 1486:1494] = 255
+    assert ink_ratio(img) > 0
+
+def test_api_default_keeps_page_number_only_page():
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+    img = np.full((1200, 900, 3), 255, dtype=np.uint8)
+    img[1100:1110, 445:455] = 0   # lone page number
+    with TestClient(app):
+        engine = app.state.engine
+        assert engine.blank_ink_ratio == 0 or ink_ratio(img) >= engine.blank_ink_ratio
+        with patch.object(engine, "detector") as detector:
+            detector.classes = {i: f"class{i}" for i in range(17)}
+            detector.detect.return_value = []
+            engine.ocr(Image.fromarray(img), img_name="page.jpg")
+            detector.detect.assert_called_once()
@@ -0,0 +1,136 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.boxes import DetectionThresholds, LineFilter, filter_detections, iou_matrix, line_filter_mask, nms
+from src.core.engine import NDLOCREngine
+
+def _det(box, confidence, class_index=1):
+    return {"box": box, "confidence": confidence, "class_index": class_index, "pred_char_count": 100.0}
+
+def test_iou_matrix():
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=float)
+    iou = iou_matrix(boxes)
+    assert iou[0, 0] == pytest.approx(1.0)
+    assert iou[0, 1] == pytest.approx(50 / 150)
+    assert iou[0, 2] == 0.0
+
+def test_nms_is_class_wise():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [0, 0, 10, 10], [2, 0, 12, 10]], dtype=float)
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    classes = np.array([1, 1, 0, 1])
+    # Box 1 is suppressed by box 0; box 2 is another class; box 3 is suppressed by box 0
+    assert list(nms(boxes, scores, classes, 0.5)) == [0, 2]
+    assert list(nms(boxes, scores, classes, 1.0)) == [0, 1, 2, 3]
+
+def test_filter_detections():
+    detections = [
+        _det([0, 0, 100, 10], 0.3),
+        _det([0, 0, 100, 11], 0.9),   # suppresses the first line
+        _det([0, 50, 100, 60], 0.22), # above score, below conf
+        _det([0, 80, 100, 90], 0.1),  # below score
+    ]
+    assert filter_detections(detections, DetectionThresholds(0.2, 0.25, 0.2)) == [detections[1]]
+    assert filter_detections(detections, DetectionThresholds(0.05, 0.05, 1.0)) == detections
+    assert filter_detections([], DetectionThresholds()) == []
+
+def test_line_filter_mask():
+    boxes = np.array([
+        [0, 0, 500, 30],     # line
+        [600, 0, 604, 4],    # speck
+        [0, 100, 900, 102],  # rule
+        [10, 2, 200, 28],    # duplicate inside the first line
+        [0, 200, 500, 230],  # low confidence
+        [0, 300, 500, 330],  # same box twice: the first one is kept
+        [0, 300, 500, 330],
+    ], dtype=float)
+    scores = np.array([0.9, 0.9, 0.9, 0.9, 0.3, 0.9, 0.9])
+    assert list(line_filter_mask(boxes, scores, LineFilter())) == [True] * 7
+    keep = line_filter_mask(boxes, scores, LineFilter(min_area=64, min_conf=0.4, max_aspect=100, max_overlap=0.9))
+    assert list(keep) == [True, False, False, False, False, True, False]
+    # Overlap only counts between lines of the same class (ruby inside a body line is kept)
+    classes = np.array([1, 1, 1, 2, 1, 1, 1])
+    keep = line_filter_mask(boxes, scores, LineFilter(max_overlap=0.9), classes)
+    assert list(keep) == [True, True, True, True, True, True, False]
+    assert not LineFilter().enabled and LineFilter(max_overlap=0.9).enabled
+    assert len(line_filter_mask(np.zeros((0, 4)), np.zeros(0), LineFilter(min_area=1))) == 0
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", detection_cache_size=4)
+        engine.detector = MagicMock()
+        yield engine
+        engine.shutdown()
+
+def test_rethresholding_reuses_raw_detections(engine):
+    engine.detector.detect.return_value = [_det([0, 0, 100, 10], 0.9), _det([0, 50, 100, 60], 0.15)]
+    img = np.zeros((100, 100, 3), dtype=np.uint8)
+    assert len(engine._detect(img)) == 1
+    assert len(engine._detect(img, thresholds=DetectionThresholds(0.1, 0.1, 0.2))) == 2
+    assert engine.detector.detect.call_count == 1
+    assert engine.cache_stats()["detections"]["hits"] == 1
+
+    engine._detect(np.ones((100, 100, 3), dtype=np.uint8))
+    assert engine.detector.detect.call_count == 2
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def test_threshold_query_parameters(monkeypatch):
+    calls = []
+
+    def fake_ocr(img, img_name="image.jpg", thresholds=None, **kwargs):
+        calls.append(thresholds)
+        return {"text": "", "lines": [], "img_info": {"width": 100, "height": 100, "name": img_name}}
+
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", fake_ocr)
+        response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+        assert response.status_code == 200
+        response = client.post("/v1/ocr?det_conf_threshold=0.5", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+        assert response.status_code == 200
+        response = client.post("/v1/ocr?det_iou_threshold=1.5", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+        assert response.status_code == 400
+
+    defaults = app.state.engine.default_thresholds
+    assert calls[0] is None
+    assert calls[1] == DetectionThresholds(defaults.score, 0.5, defaults.iou)
+
+@pytest.mark.parametrize("report", [False, True])
+def test_noise_lines_skip_recognition(report):
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", line_min_area=64, line_max_aspect=100, line_max_overlap=0.9,
+                              report_filtered_lines=report)
+    engine.detector = MagicMock()
+    engine.detector.classes = {i: f"class{i}" for i in range(17)}
+    engine.detector.detect.return_value = [
+        {"box": [100, 100, 600, 140], "confidence": 0.9, "class_index": 1},
+        {"box": [700, 700, 704, 704], "confidence": 0.9, "class_index": 1},  # speck
+        {"box": [110, 105, 200, 135], "confidence": 0.8, "class_index": 1},  # duplicate, below the NMS IoU
+        {"box": [400, 105, 500, 135], "confidence": 0.8, "class_index": 2},  # inside, but of another class
+    ]
+    recognized = []
+
+    def cascade(lines, **kwargs):
+        recognized.extend(lines)
+        return ["text"] * len(lines)
+
+    engine._process_cascade = cascade
+    # No reading order: the lines come from the raw-detection fallback
+    with patch('src.core.engine.eval_xml'):
+        result = engine.ocr(Image.fromarray(np.full((1200, 900, 3), 255, dtype=np.uint8)), img_name="noisy.jpg")
+    engine.shutdown()
+    assert len(recognized) == 2
+    assert [line["text"] for line in result["lines"]] == (["text", "text", "", ""] if report else ["text", "text"])
+    assert [line.get("filtered", False) for line in result["lines"]] == ([False, False, True, True] if report else [False, False])
+    assert engine.page_stats()["noise_lines"] == 2
@@ -0,0 +1,67 @@
+import json
+import pytest
+from PIL import Image
+import src.bulk
+from src.benchmark import StubNDLOCREngine
+from src.bulk import iter_directory, iter_manifest, load_checkpoint, run
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "scans"
+    (root / "vol1").mkdir(parents=True)
+    for name in ("vol1/a.png", "vol1/b.png", "c.jpg"):
+        Image.new('RGB', (200, 300), color='white').save(root / name)
+    (root / "notes.txt").write_text("not an image")
+    return root
+
+@pytest.fixture(autouse=True)
+def stub_engine(monkeypatch):
+    monkeypatch.setattr(src.bulk, "NDLOCREngine", StubNDLOCREngine)
+
+def test_iter_directory(corpus):
+    assert [key for _, key in iter_directory(corpus)] == ["c.jpg", "vol1/a.png", "vol1/b.png"]
+
+def test_iter_manifest(corpus, tmp_path):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# comment\nvol1/a.png\n\nc.jpg\n")
+    assert [key for _, key in iter_manifest(manifest, corpus)] == ["vol1/a.png", "c.jpg"]
+
+def test_run_writes_outputs_and_resumes(corpus, tmp_path):
+    out = tmp_path / "out"
+    checkpoint = out / ".checkpoint.jsonl"
+    stats = run(iter_directory(corpus), out, checkpoint, workers=0, formats=["json", "txt"], engine_kwargs={"device": "cpu"})
+
+    assert stats["done"] == 3 and stats["failed"] == 0
+    result = json.loads((out / "vol1" / "a.png.json").read_text(encoding="utf-8"))
+    assert result["img_info"]["name"] == "a.png"
+    assert (out / "c.jpg.txt").exists()
+    assert load_checkpoint(checkpoint) == {"c.jpg", "vol1/a.png", "vol1/b.png"}
+
+    # A second run finds everything in the checkpoint and does no work
+    stats = run(iter_directory(corpus), out, checkpoint, workers=0, formats=["json"], engine_kwargs={"device": "cpu"})
+    assert stats["done"] == 0 and stats["skipped"] == 3
+
+def test_failed_images_are_retried_on_request(corpus, tmp_path):
+    (corpus / "broken.png").write_bytes(b"not an image")
+    out = tmp_path / "out"
+    checkpoint = out / ".checkpoint.jsonl"
+    stats = run(iter_directory(corpus), out, checkpoint, workers=0, formats=["json"], engine_kwargs={"device": "cpu"})
+    assert stats["failed"] == 1
+
+    assert "broken.png" in load_checkpoint(checkpoint)
+    assert "broken.png" not in load_checkpoint(checkpoint, retry_failed=True)
+
+def _failing_engine(**kwargs):
+    raise FileNotFoundError("model not found")
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_engine_load_failure_stops_the_run(corpus, tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(src.bulk, "NDLOCREngine", _failing_engine)
+    out = tmp_path / "out"
+    checkpoint = out / ".checkpoint.jsonl"
+    # Spawned workers import the real engine: a missing model file fails there as well
+    engine_kwargs = {"device": "cpu", "det_weights": str(tmp_path / "missing.onnx")}
+    with pytest.raises(RuntimeError, match="Failed to load the OCR engine"):
+        run(iter_directory(corpus), out, checkpoint, workers=workers, formats=["json"], engine_kwargs=engine_kwargs)
+    # Nothing is recorded, so a fixed run processes every image
+    assert load_checkpoint(checkpoint) == set()
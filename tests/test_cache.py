@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+from unittest.mock import MagicMock, patch
+from src.core.cache import LRUCache, page_signature, pages_match, region_hash
+from src.core.engine import NDLOCREngine, RecogLine
+
+def test_lru_cache_eviction_and_stats():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+def _page(text_rows):
+    img = Image.new('RGB', (400, 600), color='white')
+    draw = ImageDraw.Draw(img)
+    for y in text_rows:
+        draw.rectangle([40, y, 360, y + 12], fill='black')
+    return img
+
+def test_page_signature_tolerates_small_edits():
+    page = _page([50, 100, 150, 200])
+    edited = page.copy()
+    ImageDraw.Draw(edited).rectangle([100, 100, 103, 103], fill='white')
+    key, thumb = page_signature(page)
+    edited_key, edited_thumb = page_signature(edited)
+    assert key == edited_key and pages_match(thumb, edited_thumb)
+
+    other_key, other_thumb = page_signature(_page([52, 102, 152, 202, 252]))
+    assert not pages_match(thumb, other_thumb)
+    assert page_signature(page.resize((400, 601)))[0] != key
+
+def test_region_hash_is_exact():
+    crop = np.zeros((10, 50, 3), dtype=np.uint8)
+    edited = crop.copy()
+    edited[5, 5, 0] = 1
+    assert region_hash(crop) == region_hash(crop.copy())
+    assert region_hash(crop) != region_hash(edited)
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", page_cache_size=4)
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        engine.detector.classes = {0: "text_block", 1: "line_main"}
+        yield engine
+        engine.shutdown()
+
+XML = ('<PAGE><LINE X="40" Y="50" WIDTH="320" HEIGHT="12" TYPE="line_main" PRED_CHAR_CNT="100"/>'
+       '<LINE X="40" Y="100" WIDTH="320" HEIGHT="12" TYPE="line_main" PRED_CHAR_CNT="100"/></PAGE>')
+
+def test_resubmitted_page_only_recognizes_changed_lines(engine):
+    engine.detector.detect.return_value = [{"box": [40, 50, 360, 62], "confidence": 0.9, "class_index": 1}]
+    engine.recognizer100.read.side_effect = lambda img: f"ink{int((img < 128).sum())}"
+
+    page = _page([50, 100])
+    edited = page.copy()
+    ImageDraw.Draw(edited).rectangle([100, 100, 103, 103], fill='white')  # touches the second line only
+
+    with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+         patch('src.core.engine.eval_xml'):
+        first = engine.ocr(page, img_name="page.jpg")
+        second = engine.ocr(edited, img_name="page.jpg")
+
+    assert engine.detector.detect.call_count == 2
+    assert engine.recognizer100.read.call_count == 3
+    assert second["lines"][0]["text"] == first["lines"][0]["text"]
+    assert second["lines"][1]["text"] != first["lines"][1]["text"]
+    stats = engine.cache_stats()["pages"]
+    assert stats["hits"] == 1
+    assert stats["reused_lines"] == 1 and stats["recognized_lines"] == 3
+
+def test_cache_disabled_by_default():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+        assert engine.page_cache is None
+        assert engine.cache_stats() == {}
+        engine.shutdown()
+
+def test_line_cache_skips_repeated_crops():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", line_cache_size=16)
+    engine.recognizer30 = MagicMock()
+    engine.recognizer100 = MagicMock()
+    engine.recognizer30.read.return_value = "p.1"
+    engine.recognizer100.read.return_value = "p.1"
+
+    header = np.full((10, 40, 3), 255, dtype=np.uint8)
+    header[2:8, 5:35] = 0
+    other = np.zeros((10, 40, 3), dtype=np.uint8)
+    lines = [RecogLine(header.copy(), 0, 3.0), RecogLine(header.copy(), 1, 3.0), RecogLine(other, 2, 3.0)]
+    assert engine._process_cascade(lines) == ["p.1", "p.1", "p.1"]
+    # The same crop routed to another tier is a separate entry
+    assert engine._process_cascade([RecogLine(header.copy(), 0, 100.0)]) == ["p.1"]
+
+    assert engine.recognizer30.read.call_count == 2
+    assert engine.recognizer100.read.call_count == 1
+    stats = engine.cache_stats()["lines"]
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    engine.shutdown()
+
+def test_resubmitted_page_with_added_line(engine):
+    page = _page([50, 100])
+    edited = page.copy()
+    ImageDraw.Draw(edited).rectangle([40, 310, 239, 313], fill='black')  # a new short line
+    key, thumb = page_signature(page)
+    edited_key, edited_thumb = page_signature(edited)
+    # Perceptually the same page
+    assert key == edited_key and pages_match(thumb, edited_thumb)
+
+    def to_xml(w, h, name, classes, resultobj):
+        # One LINE per detected line box
+        return "<PAGE>" + "".join(
+            f'<LINE X="{x0}" Y="{y0}" WIDTH="{x1 - x0}" HEIGHT="{y1 - y0}" TYPE="line_main" PRED_CHAR_CNT="100"/>'
+            for x0, y0, x1, y1, _, _ in resultobj[1][1]
+        ) + "</PAGE>"
+
+    lines = [{"box": [40, 50, 360, 62], "confidence": 0.9, "class_index": 1},
+             {"box": [40, 100, 360, 112], "confidence": 0.9, "class_index": 1}]
+    engine.recognizer100.read.side_effect = lambda img: f"ink{int((img < 128).sum())}"
+    with patch('src.core.engine.convert_to_xml_string3', side_effect=to_xml), \
+         patch('src.core.engine.eval_xml'):
+        engine.detector.detect.return_value = lines
+        engine.ocr(page, img_name="page.jpg")
+        engine.detector.detect.return_value = lines + [{"box": [40, 310, 240, 314], "confidence": 0.9, "class_index": 1}]
+        second = engine.ocr(edited, img_name="page.jpg")
+
+    assert len(second["lines"]) == 3
+    assert second["lines"][2]["text"] == f"ink{200 * 4 * 3}"
+    # Only the new line is recognized
+    assert engine.recognizer100.read.call_count == 3
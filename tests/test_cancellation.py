@@ -0,0 +1,125 @@
+import io
+import time
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.cancellation import CancellationToken, OCRCancelledError, CANCELLED, DEADLINE_EXCEEDED
+from src.core.engine import NDLOCREngine
+
+def test_token_cancel_and_deadline():
+    token = CancellationToken()
+    assert not token.cancelled and token.reason is None and token.remaining() is None
+    token.cancel()
+    assert token.cancelled and token.reason == CANCELLED
+    with pytest.raises(OCRCancelledError):
+        token.raise_if_cancelled()
+
+    expired = CancellationToken.with_timeout(0.01)
+    time.sleep(0.02)
+    assert expired.cancelled and expired.reason == DEADLINE_EXCEEDED
+    assert not CancellationToken.with_timeout(None).cancelled
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        engine.detector.classes = {0: "text_block", 1: "line_main"}
+        yield engine
+        engine.shutdown()
+
+def test_cancelled_token_skips_pipeline(engine):
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(OCRCancelledError):
+        engine.ocr(Image.new('RGB', (100, 100)), cancel_token=token)
+    engine.detector.detect.assert_not_called()
+
+def test_cancellation_stops_recognition(engine):
+    token = CancellationToken()
+    engine.detector.detect.return_value = [{"box": [0, 0, 50, 10], "confidence": 0.9, "class_index": 1}]
+    xml = '<PAGE><LINE X="0" Y="0" WIDTH="50" HEIGHT="10" PRED_CHAR_CNT="3"/></PAGE>'
+
+    # Cancel as soon as the first tier has run; the cascade must not reach PARSEQ-50/100
+    def read30(img):
+        token.cancel()
+        return "x" * 40
+    engine.recognizer30.read.side_effect = read30
+
+    with patch('src.core.engine.convert_to_xml_string3', return_value=xml), \
+         patch('src.core.engine.eval_xml'):
+        with pytest.raises(OCRCancelledError):
+            engine.ocr(Image.new('RGB', (100, 100)), cancel_token=token)
+    engine.recognizer50.read.assert_not_called()
+    engine.recognizer100.read.assert_not_called()
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _ocr_until_cancelled(img, img_name="image.jpg", cancel_token=None, **kwargs):
+    # Simulates a long page that checks the token between recognition batches
+    for _ in range(500):
+        cancel_token.raise_if_cancelled()
+        time.sleep(0.01)
+    return {"text": "", "lines": [], "img_info": {"width": 100, "height": 100, "name": img_name}}
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _ocr_until_cancelled)
+        yield client
+
+def test_sync_request_deadline(client):
+    started = time.perf_counter()
+    response = client.post(
+        "/v1/ocr",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        headers={"X-Request-Timeout": "0.2"},
+    )
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Request deadline exceeded"
+    assert time.perf_counter() - started < 3
+
+def test_invalid_timeout(client):
+    response = client.post("/v1/ocr?timeout=abc", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 400
+
+def test_cancel_running_job(client):
+    job_id = client.post("/v1/ocr/jobs", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")}).json()["job_id"]
+
+    response = client.delete(f"/v1/ocr/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    # The worker notices the token and leaves the job cancelled without a result
+    time.sleep(0.1)
+    data = client.get(f"/v1/ocr/jobs/{job_id}").json()
+    assert data["status"] == "cancelled"
+    assert data["result"] is None
+
+    assert client.delete(f"/v1/ocr/jobs/{job_id}").status_code == 409
+    assert client.delete("/v1/ocr/jobs/unknown").status_code == 404
+
+def test_job_deadline(client):
+    job_id = client.post(
+        "/v1/ocr/jobs",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        headers={"X-Request-Timeout": "0.1"},
+    ).json()["job_id"]
+
+    for _ in range(50):
+        data = client.get(f"/v1/ocr/jobs/{job_id}").json()
+        if data["status"] == "cancelled":
+            break
+        time.sleep(0.05)
+    assert data["status"] == "cancelled"
+    assert data["error"] == "Job deadline exceeded"
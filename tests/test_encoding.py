@@ -0,0 +1,82 @@
+import io
+import json
+import pytest
+import msgpack
+from PIL import Image
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.api.encoding import negotiate_format, columnar_page, COLUMNAR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+def test_negotiate_format():
+    assert negotiate_format(None) == "json"
+    assert negotiate_format("*/*") == "json"
+    assert negotiate_format("text/html") == "json"
+    assert negotiate_format(COLUMNAR_MEDIA_TYPE) == "columnar"
+    assert negotiate_format(f"application/json;q=0.5, {COLUMNAR_MEDIA_TYPE}") == "columnar"
+    assert negotiate_format(f"{COLUMNAR_MEDIA_TYPE};q=0.2, application/json") == "json"
+    assert negotiate_format(f"{COLUMNAR_MEDIA_TYPE};q=0") == "json"
+
+def test_columnar_page():
+    page = {
+        "index": 0, "name": None, "markdown": "a\nb", "width": 100, "height": 100,
+        "lines": [
+            {"id": 0, "text": "a", "confidence": 0.9, "boundingBox": [[0, 0], [0, 10], [50, 10], [50, 0]], "class_index": 1},
+            {"id": 1, "text": "b", "confidence": 0.8, "boundingBox": [[0, 20], [0, 30], [60, 30], [60, 20]], "class_index": 1},
+        ],
+    }
+    columnar = columnar_page(page)
+    assert columnar["markdown"] == "a\nb"
+    assert columnar["lines"] == {
+        "ids": [0, 1],
+        "texts": ["a", "b"],
+        "confidences": [0.9, 0.8],
+        "boxes": [[0, 0, 50, 10], [0, 20, 60, 30]],
+        "class_indices": [1, 1],
+        "filtered": [False, False],
+    }
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _fake_ocr(img, img_name="image.jpg", **kwargs):
+    return {
+        "text": "line",
+        "lines": [{"boundingBox": [[0, 0], [0, 10], [50, 10], [50, 0]], "id": 0, "text": "line", "confidence": 0.9, "class_index": 1, "pred_char_count": 3.0}],
+        "img_info": {"width": 100, "height": 100, "name": img_name},
+    }
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _fake_ocr)
+        yield client
+
+def test_default_json_response(client):
+    response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json()["pages"][0]["lines"][0]["boundingBox"] == [[0, 0], [0, 10], [50, 10], [50, 0]]
+
+def test_columnar_response(client):
+    response = client.post(
+        "/v1/ocr",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        headers={"Accept": COLUMNAR_MEDIA_TYPE},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    lines = json.loads(response.content)["pages"][0]["lines"]
+    assert lines["texts"] == ["line"] and lines["boxes"] == [[0, 0, 50, 10]]
+
+def test_msgpack_response(client):
+    response = client.post(
+        "/v1/ocr",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        headers={"Accept": MSGPACK_MEDIA_TYPE},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    content = msgpack.unpackb(response.content)
+    assert content["pages"][0]["lines"][0]["text"] == "line"
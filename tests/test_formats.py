@@ -0,0 +1,171 @@
+import io
+import pytest
+from defusedxml import ElementTree as ET
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+from src.core.formats import iter_alto, iter_hocr, iter_page_xml, ALTO_NAMESPACE, PAGE_XML_NAMESPACE
+from src.core.pdf import iter_searchable_pdf
+
+XML = ('<PAGE><TEXTBLOCK>'
+       '<LINE X="0" Y="0" WIDTH="50" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/>'
+       '<LINE X="0" Y="20" WIDTH="60" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/>'
+       '</TEXTBLOCK>'
+       '<LINE X="10" Y="50" WIDTH="30" HEIGHT="10" TYPE="line_main" PRED_CHAR_CNT="100"/></PAGE>')
+
+def _mock_models(engine):
+    engine.detector = MagicMock()
+    engine.recognizer100 = MagicMock()
+    engine.recognizer30 = MagicMock()
+    engine.recognizer50 = MagicMock()
+    engine.detector.classes = {0: "text_block", 1: "line_main"}
+    engine.detector.detect.return_value = [{"box": [0, 0, 50, 10], "confidence": 0.9, "class_index": 1}]
+    engine.recognizer100.read.side_effect = lambda img: f"<w{img.shape[1]}&>"
+
+@pytest.fixture
+def layout():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+    _mock_models(engine)
+    layouts = []
+    with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+         patch('src.core.engine.eval_xml'):
+        engine.ocr(Image.new('RGB', (100, 100)), img_name="page.jpg", on_layout=layouts.append)
+    engine.shutdown()
+    return layouts[0]
+
+def test_alto(layout):
+    root = ET.fromstring("".join(iter_alto([layout, layout])))
+    ns = {"a": ALTO_NAMESPACE}
+    pages = root.findall(".//a:Page", ns)
+    assert len(pages) == 2
+    blocks = pages[0].findall(".//a:TextBlock", ns)
+    assert [len(b.findall("a:TextLine", ns)) for b in blocks] == [2, 1]
+    assert blocks[0].get("WIDTH") == "60" and blocks[0].get("HEIGHT") == "30"
+    strings = [s.get("CONTENT") for s in pages[0].findall(".//a:String", ns)]
+    assert strings == ["<w50&>", "<w60&>", "<w30&>"]
+
+def test_page_xml(layout):
+    root = ET.fromstring("".join(iter_page_xml(layout)))
+    ns = {"p": PAGE_XML_NAMESPACE}
+    assert root.find("p:Page", ns).get("imageFilename") == "page.jpg"
+    refs = root.findall(".//p:RegionRefIndexed", ns)
+    assert [r.get("regionRef") for r in refs] == ["r1", "r2"]
+    lines = root.findall(".//p:TextLine", ns)
+    assert lines[0].find("p:Coords", ns).get("points") == "0,0 50,0 50,10 0,10"
+    assert [l.find("p:TextEquiv/p:Unicode", ns).text for l in lines] == ["<w50&>", "<w60&>", "<w30&>"]
+
+def test_hocr(layout):
+    root = ET.fromstring("".join(iter_hocr([layout])))
+    spans = [e for e in root.iter() if e.get("class") == "ocr_line"]
+    assert [s.text for s in spans] == ["<w50&>", "<w60&>", "<w30&>"]
+    assert spans[0].get("title") == "bbox 0 0 50 10"
+
+def _pdf_text(pdf: bytes):
+    """Text of each page and the box of each character, extracted with pdfium."""
+    pdfium = pytest.importorskip("pypdfium2")
+    document = pdfium.PdfDocument(pdf)
+    pages = []
+    for page in document:
+        textpage = page.get_textpage()
+        count = textpage.count_chars()
+        pages.append((textpage.get_text_range(0, count), [textpage.get_charbox(i) for i in range(count)], page.get_height()))
+    return pages
+
+def test_searchable_pdf(layout):
+    # A tall line goes into the vertical text layer
+    layout.root.find(".//TEXTBLOCK").append(ET.fromstring('<LINE X="80" Y="0" WIDTH="10" HEIGHT="60" STRING="縦書き"/>'))
+    pdf = b"".join(iter_searchable_pdf([(_image_bytes(), layout), (Image.new('L', (100, 100)), layout)]))
+    assert pdf.startswith(b"%PDF") and b"/Count 2" in pdf
+    pages = _pdf_text(pdf)
+    assert len(pages) == 2
+    text, boxes, height = pages[0]
+    for string in ("<w50&>", "<w60&>", "<w30&>", "縦書き"):
+        assert string in text
+    # The vertical characters run down the vertical line's box (x 80-90, y 0-60 from the top)
+    start = text.index("縦書き")
+    vertical = boxes[start:start + 3]
+    assert all(78 <= left and right <= 92 for left, _, right, _ in vertical)
+    tops = [height - top for _, _, _, top in vertical]
+    assert tops == sorted(tops) and tops[0] < 5 and height - vertical[-1][1] <= 62
+
+def test_searchable_pdf_vertical_only(layout):
+    for line in list(layout.root.iter("LINE")):
+        line.set("STRING", "")
+    layout.root.find(".//TEXTBLOCK").append(ET.fromstring('<LINE X="40" Y="10" WIDTH="12" HEIGHT="80" STRING="日本語の縦書き"/>'))
+    text, _, _ = _pdf_text(b"".join(iter_searchable_pdf([(_image_bytes(), layout)])))[0]
+    assert text.strip() == "日本語の縦書き"
+
+def _image_bytes(color='white'):
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color=color).save(buf, format='JPEG')
+    return buf.getvalue()
+
+@pytest.mark.parametrize("accept,media_type", [
+    ("application/alto+xml", "application/alto+xml"),
+    ("application/vnd.prima.page+xml", "application/vnd.prima.page+xml"),
+    ("text/vnd.hocr+html", "text/vnd.hocr+html"),
+])
+def test_layout_format_endpoint(accept, media_type):
+    with TestClient(app) as client:
+        _mock_models(app.state.engine)
+        with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+             patch('src.core.engine.eval_xml'):
+            response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")}, headers={"Accept": accept})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(media_type)
+    assert "&lt;w50&amp;&gt;" in response.text
+
+def test_plain_text_endpoint():
+    with TestClient(app) as client:
+        _mock_models(app.state.engine)
+        with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+             patch('src.core.engine.eval_xml'):
+            response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")}, headers={"Accept": "text/plain"})
+    assert response.status_code == 200
+    assert response.text == "<w50&>\n<w60&>\n<w30&>"
+
+def test_pdf_endpoint():
+    with TestClient(app) as client:
+        _mock_models(app.state.engine)
+        with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+             patch('src.core.engine.eval_xml'):
+            response = client.post("/v1/ocr/batch", files=[("files", ("a.jpg", _image_bytes(), "image/jpeg")), ("files", ("b.jpg", _image_bytes('gray'), "image/jpeg"))], headers={"Accept": "application/pdf"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF") and b"/Count 2" in response.content
+    # JPEG uploads are embedded without re-encoding
+    assert response.content.count(b"/DCTDecode") == 2
+
+def test_sync_pdf_endpoint_embeds_jpeg_upload():
+    upload = _image_bytes('gray')
+    with TestClient(app) as client:
+        _mock_models(app.state.engine)
+        with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+             patch('src.core.engine.eval_xml'):
+            response = client.post("/v1/ocr", files={"file": ("test.jpg", upload, "image/jpeg")}, headers={"Accept": "application/pdf"})
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF") and b"/Count 1" in response.content
+    # The JPEG upload is embedded as uploaded, not re-encoded
+    assert upload in response.content
+
+def test_filtered_lines_not_written():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", line_min_area=400, report_filtered_lines=True)
+    _mock_models(engine)
+    layouts = []
+    with patch('src.core.engine.convert_to_xml_string3', return_value=XML), \
+         patch('src.core.engine.eval_xml'):
+        result = engine.ocr(Image.new('RGB', (100, 100)), img_name="page.jpg", on_layout=layouts.append)
+    engine.shutdown()
+    # The 30x10 line is filtered: reported in the result, absent from layout formats
+    assert [line.get("filtered", False) for line in result["lines"]] == [False, False, True]
+    for fmt in (iter_alto(layouts), iter_hocr(layouts), iter_page_xml(layouts[0])):
+        document = "".join(fmt)
+        assert document.count("<TextLine") + document.count('class="ocr_line"') == 2
@@ -0,0 +1,75 @@
+import gzip
+import io
+import time
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.api.encoding import CompressedPayload
+
+def test_compressed_payload_selection():
+    payload = CompressedPayload(b'{"status":"completed"}')
+    body, encoding = payload.select("gzip, deflate")
+    assert encoding == "gzip" and gzip.decompress(body) == b'{"status":"completed"}'
+    assert payload.select("identity") == (b'{"status":"completed"}', None)
+    assert payload.select("gzip;q=0") == (b'{"status":"completed"}', None)
+    assert payload.select("*, gzip;q=0") == (b'{"status":"completed"}', None)
+
+    # With zstd available as well (whatever the installed packages)
+    payload.encoded["zstd"] = b"zstd body"
+    assert payload.select("gzip;q=1, zstd;q=0.5")[1] == "gzip"
+    assert payload.select("gzip, zstd")[1] == "zstd"
+    assert payload.select("*, gzip;q=0")[1] == "zstd"
+    assert payload.select("*, zstd;q=0")[1] == "gzip"
+    assert payload.select("*;q=0.5, gzip")[1] == "gzip"
+    assert payload.select("*;q=0")[1] is None
+
+    assert payload.matches(payload.etag)
+    assert payload.matches(f'"other", W/{payload.etag}')
+    assert not payload.matches('"other"')
+    assert CompressedPayload(b'{"status":"completed"}').etag == payload.etag
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _fake_ocr(img, img_name="image.jpg", **kwargs):
+    return {
+        "text": "line",
+        "lines": [{"boundingBox": [[0, 0], [0, 10], [50, 10], [50, 0]], "id": 0, "text": "line", "confidence": 0.9, "class_index": 1}],
+        "img_info": {"width": 100, "height": 100, "name": img_name},
+    }
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _fake_ocr)
+        yield client
+
+def _wait_completed(client, job_id):
+    for _ in range(100):
+        response = client.get(f"/v1/ocr/jobs/{job_id}")
+        if response.json()["status"] == "completed":
+            return response
+        time.sleep(0.02)
+    pytest.fail("Job did not complete")
+
+def test_completed_job_served_compressed_with_etag(client):
+    job_id = client.post("/v1/ocr/jobs", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")}).json()["job_id"]
+    response = _wait_completed(client, job_id)
+
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert response.json()["result"]["pages"][0]["lines"][0]["text"] == "line"
+    # Only the compressed payload holds the result
+    assert app.state.job_store.get(job_id).result is None
+
+    not_modified = client.get(f"/v1/ocr/jobs/{job_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+    identity = client.get(f"/v1/ocr/jobs/{job_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == response.json()
@@ -0,0 +1,87 @@
+import io
+import threading
+import time
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.api.scheduler import CostBudget
+
+def test_budget_admits_until_full():
+    budget = CostBudget(2.0)
+    first = budget.try_reserve(1.5)
+    assert first is not None
+    assert budget.try_reserve(1.0) is None
+    assert budget.usage()["rejected"] == 1
+
+    # Re-estimating after detection frees budget for other pages
+    first.update(0.5)
+    second = budget.try_reserve(1.0)
+    assert second is not None
+    assert budget.usage()["in_flight"] == 2
+
+    first.release()
+    first.release()
+    second.release()
+    assert budget.usage()["in_flight_cost"] == 0
+
+def test_budget_admits_oversized_page_when_idle():
+    budget = CostBudget(1.0)
+    reservation = budget.try_reserve(5.0)
+    assert reservation is not None
+    reservation.release()
+
+def test_disabled_budget_never_sheds():
+    budget = CostBudget(0)
+    reservations = [budget.try_reserve(100.0) for _ in range(3)]
+    assert all(r is not None for r in reservations)
+    assert budget.usage()["utilization"] is None
+
+def test_reserve_waits_for_capacity():
+    budget = CostBudget(1.0)
+    held = budget.try_reserve(1.0)
+    threading.Timer(0.05, held.release).start()
+    started = time.perf_counter()
+    reservation = budget.reserve(1.0, poll_interval=0.01)
+    assert reservation is not None
+    assert time.perf_counter() - started >= 0.04
+
+    assert budget.reserve(1.0, should_abort=lambda: True, poll_interval=0.01) is None
+    reservation.release()
+
+def test_cost_estimates():
+    budget = CostBudget(10.0, cost_per_megapixel=2.0, cost_per_line=0.1)
+    assert budget.estimate_pixels(500_000) == pytest.approx(1.0)
+    assert budget.estimate_lines(20) == pytest.approx(2.0)
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def test_sync_request_shed_when_over_budget(monkeypatch):
+    with TestClient(app) as client:
+        budget = CostBudget(0.01)
+        monkeypatch.setattr(app.state, "cost_budget", budget)
+        held = budget.try_reserve(0.01)
+
+        response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+        health = client.get("/health").json()
+        assert health["load"]["rejected"] == 1
+        assert health["load"]["in_flight"] == 1
+        held.release()
+
+def test_sync_request_releases_budget(monkeypatch):
+    with TestClient(app) as client:
+        budget = CostBudget(10.0)
+        monkeypatch.setattr(app.state, "cost_budget", budget)
+        monkeypatch.setattr(
+            app.state.engine, "ocr",
+            lambda img, img_name="image.jpg", **kwargs: {"text": "", "lines": [], "img_info": {"width": 100, "height": 100, "name": img_name}},
+        )
+        response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+        assert response.status_code == 200
+        assert budget.usage()["in_flight"] == 0
@@ -0,0 +1,123 @@
+import io
+import base64
+import json
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        engine.detector.classes = {0: "text_block", 1: "line_main"}
+        yield engine
+        engine.shutdown()
+
+def test_detect_lines_skips_recognition(engine):
+    engine.detector.detect.return_value = [{"box": [0, 0, 50, 10], "confidence": 0.9, "class_index": 1}]
+    result = engine.detect_lines(Image.new('RGB', (100, 100)), img_name="test.jpg")
+
+    assert len(result["lines"]) == 1
+    assert result["lines"][0]["text"] == ""
+    assert result["text"] == ""
+    engine.recognizer30.read.assert_not_called()
+    engine.recognizer50.read.assert_not_called()
+    engine.recognizer100.read.assert_not_called()
+
+def test_recognize_lines_skips_detection(engine):
+    engine.recognizer30.read.return_value = "short"
+    engine.recognizer100.read.return_value = "long"
+    boxes = [
+        {"box": [0, 0, 50, 10], "pred_char_count": 3.0},
+        {"box": [0, 20, 500, 30]},       # clipped to the image width
+        {"box": [60, 60, 60, 70]},       # degenerate, not recognized
+    ]
+    result = engine.recognize_lines(Image.new('RGB', (100, 100)), boxes, img_name="test.jpg")
+
+    engine.detector.detect.assert_not_called()
+    assert [line["text"] for line in result["lines"]] == ["short", "long", ""]
+    assert result["lines"][1]["boundingBox"] == [[0, 20], [0, 30], [100, 30], [100, 20]]
+    assert result["text"] == "short\nlong\n"
+    assert engine.recognizer30.read.call_count == 1
+    assert engine.recognizer100.read.call_count == 1
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _fake_result(img_name, texts):
+    return {
+        "text": "\n".join(texts),
+        "lines": [
+            {"boundingBox": [[0, 0], [0, 10], [50, 10], [50, 0]], "id": i, "text": t, "confidence": 0.9, "class_index": 1, "pred_char_count": 3.0}
+            for i, t in enumerate(texts)
+        ],
+        "img_info": {"width": 100, "height": 100, "name": img_name},
+    }
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+def test_detect_mode(client, monkeypatch):
+    ocr = MagicMock()
+    monkeypatch.setattr(app.state.engine, "ocr", ocr)
+    monkeypatch.setattr(app.state.engine, "detect_lines", lambda img, img_name, **kwargs: _fake_result(img_name, [""]))
+
+    response = client.post("/v1/ocr?mode=detect", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 200
+    line = response.json()["pages"][0]["lines"][0]
+    assert line["text"] == "" and line["pred_char_count"] == 3.0
+    ocr.assert_not_called()
+
+def test_invalid_mode(client):
+    response = client.post("/v1/ocr?mode=layout", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 400
+
+def test_recognize_endpoint_multipart_and_json(client, monkeypatch):
+    calls = []
+
+    def fake_recognize(img, boxes, img_name, **kwargs):
+        calls.append(boxes)
+        return _fake_result(img_name, ["text"] * len(boxes))
+
+    monkeypatch.setattr(app.state.engine, "recognize_lines", fake_recognize)
+    lines = [{"boundingBox": [[0, 0], [0, 10], [50, 10], [50, 0]], "pred_char_count": 3.0}]
+
+    response = client.post(
+        "/v1/ocr/recognize",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        data={"lines": json.dumps(lines)},
+    )
+    assert response.status_code == 200
+    assert response.json()["pages"][0]["lines"][0]["text"] == "text"
+    assert calls[0][0]["box"] == [0, 0, 50, 10]
+
+    response = client.post(
+        "/v1/ocr/recognize",
+        json={"image": base64.b64encode(_image_bytes()).decode(), "lines": lines},
+    )
+    assert response.status_code == 200
+    assert calls[1][0]["pred_char_count"] == 3.0
+
+def test_recognize_endpoint_invalid_lines(client):
+    response = client.post(
+        "/v1/ocr/recognize",
+        files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+        data={"lines": "not json"},
+    )
+    assert response.status_code == 400
+
+    response = client.post("/v1/ocr/recognize", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 400
@@ -0,0 +1,65 @@
+import io
+import time
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+from src.api.main import _iter_frames, app
+from src.api.scheduler import CostBudget
+
+def _tiff_bytes(widths):
+    frames = [Image.new('RGB', (width, 40), color='white') for width in widths]
+    buf = io.BytesIO()
+    frames[0].save(buf, format='TIFF', save_all=True, append_images=frames[1:])
+    return buf.getvalue()
+
+def test_iter_frames():
+    img = Image.open(io.BytesIO(_tiff_bytes([30, 40, 50])))
+    frames = list(_iter_frames(img, "scan.tif"))
+    assert [name for _, name, _ in frames] == ["scan_0001.tif", "scan_0002.tif", "scan_0003.tif"]
+    assert [frame.width for frame, _, _ in frames] == [30, 40, 50]
+    assert [decode().width for _, _, decode in frames] == [30, 40, 50]
+
+    single = Image.open(io.BytesIO(_tiff_bytes([30])))
+    assert [name for _, name, _ in _iter_frames(single, "scan.tif")] == ["scan.tif"]
+
+def _fake_ocr_batch(images, **kwargs):
+    assert len(images) <= 2
+    return [
+        {"text": name, "lines": [], "img_info": {"width": img.width, "height": img.height, "name": name}}
+        for img, name in images
+    ]
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr_batch", _fake_ocr_batch)
+        yield client
+
+def test_multipage_tiff_returns_page_per_frame(client):
+    response = client.post("/v1/ocr", files={"file": ("scan.tif", _tiff_bytes([30, 40, 50]), "image/tiff")})
+    assert response.status_code == 200
+    pages = response.json()["pages"]
+    assert [page["index"] for page in pages] == [0, 1, 2]
+    assert [page["width"] for page in pages] == [30, 40, 50]
+    assert pages[1]["name"] == "scan_0002.tif"
+    assert response.json()["usage"]["pages"] == 3
+
+def test_multipage_tiff_job(client):
+    response = client.post("/v1/ocr/jobs", files={"file": ("scan.tif", _tiff_bytes([30, 40]), "image/tiff")})
+    job_id = response.json()["job_id"]
+    for _ in range(100):
+        job = client.get(f"/v1/ocr/jobs/{job_id}").json()
+        if job["status"] == "completed":
+            break
+        time.sleep(0.01)
+    assert [page["width"] for page in job["result"]["pages"]] == [30, 40]
+
+def test_multipage_tiff_shed_when_over_budget(client, monkeypatch):
+    budget = CostBudget(0.01)
+    monkeypatch.setattr(app.state, "cost_budget", budget)
+    held = budget.try_reserve(0.01)
+    response = client.post("/v1/ocr", files={"file": ("scan.tif", _tiff_bytes([30, 40]), "image/tiff")})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    held.release()
+    assert budget.usage()["in_flight"] == 0
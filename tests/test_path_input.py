@@ -0,0 +1,51 @@
+import os
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.core.volume import InputPathError, InputTooLargeError, open_mapped_image, resolve_input_path
+
+@pytest.fixture
+def volume(tmp_path):
+    root = tmp_path / "volume"
+    (root / "vol1").mkdir(parents=True)
+    Image.new('RGB', (120, 80), color='white').save(root / "vol1" / "page.png")
+    (tmp_path / "secret.png").write_bytes(b"outside")
+    os.symlink(tmp_path / "secret.png", root / "escape.png")
+    return root
+
+def test_resolve_input_path(volume):
+    assert resolve_input_path(str(volume), "vol1/page.png") == (volume / "vol1" / "page.png").resolve()
+    for bad in ("../secret.png", "vol1/../../secret.png", str(volume / "vol1" / "page.png"),
+                "escape.png", "vol1", "missing.png", "vol1\\page.png", "", "a\0b"):
+        with pytest.raises(InputPathError):
+            resolve_input_path(str(volume), bad)
+
+def test_open_mapped_image(volume):
+    img = open_mapped_image(volume / "vol1" / "page.png", max_size=1 << 20)
+    assert img.size == (120, 80)
+    assert img.convert('RGB').getpixel((0, 0)) == (255, 255, 255)
+    with pytest.raises(InputTooLargeError):
+        open_mapped_image(volume / "vol1" / "page.png", max_size=10)
+
+def _fake_ocr(img, img_name="image.jpg", **kwargs):
+    return {"text": "", "lines": [], "img_info": {"width": img.width, "height": img.height, "name": img_name}}
+
+def test_path_input_endpoint(volume, monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _fake_ocr)
+        # Disabled unless INPUT_ROOT is set
+        response = client.post("/v1/ocr", json={"path": "vol1/page.png"})
+        assert response.status_code == 400
+
+        monkeypatch.setattr(main, "INPUT_ROOT", str(volume))
+        response = client.post("/v1/ocr", json={"path": "vol1/page.png"})
+        assert response.status_code == 200
+        assert response.json()["pages"][0]["width"] == 120
+
+        response = client.post("/v1/ocr", json={"path": "../secret.png"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid input path"
+        response = client.post("/v1/ocr", json={"path": "vol1/page.png", "image": "abc"})
+        assert response.status_code == 400
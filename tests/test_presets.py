@@ -0,0 +1,109 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.core.engine import NDLOCREngine, RecogLine
+from src.core.presets import PRESETS, get_preset
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu")
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        yield engine
+        engine.shutdown()
+
+def _line(idx, pred_char_cnt, width=100):
+    return RecogLine(np.zeros((10, width, 3), dtype=np.uint8), idx, pred_char_cnt)
+
+def test_get_preset():
+    assert get_preset().name == "balanced"
+    assert get_preset("fast") is PRESETS["fast"]
+    with pytest.raises(ValueError):
+        get_preset("unknown")
+
+def test_accurate_preset_skips_small_models(engine):
+    engine.recognizer100.read.return_value = "text"
+    result = engine._process_cascade([_line(0, 3.0), _line(1, 2.0)], preset=get_preset("accurate"))
+    assert result == ["text", "text"]
+    engine.recognizer30.read.assert_not_called()
+    engine.recognizer50.read.assert_not_called()
+
+def test_fast_preset_cascades_less(engine):
+    # 26 characters: escalated to PARSEQ-50 by the standard pipeline, kept by the fast preset
+    engine.recognizer30.read.return_value = "a" * 26
+    engine.recognizer50.read.return_value = "b"
+    assert engine._process_cascade([_line(0, 3.0)], preset=get_preset("balanced")) == ["b"]
+    assert engine._process_cascade([_line(0, 3.0)], preset=get_preset("fast")) == ["a" * 26]
+
+def test_fast_preset_skips_long_line_split(engine):
+    engine.recognizer100.read.return_value = "x" * 98
+    assert engine._process_cascade([_line(0, 100.0)], preset=get_preset("fast")) == ["x" * 98]
+    assert engine.recognizer100.read.call_count == 1
+    assert engine._process_cascade([_line(0, 100.0)]) == ["x" * 196]
+
+def test_fast_preset_bypasses_tcy(engine):
+    plain = MagicMock()
+    plain.read.return_value = "plain"
+    engine.recognizer100.read.return_value = "tcy"
+    engine._plain_recognizers[id(engine.recognizer100)] = (engine.recognizer100, plain)
+    assert engine._process_cascade([_line(0, 100.0)], preset=get_preset("fast")) == ["plain"]
+    assert engine._process_cascade([_line(0, 100.0)], preset=get_preset("balanced")) == ["tcy"]
+
+def test_detection_resolution(engine):
+    engine.detector.detect.return_value = [{"box": [10, 20, 50, 40], "confidence": 0.9, "class_index": 1}]
+    img = np.zeros((2000, 3000, 3), dtype=np.uint8)
+    detections = engine._detect(img, max_side=1500)
+    assert engine.detector.detect.call_args[0][0].shape == (1000, 1500, 3)
+    assert detections[0]["box"] == [20, 40, 100, 80]
+    engine._detect(img)
+    assert engine.detector.detect.call_args[0][0] is img
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _fake_ocr(img, img_name="image.jpg", preset=None, **kwargs):
+    return {
+        "text": preset.name,
+        "lines": [],
+        "img_info": {"width": 100, "height": 100, "name": img_name},
+    }
+
+@pytest.fixture
+def client(monkeypatch):
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _fake_ocr)
+        yield client
+
+def test_preset_query_parameter(client):
+    response = client.post("/v1/ocr?preset=accurate", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 200
+    assert response.headers["x-ocr-preset"] == "accurate"
+    assert response.json()["pages"][0]["markdown"] == "accurate"
+    assert response.json()["usage"]["preset"] == "accurate"
+
+    response = client.post("/v1/ocr?preset=turbo", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.status_code == 400
+
+def test_overload_degrades_default_preset(client, monkeypatch):
+    monkeypatch.setattr(main, "OVERLOAD_PRESET", "fast")
+    response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.headers["x-ocr-preset"] == "balanced"
+
+    monkeypatch.setattr(app.state.cost_budget, "utilization", lambda: 0.9)
+    response = client.post("/v1/ocr", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.headers["x-ocr-preset"] == "fast"
+    # An explicit preset is honoured under overload
+    response = client.post("/v1/ocr?preset=balanced", files={"file": ("test.jpg", _image_bytes(), "image/jpeg")})
+    assert response.headers["x-ocr-preset"] == "balanced"
@@ -0,0 +1,107 @@
+import io
+import threading
+import time
+import numpy as np
+from PIL import Image
+from fastapi.testclient import TestClient
+import src.api.main
+from src.api.main import app
+from src.core.profiler import SamplingProfiler
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_sampling_profiler_collects_worker_stacks():
+    with SamplingProfiler(interval=0.001) as profiler:
+        worker = threading.Thread(target=busy_wait, args=(0.1,), name="busy_thread")
+        worker.start()
+        worker.join()
+
+    assert profiler.sample_count > 0
+    collapsed = profiler.collapsed()
+    assert any(line.startswith("busy_thread;") and "busy_wait" in line for line in collapsed.splitlines())
+
+    doc = profiler.speedscope(name="test")
+    assert doc["shared"]["frames"]
+    busy = [p for p in doc["profiles"] if p["name"] == "busy_thread"]
+    assert busy and busy[0]["type"] == "sampled"
+    assert len(busy[0]["samples"]) == len(busy[0]["weights"])
+
+def test_sampling_profiler_only_tracked_threads():
+    with SamplingProfiler(interval=0.001, thread_idents=[]) as profiler:
+        tracked = threading.Thread(target=profiler.wrap(busy_wait), args=(0.1,), name="tracked_thread")
+        other = threading.Thread(target=busy_wait, args=(0.1,), name="other_thread")
+        tracked.start()
+        other.start()
+        tracked.join()
+        other.join()
+
+    threads = {stack[0] for stack in profiler.samples}
+    assert threads == {"tracked_thread"}
+
+def _image_bytes():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    return buf.getvalue()
+
+def _slow_ocr(img, img_name="image.jpg", **kwargs):
+    busy_wait(0.05)
+    return {"text": "", "lines": [], "img_info": {"width": 100, "height": 100, "name": img_name}}
+
+class BusyRecognizer:
+    def read(self, npimg):
+        busy_wait(0.05)
+        return "text"
+
+def test_admin_endpoints_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(src.api.main, "ADMIN_TOKEN", "")
+    with TestClient(app) as client:
+        response = client.get("/admin/profiles", headers={"X-Admin-Token": ""})
+        assert response.status_code == 403
+
+def test_profile_header_requires_admin(monkeypatch):
+    monkeypatch.setattr(src.api.main, "ADMIN_TOKEN", "secret")
+    with TestClient(app) as client:
+        monkeypatch.setattr(app.state.engine, "ocr", _slow_ocr)
+        response = client.post(
+            "/v1/ocr",
+            files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+            headers={"X-Profile": "1", "X-Admin-Token": "wrong"},
+        )
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+def test_profile_request_and_retrieve(monkeypatch):
+    monkeypatch.setattr(src.api.main, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    with TestClient(app) as client:
+        engine = app.state.engine
+
+        def recognizing_ocr(img, img_name="image.jpg", **kwargs):
+            # The page thread only waits: the work happens on the recognition threads
+            texts = engine._read_lines(BusyRecognizer(), [np.zeros((24, 100, 3), dtype=np.uint8)] * 6)
+            return {"text": "\n".join(texts), "lines": [], "img_info": {"width": 100, "height": 100, "name": img_name}}
+
+        monkeypatch.setattr(engine, "ocr", recognizing_ocr)
+        response = client.post(
+            "/v1/ocr",
+            files={"file": ("test.jpg", _image_bytes(), "image/jpeg")},
+            headers={"X-Profile": "1", **admin},
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = client.get("/admin/profiles", headers=admin).json()
+        assert listing["profiles"][0]["profile_id"] == profile_id
+
+        collapsed = client.get(f"/admin/profiles/{profile_id}?format=collapsed", headers=admin)
+        assert collapsed.status_code == 200
+        # Recognition frames, sampled on the recognition threads
+        assert any(line.startswith("ocr_worker") and "read (test_profiler.py" in line for line in collapsed.text.splitlines())
+
+        speedscope = client.get(f"/admin/profiles/{profile_id}", headers=admin)
+        assert speedscope.json()["profiles"]
+
+        assert client.get("/admin/profiles/unknown", headers=admin).status_code == 404
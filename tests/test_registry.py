@@ -0,0 +1,90 @@
+import gc
+import io
+import weakref
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+from src.core.registry import ModelRegistry, load_model_specs
+
+@pytest.fixture
+def models(tmp_path):
+    paths = {}
+    for name, size in [("det", 100), ("r100", 10), ("r30", 10), ("r50", 10), ("a100", 50), ("b100", 50)]:
+        path = tmp_path / f"{name}.onnx"
+        path.write_bytes(b"\0" * size)
+        paths[name] = str(path)
+    return paths
+
+@pytest.fixture
+def registry(models):
+    # Each constructor call yields a distinct mock session
+    with patch('src.core.engine.DEIM', side_effect=lambda **kwargs: MagicMock()), \
+         patch('src.core.engine.PARSEQ', side_effect=lambda **kwargs: MagicMock()), \
+         patch('src.core.engine.safe_load'), \
+         patch('builtins.open'):
+        base = NDLOCREngine(device="cpu", det_weights=models["det"], rec_weights=models["r100"],
+                            rec_weights30=models["r30"], rec_weights50=models["r50"])
+        specs = {"a": {"rec_weights": models["a100"]}, "b": {"rec_weights": models["b100"]}}
+        registry = ModelRegistry(base, specs, memory_budget=200)
+        yield registry
+        registry.shutdown()
+        base.shutdown()
+
+def test_lazy_loading_shares_components(registry):
+    base = registry.default_engine
+    assert registry.get(None) is base and registry.get("ndlocr-lite") is base
+    assert registry.stats()["loaded"] == ["ndlocr-lite"]
+
+    variant = registry.get("a")
+    assert registry.get("a") is variant
+    assert registry.stats()["loads"] == 1
+    assert variant.detector is base.detector
+    assert variant.recognizer30 is base.recognizer30
+    assert variant.recognizer100 is not base.recognizer100
+    assert variant.executor is base.executor and variant.page_executor is base.page_executor
+
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+def test_lru_eviction_under_memory_budget(registry):
+    registry.get("a")
+    assert registry.stats()["resident_bytes"] == 180
+    # Loading b would need 230 bytes: a is unloaded
+    registry.get("b")
+    stats = registry.stats()
+    assert stats["loaded"] == ["ndlocr-lite", "b"]
+    assert stats["evictions"] == 1 and stats["resident_bytes"] == 180
+    # Shared executors survive the eviction
+    assert not registry.default_engine.executor._shutdown
+
+def test_evicted_engine_is_released(registry):
+    evicted = weakref.ref(registry.get("a"))
+    registry.get("b")
+    gc.collect()
+    assert evicted() is None
+    # Reloading shares sessions between the sets without keeping references to each other
+    reloaded = weakref.ref(registry.get("b"))
+    registry.reload()
+    registry.get("a")
+    gc.collect()
+    assert reloaded() is None
+
+def test_load_model_specs(tmp_path):
+    config = tmp_path / "models.yaml"
+    config.write_text("models:\n  custom:\n    rec_weights: weights/custom.onnx\n    enable_tcy: true\n")
+    specs = load_model_specs(str(config))
+    assert specs == {"custom": {"rec_weights": str(tmp_path / "weights" / "custom.onnx"), "enable_tcy": True}}
+
+    config.write_text("models:\n  custom:\n    weights: x.onnx\n")
+    with pytest.raises(ValueError):
+        load_model_specs(str(config))
+
+def test_unknown_model_rejected():
+    buf = io.BytesIO()
+    Image.new('RGB', (100, 100), color='white').save(buf, format='JPEG')
+    with TestClient(app) as client:
+        response = client.post("/v1/ocr?model=missing", files={"file": ("test.jpg", buf.getvalue(), "image/jpeg")})
+    assert response.status_code == 400
@@ -0,0 +1,82 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.core.engine import ModelReloadInProgressError, NDLOCREngine
+
+@pytest.fixture
+def engine():
+    # Each constructor call yields a distinct mock session, as a reload creates new ones
+    with patch('src.core.engine.DEIM', side_effect=lambda **kwargs: MagicMock()) as deim, \
+         patch('src.core.engine.PARSEQ', side_effect=lambda **kwargs: MagicMock()), \
+         patch('src.core.engine.safe_load'), \
+         patch('builtins.open'):
+        engine = NDLOCREngine(device="cpu", detection_cache_size=4)
+        engine.deim_mock = deim
+        yield engine
+        engine.shutdown()
+
+def test_reload_swaps_warmed_models(engine):
+    old_detector = engine.detector
+    old_recognizer = engine.recognizer100
+    engine.detection_cache.put("key", [])
+
+    result = engine.reload_models()
+    assert result["generation"] == 1 and result["drained"]
+    assert engine.detector is not old_detector and engine.recognizer100 is not old_recognizer
+    # The new sessions ran before being swapped in; the old ones were left alone
+    engine.detector.detect.assert_called_once()
+    assert engine.recognizer100.read.called
+    old_detector.detect.assert_not_called()
+    assert len(engine.detection_cache) == 0
+    assert engine.reload_stats() == {"generation": 1, "reloads": 1, "in_flight": {}}
+
+def test_reload_drains_calls_on_old_models(engine):
+    old_detector = engine.detector
+    results = []
+    with engine._models_in_use():
+        reloader = threading.Thread(target=lambda: results.append(engine.reload_models(drain_timeout=5)))
+        reloader.start()
+        # New calls already see the new models while the old call is still in flight
+        for _ in range(100):
+            if engine.model_generation == 1:
+                break
+            threading.Event().wait(0.01)
+        assert engine.detector is not old_detector
+        assert engine.reload_stats()["in_flight"] == {0: 1}
+        assert reloader.is_alive()
+        with pytest.raises(ModelReloadInProgressError):
+            engine.reload_models()
+    reloader.join(timeout=5)
+    assert results[0]["drained"]
+
+def test_reload_timeout(engine):
+    with engine._models_in_use():
+        assert not engine.reload_models(drain_timeout=0.05)["drained"]
+
+def test_failed_reload_keeps_models(engine):
+    old_detector = engine.detector
+    engine.deim_mock.side_effect = RuntimeError("corrupt model")
+    with pytest.raises(RuntimeError):
+        engine.reload_models()
+    assert engine.detector is old_detector
+    assert engine.model_generation == 0
+
+def test_reload_endpoint(monkeypatch):
+    with TestClient(app) as client:
+        response = client.post("/admin/models/reload")
+        assert response.status_code == 403
+
+        monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(app.state.engine, "reload_models", lambda *args, **kwargs: {"generation": 1, "load_seconds": 0.1, "drained": True})
+        response = client.post("/admin/models/reload", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json()["models"]["ndlocr-lite"]["generation"] == 1
+
+        def busy(*args, **kwargs):
+            raise ModelReloadInProgressError()
+        monkeypatch.setattr(app.state.engine, "reload_models", busy)
+        response = client.post("/admin/models/reload", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 409
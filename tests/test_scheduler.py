@@ -0,0 +1,93 @@
+import threading
+import time
+import pytest
+from src.api.scheduler import LaneScheduler
+from src.core.pool import PriorityThreadPool, task_priority
+
+@pytest.fixture
+def scheduler():
+    scheduler = LaneScheduler({"interactive": 1, "batch": 1})
+    yield scheduler
+    scheduler.shutdown()
+
+def test_submit_returns_result(scheduler):
+    assert scheduler.submit("interactive", lambda a, b: a + b, 1, b=2).result(timeout=5) == 3
+
+def test_exceptions_propagate(scheduler):
+    def fail():
+        raise RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        scheduler.submit("batch", fail).result(timeout=5)
+
+def test_unknown_lane_rejected(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.submit("nope", lambda: None)
+
+def _page(pool, lines, seconds):
+    """A page fanning its lines out to the shared recognition pool, like NDLOCREngine._read_lines."""
+    return list(pool.map(time.sleep, [seconds] * lines))
+
+def test_interactive_latency_under_batch_load(scheduler):
+    pool = PriorityThreadPool(2, thread_name_prefix="ocr_worker")
+    try:
+        start = time.perf_counter()
+        scheduler.submit("interactive", _page, pool, 10, 0.005).result(timeout=5)
+        alone = time.perf_counter() - start
+
+        # Two batch chunks of 200 lines each: about 0.5 s of queued recognition
+        batch = [scheduler.submit("batch", _page, pool, 200, 0.005, key=f"k{i}") for i in range(2)]
+        time.sleep(0.05)
+        start = time.perf_counter()
+        scheduler.submit("interactive", _page, pool, 10, 0.005).result(timeout=5)
+        loaded = time.perf_counter() - start
+
+        # Only the lines already being recognized are waited for, not the batch backlog
+        assert not all(future.done() for future in batch)
+        assert loaded < alone + 0.1
+        for future in batch:
+            future.result(timeout=10)
+    finally:
+        pool.shutdown()
+
+def test_priority_pool_order():
+    pool = PriorityThreadPool(1)
+    release = threading.Event()
+    order = []
+    try:
+        gate = pool.submit(release.wait, 5)
+        with task_priority(1):
+            low = [pool.submit(order.append, f"low{i}") for i in range(2)]
+        with task_priority(0):
+            high = [pool.submit(order.append, f"high{i}") for i in range(2)]
+        release.set()
+        for future in [gate] + low + high:
+            future.result(timeout=5)
+        assert order == ["high0", "high1", "low0", "low1"]
+    finally:
+        pool.shutdown()
+
+def test_round_robin_between_keys(scheduler):
+    release = threading.Event()
+    order = []
+    gate = scheduler.submit("batch", release.wait, 5)
+    for i in range(3):
+        scheduler.submit("batch", order.append, f"a{i}", key="a")
+    last = scheduler.submit("batch", order.append, "b0", key="b")
+
+    release.set()
+    gate.result(timeout=5)
+    last.result(timeout=5)
+    scheduler.submit("batch", lambda: None, key="a").result(timeout=5)
+    assert order[:2] == ["a0", "b0"]
+
+def test_cancelled_queued_work_is_skipped(scheduler):
+    release = threading.Event()
+    ran = []
+    gate = scheduler.submit("batch", release.wait, 5)
+    queued = scheduler.submit("batch", ran.append, "x")
+    assert queued.cancel()
+
+    release.set()
+    gate.result(timeout=5)
+    scheduler.submit("batch", lambda: None).result(timeout=5)
+    assert ran == []
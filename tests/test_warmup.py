@@ -0,0 +1,52 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.core.engine import NDLOCREngine
+
+@pytest.fixture
+def engine():
+    with patch('src.core.engine.DEIM'), \
+         patch('src.core.engine.PARSEQ'), \
+         patch('src.core.engine.safe_load'):
+        engine = NDLOCREngine(device="cpu", num_workers=4)
+        engine.detector = MagicMock()
+        engine.recognizer100 = MagicMock()
+        engine.recognizer30 = MagicMock()
+        engine.recognizer50 = MagicMock()
+        yield engine
+        engine.shutdown()
+
+def test_warmup_runs_every_model(engine):
+    timings = engine.warmup()
+    assert set(timings) == {"detector", "recognizer30", "recognizer50", "recognizer100"}
+    assert engine.detector.detect.call_args[0][0].shape == (1024, 1024, 3)
+    # Horizontal and vertical lines on all recognition threads
+    shapes = [call[0][0].shape for call in engine.recognizer100.read.call_args_list]
+    assert sorted(shapes) == [(32, 1024, 3)] * 2 + [(1024, 32, 3)] * 2
+    assert engine.recognizer30.read.call_args[0][0].shape[1] == 32
+
+def test_health_not_ready_until_warm(monkeypatch):
+    release = threading.Event()
+
+    def slow_warmup(self):
+        release.wait(5)
+        return {"detector": 0.0}
+
+    monkeypatch.setattr(main, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(NDLOCREngine, "warmup", slow_warmup)
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+        release.set()
+        for _ in range(100):
+            response = client.get("/health")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert response.status_code == 200
+        assert response.json()["ready"] is True